@@ -0,0 +1,611 @@
+"""Правила оповещений по метрикам снимка.
+
+Правило - строка вида
+
+    cpu_busy: cpu_usage min 30s > 90 clear 80 cooldown 60s
+
+то есть имя, метрика (ключ to_record), статистика по скользящему окну
+(mean, min, max, pNN или last без окна), сравнение и порог. Срабатывание
+снимается, только когда значение уйдет за порог clear (гистерезис), а
+повторно правило сработает не раньше чем через cooldown после прошлого раза.
+
+Окна общие для всех правил с одной метрикой и длиной. Среднее - бегущая
+сумма, min и max - монотонные деки, так что добавление сэмпла - O(1)
+амортизированно. Перцентили дает QuantileSketch с ограниченным числом
+корзин (относительная погрешность 1%).
+"""
+import functools
+import math
+import operator
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import deque, namedtuple
+
+OPERATORS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le}
+LEVELS = ('warning', 'critical')
+
+DEFAULT_RULES = (
+    "cpu_busy: cpu_usage min 30s > 90 clear 80 cooldown 60s",
+    "cpu_hot: cpu_temperature p95 1m > 90 clear 85 cooldown 5m critical",
+    "gpu_hot: gpu_temperature p95 5m > 83 clear 78 cooldown 5m critical",
+    "gpu_busy: gpu_usage min 1m > 95 clear 85 cooldown 5m",
+    "mem_high: mem_percent mean 1m > 90 clear 85 cooldown 5m",
+    "disk_full: disk_percent max 5m > 95 clear 93 cooldown 1h critical",
+)
+
+RULE_RE = re.compile(
+    r'^\s*(?P<name>[\w.-]+)\s*:\s*(?P<metric>\w+)\s+(?P<stat>mean|min|max|last|p\d+(?:\.\d+)?)'
+    r'(?:\s+(?P<window>\d+(?:\.\d+)?[smh]?))?\s*(?P<op>>=|<=|>|<)\s*(?P<threshold>-?\d+(?:\.\d+)?)'
+    r'(?:\s+clear\s+(?P<clear>-?\d+(?:\.\d+)?))?(?:\s+cooldown\s+(?P<cooldown>\d+(?:\.\d+)?[smh]?))?'
+    r'(?:\s+(?P<level>warning|critical))?\s*$')
+
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600}
+
+AlertEvent = namedtuple('AlertEvent', 'timestamp rule value state')
+
+
+def parse_duration(text):
+    if text[-1] in DURATION_UNITS:
+        return float(text[:-1]) * DURATION_UNITS[text[-1]]
+    return float(text)
+
+
+class Rule(namedtuple('Rule', 'name metric stat window op threshold clear cooldown level')):
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, text):
+        match = RULE_RE.match(text)
+        if match is None:
+            raise ValueError(f"bad alert rule: {text!r}")
+        threshold = float(match['threshold'])
+        op = match['op']
+        if match['clear'] is not None:
+            clear = float(match['clear'])
+        else:
+            # Без явного clear - 5% гистерезиса в сторону «нормы»
+            clear = threshold - abs(threshold) * 0.05 if op[0] == '>' else threshold + abs(threshold) * 0.05
+        window = parse_duration(match['window']) if match['window'] else 0.0
+        if match['stat'] != 'last' and not window:
+            raise ValueError(f"alert rule {match['name']} needs a window")
+        return cls(match['name'], match['metric'], match['stat'], window, op, threshold, clear,
+                   parse_duration(match['cooldown']) if match['cooldown'] else 60.0,
+                   match['level'] or 'warning')
+
+    def describe(self):
+        window = f" {self.window:g}s" if self.stat != 'last' else ""
+        return f"{self.metric} {self.stat}{window} {self.op} {self.threshold:g}"
+
+
+def load_rules(path):
+    """Правила из файла: по одному в строке, # - комментарий"""
+    rules = []
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                rules.append(Rule.parse(line))
+    return rules
+
+
+class QuantileSketch:
+    """Гистограмма с логарифмическими корзинами (как DDSketch) и удалением.
+
+    Значение v > 0 попадает в корзину ceil(log(v) / log(gamma)); оценка
+    квантиля отличается от точной не больше чем на relative_accuracy.
+    Если корзин больше max_bins, самые младшие сливаются в одну.
+
+    Для каждого спрошенного квантиля хранится курсор: корзина с ответом и
+    число значений ниже нее. add/remove только поправляют счетчик, а запрос
+    сдвигает курсор на соседние корзины - обычно на 0-1 шаг, а не проход
+    по всем корзинам. Скользящее окно работает с готовыми ключами (raw_key
+    считается один раз на сэмпл метрики, а не в каждом окне) и вместо пары
+    add/remove зовет replace_key(): если старое и новое значение в одной
+    корзине (частый случай), ничего не меняется, иначе правятся только
+    курсоры между двумя корзинами. Ключи корзин хранятся отсортированными
+    и правятся на месте, а если ответ остался в корзине курсора, запрос
+    сразу отдает ее сохраненную оценку.
+    """
+    __slots__ = ('gamma', 'log_gamma', 'max_bins', 'bins', 'zeros', 'count', 'floor',
+                 'cursors', '_keys')
+
+    def __init__(self, relative_accuracy=0.01, max_bins=256):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+        self.bins = {}
+        self.zeros = 0  # значения <= 0
+        self.count = 0
+        self.floor = None  # младшая корзина после слияния
+        self.cursors = {}  # q -> [корзина, сколько значений ниже нее, ее оценка]
+        self._keys = []  # отсортированные ключи bins
+
+    def raw_key(self, value):
+        """Корзина значения без учета слияния младших корзин"""
+        if value <= 0:
+            return -math.inf  # корзина нулей ниже всех
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def _clamp(self, key):
+        floor = self.floor
+        return key if floor is None or key == -math.inf or key > floor else floor
+
+    def add(self, value):
+        self.add_key(self.raw_key(value))
+
+    def remove(self, value):
+        self.remove_key(self.raw_key(value))
+
+    def add_key(self, key):
+        self.count += 1
+        if self.floor is not None:
+            key = self._clamp(key)
+        for cursor in self.cursors.values():
+            if key < cursor[0]:
+                cursor[1] += 1
+        bins = self.bins
+        if key in bins:
+            bins[key] += 1
+        else:
+            self._put(key)
+
+    def remove_key(self, key):
+        self.count -= 1
+        if self.floor is not None:
+            key = self._clamp(key)
+        for cursor in self.cursors.values():
+            if key < cursor[0]:
+                cursor[1] -= 1
+        bins = self.bins
+        count = bins.get(key, 0)
+        if count > 1:
+            bins[key] = count - 1
+        else:
+            self._take(key)
+
+    def replace_key(self, old_key, new_key):
+        """remove_key(old_key) + add_key(new_key) за один проход по курсорам"""
+        if self.floor is not None:
+            old_key = self._clamp(old_key)
+            new_key = self._clamp(new_key)
+        if old_key == new_key:
+            return
+        # Курсоры между корзинами: ниже них стало на одно значение больше/меньше
+        if new_key < old_key:
+            low, high, delta = new_key, old_key, 1
+        else:
+            low, high, delta = old_key, new_key, -1
+        for cursor in self.cursors.values():
+            if low < cursor[0] <= high:
+                cursor[1] += delta
+        # Частый случай - обе корзины непустые: правим счетчики на месте
+        bins = self.bins
+        count = bins.get(old_key, 0)
+        if count > 1:
+            bins[old_key] = count - 1
+        else:
+            self._take(old_key)
+        if new_key in bins:
+            bins[new_key] += 1
+        else:
+            self._put(new_key)
+
+    def _put(self, key):
+        if key == -math.inf:
+            self.zeros += 1
+            return
+        bins = self.bins
+        if key in bins:
+            bins[key] += 1
+            return
+        bins[key] = 1
+        keys = self._keys
+        insort(keys, key)
+        if len(bins) > self.max_bins:
+            merged = bins.pop(keys.pop(0))
+            self.floor = keys[0]
+            bins[keys[0]] += merged
+            for cursor in self.cursors.values():
+                if cursor[0] == keys[0]:
+                    cursor[1] -= merged
+
+    def _take(self, key):
+        if key == -math.inf:
+            self.zeros -= 1
+            return
+        bins = self.bins
+        bins[key] -= 1
+        if not bins[key]:
+            del bins[key]
+            keys = self._keys
+            del keys[bisect_left(keys, key)]
+
+    def quantile(self, q):
+        rank = q * (self.count - 1)
+        cursor = self.cursors.get(q)
+        # Ответ в той же корзине, что и в прошлый раз (ниже курсора всегда
+        # не меньше zeros, а в пустом sketch корзин нет)
+        if cursor is not None and cursor[1] <= rank < cursor[1] + self.bins.get(cursor[0], 0):
+            return cursor[2]
+        if not self.count:
+            return None
+        if rank < self.zeros or not self.bins:
+            return 0.0
+        keys, bins = self._keys, self.bins
+        if cursor is None:
+            cursor = self.cursors[q] = [-math.inf, self.zeros, None]
+        # Корзина курсора могла опустеть - берем следующую, ниже нее значений столько же
+        i = bisect_left(keys, cursor[0])
+        below = cursor[1]
+        if i == len(keys):
+            i -= 1  # опустели и все корзины выше - берем последнюю
+            below -= bins[keys[i]]
+        while i > 0 and below > rank:
+            i -= 1
+            below -= bins[keys[i]]
+        while i < len(keys) - 1 and below + bins[keys[i]] <= rank:
+            below += bins[keys[i]]
+            i += 1
+        if keys[i] != cursor[0]:
+            cursor[0], cursor[2] = keys[i], 2 * self.gamma ** keys[i] / (self.gamma + 1)
+        cursor[1] = below
+        return cursor[2]
+
+
+class SampleLog:
+    """Сэмплы одной метрики, общие для всех ее окон.
+
+    Окно - это номер его первого сэмпла в логе, так что сэмпл хранится один
+    раз, а не в каждом окне. Ключи корзин QuantileSketch тоже считаются
+    здесь один раз (keys), если квантили нужны хоть одному окну.
+    """
+    __slots__ = ('times', 'values', 'keys', 'key', 'base')
+
+    def __init__(self):
+        self.times = []
+        self.values = []
+        self.keys = None
+        self.key = None
+        self.base = 0  # номер сэмпла times[0]
+
+    def enable_keys(self, key):
+        if self.keys is None:
+            self.key = key
+            self.keys = [key(value) for value in self.values]
+
+    def append(self, t, value):
+        self.times.append(t)
+        self.values.append(value)
+        if self.keys is not None:
+            self.keys.append(self.key(value))
+
+    def trim(self, start):
+        """Отбрасываем сэмплы раньше start, когда их набралось больше половины"""
+        drop = start - self.base
+        if drop > 1024 and drop * 2 > len(self.times):
+            del self.times[:drop]
+            del self.values[:drop]
+            if self.keys is not None:
+                del self.keys[:drop]
+            self.base = start
+
+
+class SlidingWindow:
+    """Последние seconds секунд лога: сумма и (по запросу) min/max и квантили.
+
+    min/max и квантили ведутся, только если их спрашивает хоть одно правило
+    (enable()), - на каждом сэмпле это самая дорогая часть.
+    """
+    __slots__ = ('seconds', 'log', 'start', 'total', 'min_values', 'min_indices',
+                 'max_values', 'max_indices', 'started', 'sketch', '_evicted')
+
+    def __init__(self, seconds, log):
+        self.seconds = seconds
+        self.log = log
+        self.start = log.base + len(log.times)  # номер первого сэмпла окна
+        self.total = 0.0
+        # Монотонные деки значений и их номеров: в голове - min/max окна
+        self.min_values = self.min_indices = None
+        self.max_values = self.max_indices = None
+        self.started = None
+        self.sketch = None
+        self._evicted = 0
+
+    def add(self, t, value):
+        """Учесть сэмпл, который только что добавлен в log"""
+        if self.started is None:
+            self.started = t
+        log = self.log
+        times = log.times
+        base = log.base
+        index = base + len(times) - 1
+        self.total += value
+        min_values = self.min_values
+        if min_values is not None:
+            min_indices = self.min_indices
+            while min_values and min_values[-1] >= value:
+                min_values.pop()
+                min_indices.pop()
+            min_values.append(value)
+            min_indices.append(index)
+        max_values = self.max_values
+        if max_values is not None:
+            max_indices = self.max_indices
+            while max_values and max_values[-1] <= value:
+                max_values.pop()
+                max_indices.pop()
+            max_values.append(value)
+            max_indices.append(index)
+
+        sketch = self.sketch
+        cutoff = t - self.seconds
+        start = self.start
+        if times[start - base] >= cutoff:
+            if sketch is not None:
+                sketch.add_key(log.keys[-1])
+            return
+        values, keys = log.values, log.keys
+        pending = sketch is not None  # новое значение еще не в sketch
+        while times[start - base] < cutoff:
+            self.total -= values[start - base]
+            if min_values is not None and min_indices[0] == start:
+                min_values.popleft()
+                min_indices.popleft()
+            if max_values is not None and max_indices[0] == start:
+                max_values.popleft()
+                max_indices.popleft()
+            if pending:
+                # Обычно один пришел - один ушел: это одна замена в sketch
+                old_key, new_key = keys[start - base], keys[-1]
+                if old_key != new_key:
+                    sketch.replace_key(old_key, new_key)
+                pending = False
+            elif sketch is not None:
+                sketch.remove_key(keys[start - base])
+            start += 1
+        self._evicted += start - self.start
+        self.start = start
+        if pending:
+            sketch.add_key(keys[-1])
+        if self._evicted > 4096:
+            # Бегущая сумма копит ошибку округления - иногда пересчитываем
+            self._evicted = 0
+            self.total = math.fsum(values[start - base:])
+
+    def count(self):
+        return self.log.base + len(self.log.times) - self.start
+
+    def full(self, t):
+        """Окно покрыто сэмплами целиком (правило не срабатывает сразу после старта)"""
+        return self.started is not None and t - self.started >= self.seconds
+
+    def last(self):
+        return self.log.values[-1] if self.count() else None
+
+    def mean(self):
+        count = self.log.base + len(self.log.times) - self.start
+        return self.total / count if count else None
+
+    def min(self):
+        return self.min_values[0] if self.min_values else None
+
+    def max(self):
+        return self.max_values[0] if self.max_values else None
+
+    def enable(self, stat):
+        """Начать вести статистику stat (по уже накопленным сэмплам тоже)"""
+        log = self.log
+        first = self.start - log.base
+        window = list(enumerate(log.values[first:], self.start))
+        if stat == 'min' and self.min_values is None:
+            self.min_values, self.min_indices = deque(), deque()
+            for index, value in window:
+                while self.min_values and self.min_values[-1] >= value:
+                    self.min_values.pop()
+                    self.min_indices.pop()
+                self.min_values.append(value)
+                self.min_indices.append(index)
+        elif stat == 'max' and self.max_values is None:
+            self.max_values, self.max_indices = deque(), deque()
+            for index, value in window:
+                while self.max_values and self.max_values[-1] <= value:
+                    self.max_values.pop()
+                    self.max_indices.pop()
+                self.max_values.append(value)
+                self.max_indices.append(index)
+        elif stat.startswith('p') and self.sketch is None:
+            self.sketch = QuantileSketch()
+            log.enable_keys(self.sketch.raw_key)
+            for key in log.keys[first:]:
+                self.sketch.add_key(key)
+
+    def quantile(self, q):
+        return self.sketch.quantile(q)
+
+
+def stat_reader(window, stat):
+    """Функция без аргументов, которая возвращает статистику окна"""
+    window.enable(stat)
+    if stat.startswith('p'):
+        return functools.partial(window.sketch.quantile, float(stat[1:]) / 100)
+    return getattr(window, stat)
+
+
+def steady_range(op, bound, firing):
+    """Значения v, при которых compare(v, bound) == firing, как (low, high)"""
+    upward = op in ('>', '>=')  # сравнение истинно для больших значений
+    lower = upward == firing  # нужна граница снизу, а не сверху
+    edge = bound
+    if firing == (op in ('>', '<')):
+        edge = math.nextafter(bound, math.inf if lower else -math.inf)  # bound не входит
+    return (edge, math.inf) if lower else (-math.inf, edge)
+
+
+class RuleState:
+    __slots__ = ('rule', 'compare', 'firing', 'last_fired', 'ready_at', 'keep_firing', 'keep_quiet')
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.compare = OPERATORS[rule.op]
+        self.firing = False
+        self.last_fired = None
+        self.ready_at = -math.inf  # раньше этого момента правило не сработает (cooldown)
+        # Значения статистики, при которых горящее правило не снимется,
+        # а готовое - не сработает
+        self.keep_firing = steady_range(rule.op, rule.clear, True)
+        self.keep_quiet = steady_range(rule.op, rule.threshold, False)
+
+
+class StatCheck:
+    """Одна статистика окна и правила, которые ее проверяют.
+
+    Между сэмплами запоминаются wake - ближайший момент, когда еще не
+    готовое правило сможет сработать (конец cooldown или заполнение окна), -
+    и [low, high]: значения статистики, при которых ни одно правило не
+    сработает и не снимется. Пока wake не наступил и значение в этих
+    пределах, правила не перебираем. А если к тому же ни одно правило не
+    горит и не готово сработать (idle), статистика даже не читается.
+    """
+    __slots__ = ('window', 'read', 'instant', 'states', 'low', 'high', 'wake', 'idle')
+
+    def __init__(self, window, stat, states):
+        self.window = window
+        self.read = stat_reader(window, stat)
+        self.instant = stat == 'last'
+        self.states = states
+        self.low, self.high = math.inf, -math.inf
+        self.wake = -math.inf
+        self.idle = False
+
+
+class AlertEngine:
+    """Оценивает правила на каждом снимке (в потоке сборщика).
+
+    active и log - кортежи, которые целиком заменяются при каждом событии,
+    так что окно читает их из своего потока без блокировок.
+    """
+
+    def __init__(self, rules, metrics=None, log_size=50):
+        rules = [Rule.parse(rule) if isinstance(rule, str) else rule for rule in rules]
+        self.samples = {}  # метрика -> SampleLog, общий для ее окон
+        self.windows = {}  # (метрика, секунды) -> SlidingWindow
+        self.states = []
+        # Метрика -> окна -> статистики -> правила: каждая статистика
+        # считается один раз за сэмпл, сколько бы правил ее ни проверяло
+        groups = {}
+        for rule in rules:
+            if metrics is not None and rule.metric not in metrics:
+                raise ValueError(f"alert rule {rule.name}: unknown metric {rule.metric}")
+            key = (rule.metric, rule.window)
+            window = self.windows.get(key)
+            if window is None:
+                log = self.samples.setdefault(rule.metric, SampleLog())
+                window = self.windows[key] = SlidingWindow(rule.window, log)
+            state = RuleState(rule)
+            self.states.append(state)
+            groups.setdefault(key, {}).setdefault(rule.stat, []).append(state)
+        plan = {}
+        for (metric, seconds), stats in groups.items():
+            window = self.windows[metric, seconds]
+            plan.setdefault(metric, []).append(
+                (window, [StatCheck(window, stat, states) for stat, states in stats.items()]))
+        # Метрика -> (лог, самое длинное окно - по нему лог обрезается, окна)
+        self._plan = {metric: (self.samples[metric], max(windows, key=lambda w: w[0].seconds)[0], windows)
+                      for metric, windows in plan.items()}
+        self.log_size = log_size
+        self.active = ()  # AlertEvent сработавших сейчас правил
+        self.log = ()  # последние события, новые в конце
+        self._lock = threading.Lock()
+
+    def observe(self, snapshot):
+        # Окна идут по монотонным часам: перевод системных (NTP, смена
+        # времени) не должен ни раздувать окна, ни разом их опустошать.
+        # В событиях остается время снимка - его показывает журнал
+        return self.evaluate(time.monotonic(), snapshot.to_record(), snapshot.timestamp)
+
+    def evaluate(self, t, values, timestamp=None):
+        """Добавляет сэмплы и проверяет правила; возвращает новые события.
+
+        t - время для окон и cooldown (монотонное), timestamp - время
+        событий (по умолчанию t).
+        """
+        stamp = t if timestamp is None else timestamp
+        events = []
+        for metric, (log, longest, windows) in self._plan.items():
+            value = values.get(metric)
+            if value is None:
+                continue  # метрики нет в этом снимке
+            log.append(t, value)
+            for window, stats in windows:
+                window.add(t, value)
+                for check in stats:
+                    waiting = t < check.wake
+                    if waiting and check.idle:
+                        continue  # все правила ждут cooldown или заполнения окна
+                    current = check.read()
+                    if waiting and check.low <= current <= check.high:
+                        continue
+                    self._check(check, t, current, events, stamp)
+            log.trim(longest.start)
+
+        if events:
+            self._publish(events)
+        return events
+
+    def _check(self, check, t, current, events, stamp):
+        armed = check.instant or check.window.full(t)
+        wake = math.inf if armed else check.window.started + check.window.seconds
+        idle = True
+        low, high = -math.inf, math.inf
+        for state in check.states:
+            rule = state.rule
+            if state.firing:
+                # Гистерезис: снимаем, только когда значение ушло за clear
+                if not state.compare(current, rule.clear):
+                    state.firing = False
+                    events.append(AlertEvent(stamp, rule, current, 'cleared'))
+            elif armed and t >= state.ready_at and state.compare(current, rule.threshold):
+                state.firing = True
+                state.last_fired = t
+                state.ready_at = t + rule.cooldown
+                events.append(AlertEvent(stamp, rule, current, 'fired'))
+            if state.firing:
+                keep = state.keep_firing
+            elif state.ready_at > t:
+                wake = min(wake, state.ready_at)
+                continue
+            elif armed:
+                keep = state.keep_quiet  # в том числе только что снятое правило
+            else:
+                continue
+            idle = False
+            low, high = max(low, keep[0]), min(high, keep[1])
+        check.low, check.high = low, high
+        check.wake = wake
+        check.idle = idle
+
+    def _publish(self, events):
+        with self._lock:
+            active = {event.rule.name: event for event in self.active}
+            for event in events:
+                if event.state == 'fired':
+                    active[event.rule.name] = event
+                    print(f"🚨 {event.rule.name}: {event.rule.describe()} ({event.value:.1f})",
+                          file=sys.stderr)
+                else:
+                    active.pop(event.rule.name, None)
+                    print(f"✅ {event.rule.name} cleared ({event.value:.1f})", file=sys.stderr)
+            self.active = tuple(active.values())
+            self.log = (self.log + tuple(events))[-self.log_size:]
+
+    def levels(self):
+        """Самый серьезный уровень активных оповещений по каждой метрике"""
+        result = {}
+        for event in self.active:
+            metric = event.rule.metric
+            if LEVELS.index(event.rule.level) >= LEVELS.index(result.get(metric, 'warning')):
+                result[metric] = event.rule.level
+        return result
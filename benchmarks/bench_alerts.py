@@ -0,0 +1,67 @@
+"""Бенчмарк движка оповещений: цена проверки сотен правил на одном сэмпле.
+
+Правила генерируются случайно по всем метрикам ALERT_METRICS со
+статистиками mean/min/max/p50/p95/p99 и окнами от 30 с до 15 мин.
+Сэмплы - синтетическая запись на 1 Гц из bench_recording. Печатается
+медиана и p99 времени evaluate() на сэмпл после прогрева окон.
+
+    python benchmarks/bench_alerts.py --rules 300 --seconds 3600
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alerts import AlertEngine
+from bench_recording import synthetic_records
+from collectors import ALERT_METRICS
+
+STATS = ('mean', 'min', 'max', 'p50', 'p95', 'p99')
+WINDOWS = ('30s', '1m', '5m', '15m')
+
+
+def random_rules(count, seed=0):
+    rng = random.Random(seed)
+    return [f"rule{i}: {rng.choice(ALERT_METRICS)} {rng.choice(STATS)} {rng.choice(WINDOWS)} "
+            f"{rng.choice('<>')} {rng.uniform(0, 100):.1f} cooldown 30s"
+            for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rules', type=int, default=300)
+    parser.add_argument('--seconds', type=int, default=3600)
+    args = parser.parse_args()
+
+    engine = AlertEngine(random_rules(args.rules), ALERT_METRICS)
+    records = list(synthetic_records(args.seconds))
+    warmup = min(900, len(records) // 2)  # самое длинное окно - 15 мин
+
+    # События печатаются в stderr - на время замера глушим
+    stderr, sys.stderr = sys.stderr, open(os.devnull, 'w')
+    timings = []
+    events = 0
+    try:
+        for i, record in enumerate(records):
+            started = time.perf_counter()
+            events += len(engine.evaluate(record['timestamp'], record))
+            if i >= warmup:
+                timings.append((time.perf_counter() - started) * 1e6)
+    finally:
+        sys.stderr.close()
+        sys.stderr = stderr
+
+    timings.sort()
+    print(f"{args.rules} rules over {len(engine.windows)} windows, {len(timings)} samples, "
+          f"{events} events")
+    print(f"evaluate: median {statistics.median(timings):.0f} us, "
+          f"p99 {timings[int(len(timings) * 0.99) - 1]:.0f} us per sample")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
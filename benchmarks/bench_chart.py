@@ -0,0 +1,102 @@
+"""Микробенчмарк графика: старый immediate-режим против ChartRenderer.
+
+Старый draw_simple_chart на каждом кадре удалял все элементы Canvas и
+создавал сетку и линии заново; ChartRenderer только двигает координаты
+существующих элементов. Нужен дисплей (на сервере - через xvfb-run):
+
+    python benchmarks/bench_chart.py
+    python benchmarks/bench_chart.py --frames 200 --points 60 600 3600
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tkinter as tk
+
+from gui import ChartRenderer
+
+COLORS = ['#ff6b6b', '#4ecdc4', '#45b7d1']
+WIDTH, HEIGHT = 370, 80
+
+
+def draw_immediate(canvas, datasets, padding=20):
+    """Прежняя реализация draw_simple_chart (delete("all") + create_line)"""
+    canvas.delete("all")
+    
+    width = canvas.winfo_width()
+    height = canvas.winfo_height()
+    
+    if width <= 1:
+        return
+        
+    chart_width = width - padding * 2
+    chart_height = height - padding * 2
+    
+    for i in range(0, 101, 25):
+        y = padding + (chart_height * (100 - i) / 100)
+        canvas.create_line(padding, y, width - padding, y, 
+                           fill='#404040', dash=(2, 2))
+    
+    for data, color in zip(datasets, COLORS):
+        points = []
+        for i, value in enumerate(data):
+            x = padding + (i * chart_width / (len(data) - 1))
+            y = padding + (chart_height * (100 - value) / 100)
+            points.extend([x, y])
+        
+        if len(points) > 2:
+            canvas.create_line(points, fill=color, smooth=True, width=2)
+
+
+def make_series(length, phase):
+    return [50 + 45 * math.sin(i / 7 + phase) for i in range(length)]
+
+
+def run(root, canvas, draw, points, frames):
+    """Медианное и p95 время кадра (мс), включая перерисовку Tk"""
+    series = [make_series(points + frames, phase) for phase in (0, 1, 2)]
+    timings = []
+    for frame in range(frames):
+        datasets = [data[frame:frame + points] for data in series]
+        start = time.perf_counter()
+        draw(datasets)
+        root.update_idletasks()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=100)
+    parser.add_argument('--points', type=int, nargs='+', default=[60, 3600])
+    args = parser.parse_args()
+    
+    root = tk.Tk()
+    old_canvas = tk.Canvas(root, width=WIDTH, height=HEIGHT, highlightthickness=0)
+    new_canvas = tk.Canvas(root, width=WIDTH, height=HEIGHT, highlightthickness=0)
+    old_canvas.pack()
+    new_canvas.pack()
+    renderer = ChartRenderer(new_canvas, COLORS)
+    root.update()
+    
+    print(f"{'points':>8} {'mode':>10} {'median ms':>10} {'p95 ms':>8}")
+    for points in args.points:
+        results = [
+            ('immediate', run(root, old_canvas, lambda d: draw_immediate(old_canvas, d), points, args.frames)),
+            ('retained', run(root, new_canvas, renderer.draw, points, args.frames)),
+        ]
+        for mode, (median, p95) in results:
+            print(f"{points:>8} {mode:>10} {median:>10.3f} {p95:>8.3f}")
+        print(f"{'':>8} {'speedup':>10} {results[0][1][0] / results[1][1][0]:>9.1f}x")
+    
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Бенчмарк сборщика и отрисовки на синтетических данных с проверкой регрессий.
+
+Каждый источник (nvidia-smi, GPU-эвристика, память, диски, сеть, процессы),
+полный тик collect() и отрисовка графика меряются отдельно на таблицах из
+100, 1k и 10k процессов. psutil подменяется на benchmarks/fakes.FakePsutil,
+nvidia-smi - на скрипт из fakes.write_fake_nvidia_smi, /sys - на дерево из
+fakes.write_fake_sysfs, так что результат не зависит от того, что запущено
+на машине.
+
+Отрисовка меряется в Tk, если есть дисплей (на сервере - через xvfb-run),
+иначе ChartRenderer рисует в заглушку Canvas, а update_display пропускается.
+
+    python benchmarks/bench_collectors.py --save baseline.json
+    python benchmarks/bench_collectors.py --compare baseline.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import collectors
+from fakes import FakePsutil, StubCanvas, write_fake_nvidia_smi, write_fake_sysfs
+
+# Разницу меньше этой (мс) считаем шумом, а не регрессией
+NOISE_FLOOR_MS = 0.05
+
+
+def measure(func, repeat, warmup=3):
+    """Медианное и p95 время вызова, мс"""
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {'median_ms': statistics.median(timings),
+            'p95_ms': timings[max(0, int(len(timings) * 0.95) - 1)]}
+
+
+def wait_for_frame(nvidia, timeout=10.0):
+    """Ждем первый кадр от поддельного nvidia-smi"""
+    nvidia.read()
+    deadline = time.monotonic() + timeout
+    while not nvidia.gpu_stream.is_fresh(5.0):
+        if time.monotonic() > deadline:
+            raise RuntimeError("fake nvidia-smi produced no frame")
+        time.sleep(0.05)
+
+
+def full_tick(collector):
+    """collect(), в котором подошел срок у всех источников сразу"""
+    for name in collector.scheduler.tasks:
+        collector.scheduler.reset(name)
+    return collector.collect()
+
+
+def open_tk():
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception:
+        return None
+    root.destroy()
+    return True
+
+
+def bench_collectors(process_count, repeat, interval, sysfs_root):
+    fake = FakePsutil(process_count)
+    collectors.psutil = fake
+    collector = collectors.MetricsCollector(interval, sysfs_root=sysfs_root, backend='psutil')
+    nvidia = collector.gpu_providers[0]
+    collector.gpu_provider = nvidia
+    collector.gpu_available = nvidia.vendor
+    amd, intel = collector.gpu_providers[1:3]
+    results = {}
+    try:
+        wait_for_frame(nvidia)
+        cases = {
+            'gpu_nvidia': nvidia.read,
+            'gpu_fallback': collector.fallback_gpu.read,
+            'gpu_sysfs': lambda: (amd.read(), intel.read()),
+            # Функция, которую опрашивает планировщик, а не сама заглушка psutil
+            'memory': collector.scheduler.tasks['memory'].func,
+            'disk': collector.disks.usage,
+            'disk_io': collector.disks.io_rates,
+            'network': collector.network.sample,
+            'top_processes': collector.top_processes.sample,
+            'collect': lambda: full_tick(collector),
+        }
+        for name, func in cases.items():
+            results[f'{name}[{process_count}]'] = measure(func, repeat)
+        snapshot = collector.collect()
+    finally:
+        for provider in (nvidia, amd, intel):
+            provider.stop()
+    return results, collector, snapshot
+
+
+def bench_render(collector, snapshot, repeat, use_tk):
+    results = {}
+    if use_tk:
+        from gui import ModernSystemMonitor
+        app = ModernSystemMonitor(collector.interval, collector)
+        # Сборщик в фоне только мешал бы замерам
+        collector.stop()
+        app.root.update()
+        app.update_display(snapshot)
+
+        def draw():
+            app.draw_simple_chart()
+            app.root.update_idletasks()
+
+        def display():
+            app.update_display(snapshot)
+            app.root.update_idletasks()
+
+        results['draw_simple_chart'] = measure(draw, repeat)
+        results['update_display'] = measure(display, repeat)
+        app.root.destroy()
+    else:
+        from gui import ChartRenderer
+        renderer = ChartRenderer(StubCanvas(), ['#ff6b6b', '#4ecdc4', '#45b7d1'])
+        datasets = (snapshot.cpu_history, snapshot.gpu_history, snapshot.mem_history)
+        results['draw_simple_chart[stub]'] = measure(lambda: renderer.draw(datasets), repeat)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Печатает сравнение; возвращает список регрессий"""
+    regressions = []
+    print(f"{'case':<32} {'base ms':>9} {'now ms':>9} {'change':>8}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        before, after = previous['median_ms'], current['median_ms']
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold and after - before > NOISE_FLOOR_MS:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<32} {before:>9.3f} {after:>9.3f} {change:>+7.0%}{flag}")
+    return regressions
+
+
+def run(args, smi_dir, sysfs_dir):
+    write_fake_nvidia_smi(smi_dir)
+    os.environ['PATH'] = smi_dir + os.pathsep + os.environ.get('PATH', '')
+    sysfs_root = write_fake_sysfs(sysfs_dir)
+
+    use_tk = not args.no_tk and open_tk()
+    if not use_tk:
+        print("no Tk display - rendering into a stub canvas", file=sys.stderr)
+
+    results = {}
+    for count in args.processes:
+        collector_results, collector, snapshot = bench_collectors(count, args.repeat, args.interval, sysfs_root)
+        results.update(collector_results)
+    results.update(bench_render(collector, snapshot, args.repeat, use_tk))
+
+    print(f"{'case':<32} {'median ms':>10} {'p95 ms':>8}")
+    for name, result in results.items():
+        print(f"{name:<32} {result['median_ms']:>10.3f} {result['p95_ms']:>8.3f}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'renderer': 'tk' if use_tk else 'stub',
+                'results': results,
+            }, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        print()
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) over {args.threshold:.0%}")
+            return 1
+        print("✅ no regressions")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--interval', type=float, default=0.1,
+                        help="период поддельного nvidia-smi, секунды")
+    parser.add_argument('--no-tk', action='store_true',
+                        help="мерить отрисовку на заглушке Canvas даже при наличии дисплея")
+    parser.add_argument('--save', metavar='PATH', help="сохранить результаты в JSON")
+    parser.add_argument('--compare', metavar='PATH', help="сравнить с сохраненными результатами")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="допустимое замедление медианы (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='fake-nvidia-smi-') as smi_dir, \
+            tempfile.TemporaryDirectory(prefix='fake-sysfs-') as sysfs_dir:
+        return run(args, smi_dir, sysfs_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Бенчмарк таблицы GPU-процессов на поддельном nvidia-smi.
+
+NvidiaProvider запускается на fakes.write_fake_nvidia_smi с --apps
+процессами: --query-compute-apps дает PID, имя и память, pmon - загрузку
+SM. Сначала проверяется, что таблица совпала с заготовленным выводом
+(самый тяжелый процесс первым, память в байтах, SM из pmon), потом
+печатается цена read() на тик - разбор и сборка таблицы идут в потоке
+сборщика, но тик от этого длиннее.
+
+    python benchmarks/bench_gpu_processes.py --apps 200
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collectors import NvidiaProvider
+from fakes import write_fake_nvidia_smi
+
+MIB = 1024 * 1024
+
+
+def wait_for_processes(provider, timeout=15.0):
+    """Ждем, пока оба потока (compute-apps и pmon) дадут первые данные"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = provider.read()
+        if info is not None and info['processes'] and info['processes'][0].sm is not None:
+            return info
+        time.sleep(0.1)
+    raise RuntimeError("fake nvidia-smi produced no process table")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--apps', type=int, default=200)
+    parser.add_argument('--reads', type=int, default=500)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='pcmonitor-gpu-')
+    provider = NvidiaProvider(1.0, write_fake_nvidia_smi(directory, gpus=2, apps=args.apps))
+    try:
+        info = wait_for_processes(provider)
+        top = info['processes']
+        heaviest = top[0]
+        assert info['process_count'] == args.apps, info['process_count']
+        assert heaviest.pid == 1000 + args.apps - 1, heaviest
+        assert heaviest.memory == 256 * args.apps * MIB, heaviest
+        assert [proc.memory for proc in top] == sorted((proc.memory for proc in top), reverse=True)
+        print(f"✅ {args.apps} processes, top: {heaviest.name} pid {heaviest.pid} "
+              f"{heaviest.memory / MIB:.0f} MiB SM {heaviest.sm:.0f}%")
+
+        started = time.perf_counter()
+        for _ in range(args.reads):
+            provider.read()
+        elapsed = time.perf_counter() - started
+        print(f"read(): {elapsed / args.reads * 1e6:.0f} us per tick, "
+              f"{len(provider.process_table.names)} cached names")
+    finally:
+        provider.stop()
+        shutil.rmtree(directory, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
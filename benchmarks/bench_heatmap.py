@@ -0,0 +1,51 @@
+"""Микробенчмарк тепловой карты ядер (CoreHeatmap).
+
+Время кадра для 8..256 логических процессоров при 60 строках истории,
+включая перерисовку Tk. Нужен дисплей (на сервере - через xvfb-run):
+
+    python benchmarks/bench_heatmap.py
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tkinter as tk
+
+from gui import CoreHeatmap
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--cores', type=int, nargs='+', default=[8, 64, 128, 256])
+    args = parser.parse_args()
+    
+    root = tk.Tk()
+    print(f"{'cores':>6} {'median ms':>10} {'p95 ms':>8}")
+    for cores in args.cores:
+        canvas = tk.Canvas(root, width=370, height=60, highlightthickness=0)
+        canvas.pack()
+        heatmap = CoreHeatmap(canvas, rows=60)
+        root.update()
+        
+        rows = [[random.uniform(0, 100) for _ in range(cores)] for _ in range(args.frames)]
+        timings = []
+        for row in rows:
+            start = time.perf_counter()
+            heatmap.push(row)
+            root.update_idletasks()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(f"{cores:>6} {statistics.median(timings):>10.3f} {timings[int(len(timings) * 0.95) - 1]:>8.3f}")
+        canvas.destroy()
+    
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Бенчмарк быстрого пути procfs.py против psutil на одном тике.
+
+Тик - то, что сборщик читает каждый раз: загрузка по ядрам, память и
+счетчики сети. Для каждого бэкенда печатается процессорное время на тик
+и число системных вызовов чтения на тик (syscr из /proc/self/io). Вызовы
+open/close в syscr не входят: psutil делает их на каждый файл каждого
+тика, а procfs.py - ни одного, так что реальная разница еще больше.
+
+Потом проверяется загрузка при опросе 10 Гц: дочерний процесс крутит
+цикл на ядре 0, и procfs должен видеть на нем ~100% в каждом замере
+после первого, а не чередование с 0% (код выхода 1).
+
+    python benchmarks/bench_procfs.py --ticks 2000
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil
+
+from procfs import ProcfsBackend
+
+
+def read_syscalls():
+    with open('/proc/self/io', 'rb') as f:
+        for line in f:
+            if line.startswith(b'syscr:'):
+                return int(line.split()[1])
+    return 0
+
+
+def psutil_tick():
+    psutil.cpu_percent(percpu=True)
+    psutil.virtual_memory()
+    psutil.net_io_counters(pernic=True)
+
+
+def run(tick, ticks):
+    """(мкс процессорного времени на тик, вызовов чтения на тик)"""
+    for _ in range(10):
+        tick()
+    syscalls = read_syscalls()
+    started = time.process_time()
+    for _ in range(ticks):
+        tick()
+    cpu = time.process_time() - started
+    # Само чтение /proc/self/io - тоже один-два вызова, на фоне тысяч тиков не видно
+    return cpu / ticks * 1e6, (read_syscalls() - syscalls) / ticks
+
+
+def spin():
+    os.sched_setaffinity(0, {0})
+    while True:
+        pass
+
+
+def check_fast_polling(rate=10.0, seconds=3.0):
+    """Загрузка ядра 0 под нагрузкой при опросе rate раз в секунду"""
+    spinner = multiprocessing.Process(target=spin, daemon=True)
+    spinner.start()
+    try:
+        time.sleep(0.5)
+        backend = ProcfsBackend.create()
+        samples = []
+        for _ in range(int(seconds * rate)):
+            time.sleep(1 / rate)
+            samples.append(backend.cpu_percent()[0])
+        backend.close()
+    finally:
+        spinner.terminate()
+        spinner.join()
+    print(f"core 0 at {rate:g} Hz: {' '.join(f'{value:.0f}' for value in samples)}")
+    # Первый замер может прийтись на момент сразу после create()
+    return min(samples[1:]) >= 50
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ticks', type=int, default=2000)
+    args = parser.parse_args()
+    
+    backend = ProcfsBackend.create()
+    if backend is None:
+        print("❌ procfs недоступен (нужен Linux)")
+        return 1
+        
+    def procfs_tick():
+        backend.cpu_percent()
+        backend.virtual_memory()
+        backend.net_io_counters()
+        
+    results = [('psutil', run(psutil_tick, args.ticks)), ('procfs', run(procfs_tick, args.ticks))]
+    print(f"{'backend':>8} {'CPU us/tick':>12} {'reads/tick':>11}")
+    for name, (cpu, reads) in results:
+        print(f"{name:>8} {cpu:>12.1f} {reads:>11.1f}")
+    (_, (psutil_cpu, psutil_reads)), (_, (procfs_cpu, procfs_reads)) = results
+    print(f"{'saved':>8} {psutil_cpu - procfs_cpu:>12.1f} {psutil_reads - procfs_reads:>11.1f}"
+          f"  ({psutil_cpu / procfs_cpu:.1f}x less CPU)")
+    if not check_fast_polling():
+        print("❌ procfs drops to 0% between samples at 10 Hz")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
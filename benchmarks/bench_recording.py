@@ -0,0 +1,92 @@
+"""Бенчмарк файла записи: размер за сутки, цена записи, переход и чтение.
+
+Синтетические снимки (случайное блуждание около типичных значений) пишутся
+через SnapshotRecorder так, будто монитор работал --hours часов на 1 Гц.
+Потом файл открывается заново: печатается время построения индекса по
+заголовкам чанков, перехода к случайному моменту (один чанк) и разбора
+всего файла целиком.
+
+    python benchmarks/bench_recording.py --hours 24
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recording import RecordingReader, SnapshotRecorder
+
+GIB = 1024 ** 3
+
+
+def synthetic_records(seconds, start=1_800_000_000.0, seed=0):
+    rng = random.Random(seed)
+    cpu, gpu, temp, mem = 20.0, 5.0, 45.0, 40.0
+    for i in range(seconds):
+        cpu = min(100.0, max(0.0, cpu + rng.gauss(0, 5)))
+        gpu = min(100.0, max(0.0, gpu + rng.gauss(0, 3)))
+        temp = min(95.0, max(30.0, temp + rng.gauss(0, 0.3)))
+        mem = min(100.0, max(5.0, mem + rng.gauss(0, 0.1)))
+        yield {
+            'timestamp': start + i + rng.random() * 0.01,
+            'cpu_usage': cpu, 'cpu_freq': rng.choice([3600, 4200, 4800]), 'cpu_cores': 8,
+            'cpu_temperature': temp + 10,
+            'gpu_vendor': 'nvidia', 'gpu_usage': gpu, 'gpu_memory_used': 2048 + int(gpu * 10),
+            'gpu_memory_total': 24576, 'gpu_temperature': temp, 'gpu_process_count': 3, 'gpu_count': 1,
+            'mem_percent': mem, 'mem_used': mem / 100 * 32 * GIB, 'mem_available': (1 - mem / 100) * 32 * GIB,
+            'mem_total': 32 * GIB,
+            'disk_percent': 63.0, 'disk_used': 630 * GIB, 'disk_free': 370 * GIB, 'disk_total': 1000 * GIB,
+            'disk_read': rng.choice([0.0, 0.0, rng.expovariate(1 / 2e6)]),
+            'disk_write': rng.choice([0.0, rng.expovariate(1 / 5e5)]),
+            'net_upload': rng.expovariate(1 / 2e4), 'net_download': rng.expovariate(1 / 2e5),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hours', type=float, default=24)
+    parser.add_argument('--seeks', type=int, default=200)
+    args = parser.parse_args()
+    seconds = int(args.hours * 3600)
+
+    path = os.path.join(tempfile.mkdtemp(prefix='pcmonitor-rec-'), 'bench.pmrec')
+    snapshots = [SimpleNamespace(to_record=lambda record=record: record)
+                 for record in synthetic_records(seconds)]
+    recorder = SnapshotRecorder(path)
+    started = time.perf_counter()
+    for snapshot in snapshots:
+        recorder.write(snapshot)
+    recorder.close()
+    write_us = (time.perf_counter() - started) / seconds * 1e6
+
+    size = os.path.getsize(path)
+    print(f"{seconds} snapshots: {size / 1e6:.2f} MB, {size / seconds:.1f} B/snapshot, "
+          f"{size / seconds * 86400 / 1e6:.2f} MB/day at 1 Hz, write {write_us:.1f} us/snapshot")
+
+    started = time.perf_counter()
+    reader = RecordingReader(path)
+    print(f"open + index: {len(reader.chunks)} chunks in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    rng = random.Random(1)
+    started = time.perf_counter()
+    for _ in range(args.seeks):
+        target = rng.uniform(reader.start, reader.end)
+        record = next(reader.records(target))
+        assert record['timestamp'] >= target
+    print(f"seek: {(time.perf_counter() - started) / args.seeks * 1000:.2f} ms")
+
+    started = time.perf_counter()
+    count = sum(1 for _ in reader.records())
+    elapsed = time.perf_counter() - started
+    print(f"full decode: {count} records in {elapsed:.2f} s ({elapsed / count * 1e6:.1f} us/record)")
+    reader.close()
+    os.remove(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Бенчмарк приема снимков от многих агентов на loopback.
+
+Запускает DashboardReceiver и N агентов (AgentSender) в одном процессе.
+Каждый раунд все агенты отправляют по снимку, как на 1 Гц, только без
+пауз. Печатаются размеры пакетов, цена разбора одного пакета, пропускная
+способность приемника и сколько пакетов потеряно или отброшено.
+
+    python benchmarks/bench_remote.py --agents 500 --rounds 20
+    python benchmarks/bench_remote.py --agents 100 --transport tcp
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from remote import AgentSender, DashboardReceiver, SnapshotDecoder, SnapshotEncoder, snapshot_values
+
+
+def fake_snapshot(rng):
+    """Снимок с полями, которые читает snapshot_values; меняется часть значений"""
+    return SimpleNamespace(
+        cpu_usage=rng.choice([12.5, 13.0, rng.random() * 100]),
+        cpu_freq=3600.0, cpu_temperature=rng.choice([52.0, 53.0]),
+        gpu_usage=rng.choice([0.0, rng.random() * 100]),
+        gpu_memory_used=2048.0, gpu_memory_total=24576.0, gpu_temperature=50.0,
+        mem_percent=41.2, mem_used=13.1, mem_total=32.0,
+        disk=SimpleNamespace(percent=63.0),
+        disk_read=rng.choice([0.0, rng.random() * 1e6]), disk_write=0.0,
+        net_upload=rng.random() * 1e5, net_download=rng.random() * 1e6,
+    )
+
+
+def bench_codec(count):
+    """(байт в опорном, средний байт в разностном, мкс на decode)"""
+    rng = random.Random(0)
+    encoder = SnapshotEncoder('host-000')
+    packets = [encoder.encode(snapshot_values(fake_snapshot(rng))) for _ in range(count)]
+    keyframe = len(packets[0])
+    deltas = [len(p) for i, p in enumerate(packets) if i % encoder.keyframe_interval]
+    decoder = SnapshotDecoder()
+    start = time.perf_counter()
+    for packet in packets:
+        decoder.decode(packet)
+    decode_us = (time.perf_counter() - start) / count * 1e6
+    return keyframe, sum(deltas) / len(deltas), decode_us
+
+
+def bench_receiver(agents, rounds, transport):
+    receiver = DashboardReceiver('127.0.0.1', 0, transport)
+    receiver.start()
+    senders = [AgentSender(receiver.address, transport, f'host-{i:03d}') for i in range(agents)]
+    rng = random.Random(1)
+    snapshots = [fake_snapshot(rng) for _ in range(agents)]
+    repaints = []
+    try:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for sender, snapshot in zip(senders, snapshots):
+                sender.send(snapshot)
+            # Как панель: одна перерисовка на раунд, сколько бы пакетов ни пришло
+            repaints.append(len(receiver.take_dirty()))
+        expected = agents * rounds
+        deadline = time.monotonic() + 5.0
+        while receiver.packets + receiver.decoder.dropped < expected and time.monotonic() < deadline:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        received = receiver.packets
+        return {
+            'hosts': len(receiver.hosts),
+            'packets_per_s': received / elapsed,
+            'lost': expected - received - receiver.decoder.dropped,
+            'dropped': receiver.decoder.dropped,
+            'max_dirty': max(repaints),
+        }
+    finally:
+        for sender in senders:
+            sender.close()
+        receiver.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--agents', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--transport', choices=('udp', 'tcp'), default='udp')
+    args = parser.parse_args()
+
+    keyframe, delta, decode_us = bench_codec(10000)
+    print(f"packet: keyframe {keyframe} B, delta {delta:.1f} B avg, decode {decode_us:.1f} us")
+
+    result = bench_receiver(args.agents, args.rounds, args.transport)
+    print(f"{args.agents} agents x {args.rounds} rounds over {args.transport}: "
+          f"{result['hosts']} hosts, {result['packets_per_s']:.0f} pkt/s, "
+          f"lost {result['lost']}, dropped deltas {result['dropped']}, "
+          f"max dirty per repaint {result['max_dirty']}")
+    if result['hosts'] != args.agents:
+        print("❌ not all agents reached the dashboard")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Проверка seqlock в shared memory: один писатель, N процессов-читателей.
+
+Писатель без пауз публикует снимки, у которых все числовые поля равны
+номеру снимка, а читатели - отдельные программы, как настоящие
+потребители (этот же скрипт с --reader), - проверяют, что каждая
+прочитанная копия целиком от одного снимка. Любое рваное чтение -
+код выхода 1. Заодно проверяется, что второй писатель не забирает
+сегмент у живого монитора, а сегмент упавшего пересоздает.
+
+    python benchmarks/bench_shm.py --readers 4 --seconds 5
+"""
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shm_snapshot import FIELDS, HEADER, LAYOUT_VERSION, MAGIC, SharedSnapshotReader, SharedSnapshotWriter
+
+
+class FakeSnapshot:
+    """Снимок номер seq: все поля - seq, вендор - его последние цифры"""
+
+    def __init__(self, seq):
+        self.seq = seq
+
+    def to_record(self):
+        record = dict.fromkeys(FIELDS, float(self.seq))
+        record['gpu_vendor'] = str(self.seq)[-16:]
+        return record
+
+
+def read_loop(name, seconds):
+    reader = SharedSnapshotReader(name)
+    reads = torn = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        record = reader.read()
+        if record is None:
+            continue
+        reads += 1
+        seq = record['seq']
+        if (any(record[field] != seq for field in FIELDS)
+                or record['gpu_vendor'] != str(seq)[-16:]):
+            torn += 1
+    reader.close()
+    print(reads, torn)
+
+
+def dead_pid():
+    """PID только что завершившегося процесса - как у упавшего монитора"""
+    process = multiprocessing.Process(target=int)
+    process.start()
+    process.join()
+    return process.pid
+
+
+def check_ownership(name):
+    writer = SharedSnapshotWriter(name)
+    try:
+        SharedSnapshotWriter(name)
+    except FileExistsError as e:
+        print(f"✅ live segment kept: {e}")
+    else:
+        print("❌ second writer took over a live segment")
+        return False
+
+    # Монитор "упал": сегмент остался, в заголовке PID мертвого процесса
+    HEADER.pack_into(writer.buf, 0, MAGIC, LAYOUT_VERSION, 0, dead_pid())
+    writer.buf = None
+    writer.shm.close()
+    replacement = SharedSnapshotWriter(name)
+    replacement.close()
+    print("✅ stale segment from a dead monitor replaced")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--reader', metavar='NAME', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.reader:
+        read_loop(args.reader, args.seconds)
+        return 0
+
+    name = f"pcmonitor-bench-{os.getpid()}"
+    if not check_ownership(name):
+        return 1
+
+    writer = SharedSnapshotWriter(name)
+    try:
+        readers = [subprocess.Popen([sys.executable, os.path.abspath(__file__), '--reader', name,
+                                     '--seconds', str(args.seconds)], stdout=subprocess.PIPE)
+                   for _ in range(args.readers)]
+        writes = 0
+        deadline = time.monotonic() + args.seconds
+        while time.monotonic() < deadline:
+            writes += 1
+            writer.write(FakeSnapshot(writes))
+        totals = [tuple(map(int, reader.communicate(timeout=60)[0].split())) for reader in readers]
+    finally:
+        writer.close()
+
+    reads = sum(count for count, _ in totals)
+    torn = sum(count for _, count in totals)
+    print(f"{writes} writes ({writes / args.seconds:.0f}/s), {args.readers} readers: "
+          f"{reads} reads, {torn} torn")
+    if torn:
+        print("❌ readers saw torn snapshots")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
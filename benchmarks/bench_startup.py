@@ -0,0 +1,66 @@
+"""Бенчмарк старта: от запуска процесса до первой записи, с кэшем железа и без.
+
+Монитор запускается в headless-режиме (--count 1) с поддельным nvidia-smi
+в PATH и отдельным каталогом кэша. Холодный запуск - кэш удален перед
+каждым прогоном, теплый - кэш остался от предыдущего. Время берется из
+строки "⏱ First record ..." в stderr; печатается медиана по прогонам.
+Поддельный nvidia-smi отвечает сразу, так что выигрыш здесь - нижняя
+граница: настоящий на старте драйвера думает заметно дольше.
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fakes import write_fake_nvidia_smi
+
+STARTUP_RE = re.compile(r'⏱ First record (\d+) ms')
+
+
+def launch(env):
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, 'pcmonitor.py'), '--headless', '--count', '1'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=60)
+    match = STARTUP_RE.search(result.stderr.decode())
+    if match is None:
+        raise RuntimeError(f"no startup line in output:\n{result.stderr.decode()}")
+    return int(match.group(1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='pcmonitor-start-')
+    write_fake_nvidia_smi(directory)
+    cache = os.path.join(directory, 'cache')
+    env = dict(os.environ, PATH=directory + os.pathsep + os.environ.get('PATH', ''),
+               XDG_CACHE_HOME=cache, PYTHONIOENCODING='utf-8')
+
+    try:
+        cold = []
+        for _ in range(args.runs):
+            shutil.rmtree(cache, ignore_errors=True)
+            cold.append(launch(env))
+        warm = [launch(env) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"first record, median of {args.runs}: cold {statistics.median(cold):.0f} ms, "
+          f"cached inventory {statistics.median(warm):.0f} ms "
+          f"(saved {statistics.median(cold) - statistics.median(warm):.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Бенчмарк простоя: CPU монитора в обычном, свернутом и скрытом окне.
+
+Окно ModernSystemMonitor работает по --seconds секунд в каждой фазе:
+обычное, свернутое кнопкой "−" и скрытое через withdraw(). Печатается
+доля CPU процесса (UI и поток сборщика вместе, time.process_time) и
+сколько вызовов set_text() дошли до config() - остальные отброшены,
+потому что текст метки не изменился. Нужен дисплей (на сервере - через
+xvfb-run):
+
+    python benchmarks/bench_visibility.py --seconds 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gui import ModernSystemMonitor
+
+
+class CountingMonitor(ModernSystemMonitor):
+    """Считаем вызовы set_text() и настоящие записи в метки"""
+
+    calls = 0
+    writes = 0
+
+    def set_text(self, label, text):
+        self.calls += 1
+        if self._texts.get(label) != text:
+            self.writes += 1
+        super().set_text(label, text)
+
+
+def run_phase(monitor, seconds):
+    calls, writes = monitor.calls, monitor.writes
+    started_cpu = time.process_time()
+    started = time.monotonic()
+    monitor.root.after(int(seconds * 1000), monitor.root.quit)
+    monitor.root.mainloop()
+    cpu = (time.process_time() - started_cpu) / (time.monotonic() - started) * 100
+    return cpu, monitor.calls - calls, monitor.writes - writes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=20)
+    args = parser.parse_args()
+
+    monitor = CountingMonitor()
+    screen_width = monitor.root.winfo_screenwidth()
+    monitor.root.geometry(f"400x{monitor.window_height}+{screen_width - 420}+50")
+    monitor.root.after(100, monitor.poll_snapshot)
+    run_phase(monitor, 3)  # прогрев: проба GPU, первые снимки
+
+    def minimize():
+        monitor.toggle_minimize()
+        monitor.root.update()
+
+    def hide():
+        monitor.toggle_minimize()
+        monitor.root.withdraw()
+        monitor.root.update()
+
+    print(f"{'phase':<10} {'cpu %':>6} {'set_text':>9} {'config':>7}")
+    try:
+        for phase, prepare in (('normal', None), ('minimized', minimize), ('hidden', hide)):
+            if prepare is not None:
+                prepare()
+            cpu, calls, writes = run_phase(monitor, args.seconds)
+            print(f"{phase:<10} {cpu:>6.2f} {calls:>9} {writes:>7}")
+    finally:
+        monitor.collector.stop()
+        monitor.root.destroy()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""Детерминированные подмены для бенчмарков: psutil, nvidia-smi, sysfs и Canvas.
+
+FakePsutil повторяет ту часть API psutil, которой пользуется collectors.py,
+и отдает синтетическую таблицу из заданного числа процессов (с небольшой
+текучкой PID на каждом вызове pids()). Значения зависят только от seed,
+поэтому два прогона на одной машине сравнимы между собой.
+"""
+import contextlib
+import os
+import random
+import stat
+import sys
+import textwrap
+from collections import namedtuple
+
+import psutil
+
+pmem = namedtuple('pmem', 'rss vms')
+pio = namedtuple('pio', 'read_count write_count read_bytes write_bytes')
+svmem = namedtuple('svmem', 'total available percent used free')
+sdiskusage = namedtuple('sdiskusage', 'total used free percent')
+sdiskpart = namedtuple('sdiskpart', 'device mountpoint fstype opts')
+sdiskio = namedtuple('sdiskio', 'read_count write_count read_bytes write_bytes')
+snetio = namedtuple('snetio', 'bytes_sent bytes_recv packets_sent packets_recv '
+                              'errin errout dropin dropout')
+scpufreq = namedtuple('scpufreq', 'current min max')
+snicstats = namedtuple('snicstats', 'isup duplex speed mtu flags')
+
+# Имена процессов; часть совпадает с GPU_PROCESS_PATTERNS
+PROCESS_NAMES = ['systemd', 'bash', 'python', 'postgres', 'nginx', 'chrome',
+                 'firefox', 'discord', 'steam', 'code', 'java', 'node']
+
+
+class FakeProcess:
+    def __init__(self, backend, pid):
+        self.backend = backend
+        self.pid = pid
+        rng = random.Random(pid)
+        self._name = rng.choice(PROCESS_NAMES)
+        self._rss = rng.randint(1, 2048) * 1024 * 1024
+        self._cpu = rng.random() * 50
+        self._io = 0
+
+    def _check(self):
+        if self.pid not in self.backend.processes:
+            raise psutil.NoSuchProcess(self.pid)
+
+    def create_time(self):
+        self._check()
+        return 1_000_000.0 + self.pid
+
+    def name(self):
+        self._check()
+        return self._name
+
+    def is_running(self):
+        return self.pid in self.backend.processes
+
+    def oneshot(self):
+        return contextlib.nullcontext()
+
+    def cpu_percent(self):
+        self._check()
+        return self._cpu
+
+    def memory_info(self):
+        self._check()
+        return pmem(self._rss, self._rss * 2)
+
+    def memory_percent(self):
+        return self._rss / self.backend.total_memory * 100
+
+    def io_counters(self):
+        self._check()
+        self._io += self.pid % 4096
+        return pio(self._io // 512, self._io // 1024, self._io, self._io // 2)
+
+
+class FakePsutil:
+    """Подмена модуля psutil: collectors.psutil = FakePsutil(1000)"""
+
+    NoSuchProcess = psutil.NoSuchProcess
+    AccessDenied = psutil.AccessDenied
+    ZombieProcess = psutil.ZombieProcess
+
+    def __init__(self, process_count=1000, cpus=16, disks=4, nics=4, churn=0.01, seed=0):
+        self.rng = random.Random(seed)
+        self.cpus = cpus
+        self.disks = [f'nvme{i}n1' for i in range(disks)]
+        self.nics = ['lo'] + [f'eth{i}' for i in range(nics)]
+        self.churn = churn
+        self.total_memory = 64 * 1024 ** 3
+        self.ticks = 0
+        self.next_pid = 1
+        self.processes = {}
+        for _ in range(process_count):
+            self._spawn()
+
+    def _spawn(self):
+        pid = self.next_pid
+        self.next_pid += 1
+        self.processes[pid] = FakeProcess(self, pid)
+
+    def Process(self, pid):
+        process = self.processes.get(pid)
+        if process is None:
+            raise psutil.NoSuchProcess(pid)
+        return process
+
+    def pids(self):
+        # Часть процессов завершается, на их место приходят новые
+        self.ticks += 1
+        for _ in range(int(len(self.processes) * self.churn)):
+            del self.processes[self.rng.choice(list(self.processes))]
+            self._spawn()
+        return list(self.processes)
+
+    def cpu_count(self, logical=True):
+        return self.cpus if logical else self.cpus // 2
+
+    def cpu_percent(self, percpu=False):
+        values = [self.rng.random() * 100 for _ in range(self.cpus)]
+        return values if percpu else sum(values) / len(values)
+
+    def cpu_freq(self, percpu=False):
+        freqs = [scpufreq(2000.0 + 100 * (i % 8), 800.0, 4800.0) for i in range(self.cpus)]
+        return freqs if percpu else freqs[0]
+
+    def virtual_memory(self):
+        used = self.total_memory // 2
+        return svmem(self.total_memory, self.total_memory - used, 50.0, used, self.total_memory - used)
+
+    def disk_partitions(self, all=False):
+        parts = [sdiskpart(f'/dev/{disk}p1', '/' if i == 0 else f'/mnt/data{i}', 'ext4', 'rw')
+                 for i, disk in enumerate(self.disks)]
+        parts.append(sdiskpart('tmpfs', '/run', 'tmpfs', 'rw'))
+        return parts
+
+    def disk_usage(self, path):
+        total = 1024 ** 4
+        return sdiskusage(total, total // 3, total - total // 3, 33.3)
+
+    def disk_io_counters(self, perdisk=False):
+        n = self.ticks + 1
+        return {disk: sdiskio(n * 100, n * 50, n * 4096 * 100, n * 4096 * 50)
+                for disk in self.disks}
+
+    def net_io_counters(self, pernic=False):
+        n = self.ticks + 1
+        return {nic: snetio(n * 10_000, n * 50_000, n * 10, n * 40, 0, 0, 0, 0)
+                for nic in self.nics}
+
+    def net_if_stats(self):
+        return {nic: snicstats(True, 2, 0 if nic == 'lo' else 10_000, 1500, 'up,running')
+                for nic in self.nics}
+
+
+# Процесс i: PID 1000 + i, /opt/appI/bin/appI, 256 * (i + 1) МиБ;
+# загрузка SM в pmon меняется от замера к замеру
+NVIDIA_SMI_SCRIPT = '''\
+    import sys, time
+    args = sys.argv[1:]
+    pmon = args[:1] == ['pmon']
+    query = next((a for a in args if a.startswith('--query')), '--query-gpu')
+    if pmon:
+        interval = int(args[args.index('-d') + 1]) if '-d' in args else 1
+    else:
+        interval = int(args[args.index('-lms') + 1]) / 1000 if '-lms' in args else None
+    header = 'noheader' not in ' '.join(args)
+    titles = {{'pid': 'pid', 'process_name': 'process_name', 'used_memory': 'used_gpu_memory [MiB]'}}
+    n = 0
+    while True:
+        if pmon:
+            # Заголовок pmon повторяется редко, а не перед каждым замером
+            if n % 10 == 0:
+                print('# gpu         pid  type    sm    mem    enc    dec    command')
+                print('# Idx           #   C/G     %      %      %      %    name')
+            for i in range({apps}):
+                print(f'    {{i % {gpus}}} {{1000 + i:>10}}     C {{(n * 7 + i * 13) % 100:>5}}'
+                      f' {{i % 50:>5}}      -      -    app{{i}}')
+        elif query.startswith('--query-gpu'):
+            if header:
+                print('index, utilization.gpu [%], memory.used [MiB], memory.total [MiB], temperature.gpu')
+            for gpu in range({gpus}):
+                print(f'{{gpu}}, {{(n * 7 + gpu) % 100}}, 2048, 24576, {{50 + gpu}}')
+        else:
+            fields = query.split('=', 1)[1].split(',')
+            if header:
+                print(', '.join(titles[field] for field in fields))
+            for i in range({apps}):
+                values = {{'pid': 1000 + i, 'process_name': f'/opt/app{{i}}/bin/app{{i}}',
+                          'used_memory': 256 * (i + 1)}}
+                print(', '.join(str(values[field]) for field in fields))
+        sys.stdout.flush()
+        if interval is None:
+            break
+        n += 1
+        time.sleep(interval)
+'''
+
+
+def write_fake_nvidia_smi(directory, gpus=2, apps=8):
+    """Кладем исполняемый nvidia-smi в directory; добавьте ее в начало PATH"""
+    path = os.path.join(directory, 'nvidia-smi')
+    with open(path, 'w') as f:
+        f.write(f'#!{sys.executable}\n')
+        f.write(textwrap.dedent(NVIDIA_SMI_SCRIPT).format(gpus=gpus, apps=apps))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+def write_fake_sysfs(root, amd=1, intel=1):
+    """Дерево class/drm/card* как у amdgpu и i915 и датчик CPU в class/hwmon;
+    root передается в sysfs_root"""
+    def write(path, value):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(f'{value}\n')
+
+    hwmon = os.path.join(root, 'class', 'hwmon', 'hwmon9')
+    write(os.path.join(hwmon, 'name'), 'coretemp')
+    write(os.path.join(hwmon, 'temp1_input'), 52000)
+
+    drm = os.path.join(root, 'class', 'drm')
+    cards = [('0x1002', 'amd')] * amd + [('0x8086', 'intel')] * intel
+    for index, (vendor, kind) in enumerate(cards):
+        card = os.path.join(drm, f'card{index}')
+        device = os.path.join(card, 'device')
+        write(os.path.join(device, 'vendor'), vendor)
+        write(os.path.join(device, 'hwmon', f'hwmon{index}', 'temp1_input'), 45000 + index * 1000)
+        # Разъем монитора - тоже cardN-*, но не видеокарта
+        write(os.path.join(drm, f'card{index}-DP-1', 'status'), 'connected')
+        if kind == 'amd':
+            write(os.path.join(device, 'gpu_busy_percent'), 37)
+            write(os.path.join(device, 'mem_info_vram_used'), 3 * 1024 ** 3)
+            write(os.path.join(device, 'mem_info_vram_total'), 16 * 1024 ** 3)
+        else:
+            write(os.path.join(card, 'gt_act_freq_mhz'), 900)
+            write(os.path.join(card, 'gt_max_freq_mhz'), 1500)
+            write(os.path.join(card, 'gt', 'gt0', 'rc6_residency_ms'), 123456)
+    return root
+
+
+class StubCanvas:
+    """Canvas без Tk: принимает вызовы ChartRenderer и ничего не рисует"""
+
+    def __init__(self, width=370, height=80):
+        self.width = width
+        self.height = height
+        self._next_id = 0
+
+    def _item(self, *args, **kwargs):
+        self._next_id += 1
+        return self._next_id
+
+    create_line = create_image = _item
+
+    def bind(self, sequence, callback):
+        callback(namedtuple('Event', 'width height')(self.width, self.height))
+
+    def coords(self, item, *args):
+        pass
+
+    def itemconfigure(self, item, **kwargs):
+        pass
+
+    def delete(self, *args):
+        pass
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
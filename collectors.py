@@ -0,0 +1,1938 @@
+"""Сбор метрик системы без GUI: используется и виджетом, и headless-режимом"""
+import psutil
+import asyncio
+import glob
+import math
+import os
+import select
+import signal
+import sys
+import time
+import threading
+import heapq
+import queue
+from concurrent.futures import Executor, Future
+from operator import attrgetter
+from bisect import bisect_left
+from collections import deque, namedtuple
+from dataclasses import dataclass
+import subprocess
+import re
+
+from alerts import DEFAULT_RULES, AlertEngine
+from inventory import Inventory, gpu_pci_ids, nic_macs
+from procfs import CPU_HWMON_NAMES, CpuTemperature, ProcfsBackend, VirtualMemory
+from timeseries import TimeSeriesStore
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Неизменяемый снимок всех метрик за один тик сборщика"""
+    seq: int
+    timestamp: float
+    # Сколько занял сбор снимка, секунды
+    collect_duration: float
+    # CPU
+    cpu_usage: float
+    cpu_freq: float
+    cpu_cores: int
+    # По логическим процессорам: загрузка, % и частота, МГц (пусто, если нет)
+    cpu_per_core: tuple
+    cpu_core_freqs: tuple
+    # Температура CPU, °C (None, если датчика нет)
+    cpu_temperature: object
+    # GPU
+    gpu_vendor: str
+    gpu_usage: float
+    gpu_memory_used: float
+    gpu_memory_total: float
+    gpu_temperature: float
+    gpu_process_count: int
+    gpu_count: int
+    # Память
+    mem_percent: float
+    mem_used: int
+    mem_available: int
+    mem_total: int
+    # Основной раздел (None, если недоступен), все разделы и I/O по устройствам
+    disk: object
+    disks: tuple
+    disk_read: float
+    disk_write: float
+    disk_io: tuple
+    # Сеть, байт/с (без loopback) и по интерфейсам
+    net_upload: float
+    net_download: float
+    net_interfaces: tuple
+    # Самые активные процессы (ProcessRanking)
+    top_processes: object
+    # История для графиков
+    cpu_history: tuple
+    gpu_history: tuple
+    mem_history: tuple
+    # Процессы на GPU (GpuProcess, только NVIDIA), самые тяжелые первыми
+    gpu_processes: tuple = ()
+    # Источники, не успевшие к дедлайну: пары (имя, возраст значения в секундах)
+    stale: tuple = ()
+
+    def to_record(self):
+        """Плоская запись снимка без истории (ключи - RECORD_FIELDS)"""
+        disk = self.disk
+        return {
+            'timestamp': self.timestamp,
+            'cpu_usage': self.cpu_usage,
+            'cpu_freq': self.cpu_freq,
+            'cpu_cores': self.cpu_cores,
+            'cpu_temperature': self.cpu_temperature,
+            'gpu_vendor': self.gpu_vendor,
+            'gpu_usage': self.gpu_usage,
+            'gpu_memory_used': self.gpu_memory_used,
+            'gpu_memory_total': self.gpu_memory_total,
+            'gpu_temperature': self.gpu_temperature,
+            'gpu_process_count': self.gpu_process_count,
+            'gpu_count': self.gpu_count,
+            'mem_percent': self.mem_percent,
+            'mem_used': self.mem_used,
+            'mem_available': self.mem_available,
+            'mem_total': self.mem_total,
+            'disk_percent': disk.percent if disk else None,
+            'disk_used': disk.used if disk else None,
+            'disk_free': disk.free if disk else None,
+            'disk_total': disk.total if disk else None,
+            'disk_read': self.disk_read,
+            'disk_write': self.disk_write,
+            'net_upload': self.net_upload,
+            'net_download': self.net_download,
+        }
+
+
+# Порядок полей плоской записи (колонки CSV, ключи NDJSON)
+RECORD_FIELDS = (
+    'timestamp',
+    'cpu_usage', 'cpu_freq', 'cpu_cores', 'cpu_temperature',
+    'gpu_vendor', 'gpu_usage', 'gpu_memory_used', 'gpu_memory_total',
+    'gpu_temperature', 'gpu_process_count', 'gpu_count',
+    'mem_percent', 'mem_used', 'mem_available', 'mem_total',
+    'disk_percent', 'disk_used', 'disk_free', 'disk_total',
+    'disk_read', 'disk_write',
+    'net_upload', 'net_download',
+)
+
+# Числовые поля записи, по которым можно писать правила оповещений
+ALERT_METRICS = tuple(field for field in RECORD_FIELDS if field not in ('timestamp', 'gpu_vendor'))
+
+
+class LatencyHistogram:
+    """Гистограмма длительностей с фиксированными границами корзин (секунды).
+
+    Пишет один поток (сборщик), читать можно из любого: copy() отдает
+    согласованную копию счетчиков.
+    """
+
+    DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                       0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # последняя - +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def copy(self):
+        """(границы, счетчики по корзинам, сумма)"""
+        return self.buckets, list(self.counts), self.sum
+
+    def quantile(self, q):
+        """Верхняя граница корзины, в которую попадает квантиль q (оценка сверху)"""
+        counts = list(self.counts)
+        rank = q * sum(counts)
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            if count and cumulative >= rank:
+                return bound
+        return 0.0
+
+
+class SelfProfiler:
+    """Сколько стоит сам монитор.
+
+    Время каждой фазы тика (источники планировщика, отрисовка графика,
+    обновление меток) - в отдельной гистограмме; jitter - насколько тик
+    проснулся позже запланированного; плюс CPU% и RSS собственного
+    процесса. Создается только с --profile: без него все точки замера
+    сводятся к проверке на None.
+    """
+
+    BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+               0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+    def __init__(self):
+        self.phases = {}  # фаза -> LatencyHistogram
+        self.jitter = LatencyHistogram(self.BUCKETS)
+        self.process = psutil.Process()
+        self.process.cpu_percent()
+        self.cpu_percent = 0.0
+        self.rss = 0
+        # Отчет по SIGUSR1: обработчик только ставит флаг, печатает цикл сбора
+        self.dump_requested = False
+
+    def observe(self, phase, seconds):
+        histogram = self.phases.get(phase)
+        if histogram is None:
+            histogram = self.phases[phase] = LatencyHistogram(self.BUCKETS)
+        histogram.observe(seconds)
+
+    def sample_self(self):
+        with self.process.oneshot():
+            self.cpu_percent = self.process.cpu_percent()
+            self.rss = self.process.memory_info().rss
+
+    def summary(self):
+        """Одна строка для отладочной полосы виджета"""
+        tick = self.phases.get('tick')
+        tick_p95 = tick.quantile(0.95) if tick is not None else 0.0
+        return (f"tick p95 {tick_p95 * 1000:g} ms · jitter p95 {self.jitter.quantile(0.95) * 1000:g} ms · "
+                f"self CPU {self.cpu_percent:.1f}% · RSS {self.rss / 1024 ** 2:.0f} MB")
+
+    def report(self):
+        """Подробный отчет по всем фазам"""
+        lines = [f"{'phase':<12} {'count':>7} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"]
+        for name, histogram in [*sorted(self.phases.items()), ('jitter', self.jitter)]:
+            count = sum(histogram.counts)
+            if not count:
+                continue
+            lines.append(f"{name:<12} {count:>7} {histogram.sum / count * 1000:>9.3f} "
+                         + " ".join(f"{histogram.quantile(q) * 1000:>8g}" for q in (0.5, 0.95, 0.99)))
+        lines.append(f"self: CPU {self.cpu_percent:.1f}%, RSS {self.rss / 1024 ** 2:.1f} MB")
+        return '\n'.join(lines)
+
+
+def parse_smi_value(value):
+    """Число из CSV nvidia-smi; '[N/A]', '[Not Supported]' и т.п. -> None"""
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class NvidiaSmiStream:
+    """Долгоживущий процесс nvidia-smi в режиме -lms.
+
+    Вместо запуска nvidia-smi на каждый тик держим один дочерний процесс,
+    а отдельный поток читает его stdout построчно. В циклическом режиме
+    nvidia-smi печатает заголовок CSV перед каждым замером, поэтому строки
+    между двумя заголовками - один кадр (по строке на GPU или на процесс).
+    Если процесс умирает, он перезапускается с нарастающей задержкой.
+    """
+
+    def __init__(self, query, interval_ms=1000, executable="nvidia-smi",
+                 fixed_rows=False, restart_delay=1.0, max_restart_delay=30.0):
+        self.args = [executable, query, "--format=csv,nounits", "-lms", str(interval_ms)]
+        # Для --query-gpu число строк в кадре постоянно (по одной на GPU),
+        # и кадр можно публиковать, не дожидаясь следующего заголовка
+        self.fixed_rows = fixed_rows
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+
+        self.frame = None  # последний полный кадр: tuple строк
+        self.frame_time = 0.0  # time.monotonic() публикации кадра
+        self.restarts = 0
+
+        self._proc = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._supervise, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+
+    def is_fresh(self, max_age):
+        """Есть ли кадр не старше max_age секунд"""
+        return self.frame is not None and time.monotonic() - self.frame_time <= max_age
+
+    def _publish(self, rows):
+        self.frame = tuple(rows)
+        self.frame_time = time.monotonic()
+
+    def _supervise(self):
+        """Запускаем nvidia-smi и перезапускаем его, если он завершился"""
+        delay = self.restart_delay
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self._proc = subprocess.Popen(self.args, stdout=subprocess.PIPE,
+                                              stderr=subprocess.DEVNULL,
+                                              text=True, bufsize=1)
+                self._read(self._proc.stdout)
+                self._proc.wait()
+            except OSError as e:
+                print(f"NVIDIA SMI error: {e}")
+            if self._stop.is_set():
+                break
+
+            # Процесс проработал долго - считаем сбой случайным
+            if time.monotonic() - started > self.max_restart_delay:
+                delay = self.restart_delay
+            self.restarts += 1
+            self._stop.wait(delay)
+            delay = min(delay * 2, self.max_restart_delay)
+
+    def _read(self, stdout):
+        header = None
+        rows = []
+        keys = set()
+        expected = None
+        for line in stdout:
+            line = line.strip()
+            if not line:
+                continue
+            if header is None:
+                header = line
+                continue
+                
+            row = tuple(field.strip() for field in line.split(','))
+            # Кадр завершается повтором заголовка, а для --query-gpu еще и
+            # повтором индекса GPU (на случай, если заголовок не повторяется)
+            if line == header or (self.fixed_rows and row[0] in keys):
+                if len(rows) != expected:
+                    self._publish(rows)
+                if self.fixed_rows:
+                    expected = len(rows)
+                rows = []
+                keys.clear()
+                if line == header:
+                    continue
+                    
+            rows.append(row)
+            keys.add(row[0])
+            if len(rows) == expected:
+                # Все GPU на месте - не ждем следующего кадра
+                self._publish(rows)
+
+
+class NvidiaPmonStream(NvidiaSmiStream):
+    """Загрузка SM по процессам из долгоживущего nvidia-smi pmon.
+
+    pmon печатает строку на каждый процесс каждого GPU раз в -d секунд,
+    заголовок (# gpu pid type sm ...) - только изредка, так что кадров, как
+    у --query, нет. Вместо кадра храним последнее значение по (gpu, pid)
+    со временем замера; устаревшие записи периодически выбрасываются.
+    """
+
+    def __init__(self, interval_ms=1000, executable="nvidia-smi", **kwargs):
+        super().__init__("pmon", interval_ms, executable, **kwargs)
+        delay = min(10, max(1, round(interval_ms / 1000)))  # pmon умеет только 1-10 с
+        self.args = [executable, "pmon", "-s", "u", "-d", str(delay)]
+        self.max_age = 2.5 * delay
+        self.samples = {}  # (gpu, pid) -> (sm %, time.monotonic())
+
+    def sm_by_pid(self):
+        """pid -> суммарная загрузка SM по всем GPU, только свежие замеры"""
+        now = time.monotonic()
+        result = {}
+        # list() копирует словарь целиком, пока поток чтения не может его менять
+        for (gpu, pid), (sm, updated) in list(self.samples.items()):
+            if now - updated <= self.max_age:
+                result[pid] = result.get(pid, 0) + sm
+        return result
+
+    def _read(self, stdout):
+        columns = None
+        rows = 0
+        for line in stdout:
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == '#':
+                # Набор колонок зависит от версии драйвера (jpg, ofa, ...)
+                if 'pid' in fields:
+                    columns = fields[1:]
+                continue
+            if columns is None or len(fields) < len(columns):
+                continue
+            try:
+                key = (fields[columns.index('gpu')], int(fields[columns.index('pid')]))
+            except ValueError:
+                continue
+            sm = parse_smi_value(fields[columns.index('sm')])
+            now = time.monotonic()
+            self.samples[key] = (sm or 0, now)
+            self.frame_time = now
+            
+            rows += 1
+            if rows % 256 == 0:
+                # Замена словаря целиком: читатель видит старый или новый
+                self.samples = {key: sample for key, sample in self.samples.items()
+                                if now - sample[1] <= self.max_age}
+
+
+GpuProcess = namedtuple('GpuProcess', 'pid name memory sm')
+
+
+class GpuProcessTable:
+    """Процессы на NVIDIA GPU: память из --query-compute-apps, SM из pmon.
+
+    Имя берется у psutil один раз на PID (и только для попавших в top-N) и
+    живет в кэше, пока PID есть в выводе nvidia-smi; если psutil процесс
+    не видит (контейнер, чужой пользователь), остается имя от nvidia-smi.
+    """
+
+    def __init__(self, limit=5):
+        self.limit = limit
+        self.names = {}  # pid -> имя
+        self._apps = None  # последний разобранный кадр compute-apps
+        self._parsed = ({}, {})  # его память и имена по PID
+
+    def name(self, pid, smi_name):
+        name = self.names.get(pid)
+        if name is None:
+            try:
+                name = psutil.Process(pid).name()
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                name = os.path.basename(smi_name.replace('\\', '/')) or str(pid)
+            self.names[pid] = name
+        return name
+
+    def parse(self, apps):
+        """Память (байт) и имена по PID; кадр разбирается один раз, а не на каждом тике"""
+        if apps is not self._apps:
+            memory = {}
+            smi_names = {}
+            for row in apps:
+                if len(row) < 3 or not row[0].isdigit():
+                    continue
+                pid = int(row[0])
+                # Имя может содержать запятые - это все поля между pid и памятью
+                smi_names[pid] = ','.join(row[1:-1])
+                # Процесс на нескольких GPU - по строке на каждый
+                memory[pid] = memory.get(pid, 0) + (parse_smi_value(row[-1]) or 0) * 1024 * 1024
+            self._apps = apps
+            self._parsed = (memory, smi_names)
+        return self._parsed
+
+    def build(self, apps, sm):
+        """Top-N по памяти, затем по SM; apps - строки pid, process_name, used_memory"""
+        memory, smi_names = self.parse(apps)
+        pids = memory.keys() | sm.keys()
+        if self.names.keys() - pids:
+            self.names = {pid: name for pid, name in self.names.items() if pid in pids}
+        top = heapq.nlargest(self.limit, pids, key=lambda pid: (memory.get(pid, 0), sm.get(pid, 0)))
+        return tuple(GpuProcess(pid, self.name(pid, smi_names.get(pid, '')), memory.get(pid), sm.get(pid))
+                     for pid in top)
+
+
+# Процессы, которые обычно используют GPU
+GPU_PROCESS_PATTERNS = [
+    'chrome', 'msedge', 'firefox', 'steam', 'game', 'nvidia', 'amd',
+    'photoshop', 'premiere', 'afterfx', 'davinci', 'blender',
+    'unity', 'unreal', 'epic', 'fortnite', 'valorant', 'csgo',
+    'obs64', 'streamlabs', 'discord', 'teams', 'zoom'
+]
+
+# Один регулярный вызов вместо перебора 23 подстрок
+GPU_PROCESS_RE = re.compile('|'.join(map(re.escape, GPU_PROCESS_PATTERNS)))
+
+
+class ProcessEntry:
+    """Запись таблицы процессов: закэшированный psutil.Process и его имя.
+
+    cpu, rss и io (байт/с) - последние измеренные значения, их заполняет
+    TopProcesses; io_bytes и io_time нужны для расчета скорости I/O.
+    """
+    __slots__ = ('key', 'proc', 'name', 'is_gpu', 'cpu', 'rss', 'io', 'io_bytes', 'io_time')
+
+    def __init__(self, key, proc, name, is_gpu):
+        self.key = key
+        self.proc = proc
+        self.name = name
+        self.is_gpu = is_gpu
+        self.cpu = 0.0
+        self.rss = 0
+        self.io = 0.0
+        self.io_bytes = None
+        self.io_time = None
+
+
+class ProcessTable:
+    """Инкрементальная таблица процессов с ключом (pid, create_time).
+
+    Объекты psutil.Process переиспользуются между тиками, поэтому
+    cpu_percent() возвращает настоящую разницу с прошлого вызова, а не 0.
+    Имя и классификация читаются один раз - только для новых PID; результат
+    сопоставления с шаблонами кэшируется по имени.
+    """
+
+    def __init__(self, pattern=GPU_PROCESS_RE):
+        self.pattern = pattern
+        self.entries = {}  # (pid, create_time) -> ProcessEntry
+        self._keys = {}  # pid -> (pid, create_time)
+        self._name_cache = {}  # имя -> совпадает ли с шаблоном
+
+    def classify(self, name):
+        is_gpu = self._name_cache.get(name)
+        if is_gpu is None:
+            is_gpu = self._name_cache[name] = self.pattern.search(name) is not None
+        return is_gpu
+
+    def refresh(self, deadline=None):
+        """Синхронизируем таблицу со списком PID; Process создается только для новых.
+
+        Если задан deadline (по time.perf_counter()), новые процессы после
+        него не добавляются - они останутся новыми и попадут в следующий вызов.
+        """
+        pids = set(psutil.pids())
+        
+        for pid in self._keys.keys() - pids:
+            self.entries.pop(self._keys.pop(pid), None)
+            
+        for pid in pids - self._keys.keys():
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            try:
+                proc = psutil.Process(pid)
+                key = (pid, proc.create_time())
+                name = proc.name().lower()
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            self._keys[pid] = key
+            self.entries[key] = ProcessEntry(key, proc, name, self.classify(name))
+            
+    def discard(self, entry):
+        """Убираем процесс, который завершился или сменил владельца PID"""
+        self.entries.pop(entry.key, None)
+        if self._keys.get(entry.key[0]) == entry.key:
+            del self._keys[entry.key[0]]
+            
+    def gpu_entries(self):
+        return [entry for entry in self.entries.values() if entry.is_gpu]
+
+
+# Строка панели процессов: cpu в % одного ядра (как в top), rss в байтах, io в байт/с
+ProcessInfo = namedtuple('ProcessInfo', 'pid name cpu rss io')
+
+# Первые N процессов по каждому из критериев
+ProcessRanking = namedtuple('ProcessRanking', 'by_cpu by_rss by_io')
+
+
+class TopProcesses:
+    """Самые активные процессы по CPU, памяти и вводу-выводу.
+
+    Процессы опрашиваются по кругу из очереди, и не дольше budget секунд
+    за тик: на машине с 10k процессов полный обход растягивается на
+    несколько тиков, а не останавливает сборщик. Необойденные процессы
+    сохраняют прошлые значения; cpu_percent() у переиспользуемого
+    psutil.Process считается от его прошлого вызова, поэтому он верен
+    при любой длине обхода. Первые N выбираются heapq.nlargest без
+    сортировки всей таблицы.
+    """
+
+    def __init__(self, limit=5, budget=0.02):
+        self.limit = limit
+        self.budget = budget
+        # Своя таблица: cpu_percent() сбрасывает счетчик процесса, и общий
+        # с GPU-эвристикой Process мерил бы CPU за разные интервалы
+        self.table = ProcessTable()
+        self._queue = deque()
+        self._has_io = hasattr(psutil.Process, 'io_counters')
+
+    def _measure(self, entry):
+        proc = entry.proc
+        with proc.oneshot():
+            entry.cpu = proc.cpu_percent()
+            entry.rss = proc.memory_info().rss
+            if not self._has_io:
+                return
+            try:
+                io = proc.io_counters()
+            except psutil.AccessDenied:
+                # Счетчики I/O чужих процессов обычно закрыты
+                return
+        now = time.monotonic()
+        total = io.read_bytes + io.write_bytes
+        if entry.io_bytes is not None and now > entry.io_time:
+            entry.io = max(0, total - entry.io_bytes) / (now - entry.io_time)
+        entry.io_bytes = total
+        entry.io_time = now
+
+    def sample(self):
+        deadline = time.perf_counter() + self.budget
+        table = self.table
+        table.refresh(deadline)
+        
+        refilled = False
+        while time.perf_counter() < deadline:
+            if not self._queue:
+                # Новый обход - не больше одного за тик
+                if refilled:
+                    break
+                self._queue.extend(table.entries)
+                refilled = True
+                continue
+            entry = table.entries.get(self._queue.popleft())
+            if entry is None:
+                continue
+            try:
+                self._measure(entry)
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                table.discard(entry)
+            except psutil.AccessDenied:
+                continue
+                
+        entries = table.entries.values()
+        return ProcessRanking(*(
+            tuple(ProcessInfo(entry.key[0], entry.name, entry.cpu, entry.rss, entry.io)
+                  for entry in heapq.nlargest(self.limit, entries, key=key))
+            for key in (attrgetter('cpu'), attrgetter('rss'), attrgetter('io'))))
+
+
+async def run_probe(*args):
+    """(код возврата, stdout) команды или None, если ее нет.
+
+    При отмене убивается вся группа процессов: иначе дочерний процесс
+    обертки держал бы stdout открытым, и отмена ждала бы его завершения.
+    """
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+            start_new_session=True)
+    except OSError:
+        return None
+    try:
+        stdout, _ = await proc.communicate()
+    except asyncio.CancelledError:
+        try:
+            if hasattr(os, 'killpg'):
+                os.killpg(proc.pid, signal.SIGKILL)
+            else:
+                proc.kill()
+        except ProcessLookupError:
+            pass
+        await proc.wait()
+        raise
+    return proc.returncode, stdout.decode(errors='replace')
+
+
+def combine_gpus(gpus, process_count=0):
+    """Несколько GPU в одну карточку: средняя загрузка, суммарная память,
+    максимальная температура; None, если GPU нет"""
+    if not gpus:
+        return None
+    return {
+        'usage': sum(gpu['usage'] for gpu in gpus) / len(gpus),
+        'memory_used': sum(gpu['memory_used'] for gpu in gpus),
+        'memory_total': sum(gpu['memory_total'] for gpu in gpus) or 1,
+        'temperature': max(gpu['temperature'] for gpu in gpus),
+        'process_count': process_count,
+        'devices': tuple(gpus)
+    }
+
+
+class GpuProvider:
+    """Источник GPU-метрик.
+
+    probe() - корутина: есть ли такой GPU на машине. Все пробы запускаются
+    одновременно (см. MetricsCollector.check_gpu_availability). read()
+    вызывается в потоке сборщика и возвращает словарь метрик или None,
+    если свежих данных нет; stop() освобождает ресурсы источника.
+    track_processes - нужна ли сейчас таблица процессов на GPU.
+    """
+
+    vendor = None
+    track_processes = True
+
+    async def probe(self):
+        return False
+
+    def read(self):
+        return None
+
+    def stop(self):
+        pass
+
+
+class NvidiaProvider(GpuProvider):
+    """NVIDIA через долгоживущие процессы nvidia-smi"""
+
+    vendor = "nvidia"
+
+    def __init__(self, interval=1.0, executable="nvidia-smi"):
+        self.interval = interval
+        self.executable = executable
+        self.gpu_stream = None
+        self.apps_stream = None
+        self.pmon_stream = None
+        self.process_table = GpuProcessTable()
+
+    async def probe(self):
+        result = await run_probe(self.executable, "--query-gpu=utilization.gpu",
+                                 "--format=csv,noheader,nounits")
+        return result is not None and result[0] == 0
+
+    def start(self):
+        """Запускаем nvidia-smi для GPU и для compute-приложений"""
+        interval_ms = int(self.interval * 1000)
+        self.gpu_stream = NvidiaSmiStream(
+            "--query-gpu=index,utilization.gpu,memory.used,memory.total,temperature.gpu",
+            interval_ms, self.executable, fixed_rows=True)
+        self.apps_stream = NvidiaSmiStream(
+            "--query-compute-apps=pid,process_name,used_memory", interval_ms, self.executable)
+        self.gpu_stream.start()
+        self.apps_stream.start()
+
+    def start_pmon(self):
+        # pmon есть не на всех GPU и драйверах - тогда SM просто не будет
+        self.pmon_stream = NvidiaPmonStream(int(self.interval * 1000), self.executable)
+        self.pmon_stream.start()
+
+    def stop(self):
+        for stream in (self.gpu_stream, self.apps_stream, self.pmon_stream):
+            if stream is not None:
+                stream.stop()
+        self.gpu_stream = None
+        self.apps_stream = None
+        self.pmon_stream = None
+
+    def processes(self):
+        """(число compute-процессов, top-N процессов с памятью и SM)"""
+        stream = self.apps_stream
+        apps = stream.frame if stream is not None and stream.frame is not None else ()
+        count = sum(1 for row in apps if row and row[0].isdigit())
+        if not self.track_processes:
+            return count, ()
+        return count, self.process_table.build(apps, self.pmon_stream.sm_by_pid())
+
+    def read(self):
+        if self.gpu_stream is None:
+            self.start()
+        # pmon нужен только таблице процессов: пока ее не видно, он остановлен
+        if self.track_processes and self.pmon_stream is None:
+            self.start_pmon()
+        elif not self.track_processes and self.pmon_stream is not None:
+            self.pmon_stream.stop()
+            self.pmon_stream = None
+            
+        # Кадр старше нескольких интервалов считаем потерянным
+        if not self.gpu_stream.is_fresh(max(5.0, self.interval * 5)):
+            return None
+            
+        gpus = []
+        for row in self.gpu_stream.frame:
+            if len(row) < 5:
+                continue
+            values = [parse_smi_value(v) for v in row[1:5]]
+            gpus.append({
+                'index': row[0],
+                'usage': values[0] or 0,
+                'memory_used': (values[1] or 0) * 1024 * 1024,  # Convert to bytes
+                'memory_total': (values[2] or 0) * 1024 * 1024,  # Convert to bytes
+                'temperature': values[3] or 0,
+            })
+        count, top = self.processes()
+        info = combine_gpus(gpus, count)
+        if info is not None:
+            info['processes'] = top
+        return info
+
+
+class WmicProvider(GpuProvider):
+    """AMD/Intel в Windows: определяется по имени видеоадаптера из WMIC.
+
+    Счетчиков нагрузки WMIC не дает, поэтому read() возвращает None и
+    карточку заполняет резервная эвристика - но с правильным vendor.
+    """
+
+    keyword = None
+
+    async def probe(self):
+        result = await run_probe("wmic", "path", "win32_VideoController", "get", "name")
+        return result is not None and result[0] == 0 and self.keyword in result[1]
+
+
+class AmdWmicProvider(WmicProvider):
+    vendor = "amd"
+    keyword = "AMD"
+
+
+class IntelWmicProvider(WmicProvider):
+    vendor = "intel"
+    keyword = "Intel"
+
+
+class SysfsDevice:
+    """Открытые файлы sysfs одной видеокарты и состояние для расчета скоростей"""
+    __slots__ = ('name', 'fds', 'last')
+
+    def __init__(self, name, fds):
+        self.name = name
+        self.fds = fds  # имя значения -> дескриптор
+        self.last = None
+
+
+class SysfsGpuProvider(GpuProvider):
+    """GPU в Linux через /sys/class/drm/card*/.
+
+    Файлы ищутся один раз и остаются открытыми; на каждом тике значение
+    перечитывается через os.pread(fd, ..., 0) - один системный вызов
+    вместо open/read/close. Корень sysfs задается параметром, чтобы
+    проверять провайдер на поддельном дереве во временном каталоге.
+    """
+
+    pci_vendor = None
+
+    def __init__(self, sysfs_root='/sys'):
+        self.sysfs_root = sysfs_root
+        self.devices = None
+
+    def cards(self):
+        """Каталоги cardN нашего производителя (без cardN-DP-1 и т.п.)"""
+        found = []
+        for card in sorted(glob.glob(os.path.join(self.sysfs_root, 'class', 'drm', 'card*'))):
+            if not os.path.basename(card)[4:].isdigit():
+                continue
+            try:
+                with open(os.path.join(card, 'device', 'vendor')) as f:
+                    if int(f.read(), 16) != self.pci_vendor:
+                        continue
+            except (OSError, ValueError):
+                continue
+            found.append(card)
+        return found
+
+    def files(self, card):
+        """имя значения -> путь; переопределяется для каждого драйвера"""
+        return {}
+
+    def hwmon_file(self, card, name):
+        paths = sorted(glob.glob(os.path.join(card, 'device', 'hwmon', 'hwmon*', name)))
+        return paths[0] if paths else None
+
+    async def probe(self):
+        return any(self.files(card) for card in self.cards())
+
+    def open(self):
+        self.devices = []
+        for card in self.cards():
+            fds = {}
+            for key, path in self.files(card).items():
+                try:
+                    fds[key] = os.open(path, os.O_RDONLY)
+                except OSError:
+                    continue
+            if fds:
+                self.devices.append(SysfsDevice(os.path.basename(card), fds))
+
+    def stop(self):
+        for device in self.devices or ():
+            for fd in device.fds.values():
+                os.close(fd)
+        self.devices = None
+
+    def read(self):
+        if self.devices is None:
+            self.open()
+            
+        gpus = []
+        for device in self.devices:
+            values = {}
+            for key, fd in device.fds.items():
+                try:
+                    values[key] = int(os.pread(fd, 32, 0))
+                except (OSError, ValueError):
+                    # Драйвер может временно отказать (EBUSY при сне GPU)
+                    continue
+            gpu = self.convert(device, values)
+            if gpu is not None:
+                gpus.append(gpu)
+        return combine_gpus(gpus)
+
+    def convert(self, device, values):
+        """Словарь метрик одной карты из прочитанных чисел (или None)"""
+        return None
+
+
+class AmdSysfsProvider(SysfsGpuProvider):
+    """amdgpu: загрузка, VRAM и температура прямо из sysfs"""
+
+    vendor = "amd"
+    pci_vendor = 0x1002
+
+    def files(self, card):
+        device = os.path.join(card, 'device')
+        files = {key: os.path.join(device, name) for key, name in (
+            ('busy', 'gpu_busy_percent'),
+            ('vram_used', 'mem_info_vram_used'),
+            ('vram_total', 'mem_info_vram_total'),
+        ) if os.path.exists(os.path.join(device, name))}
+        if not files:
+            return files
+        temperature = self.hwmon_file(card, 'temp1_input')
+        if temperature:
+            files['temperature'] = temperature
+        return files
+
+    def convert(self, device, values):
+        if 'busy' not in values:
+            return None
+        return {
+            'index': device.name,
+            'usage': values['busy'],
+            'memory_used': values.get('vram_used', 0),
+            'memory_total': values.get('vram_total', 0),
+            'temperature': values.get('temperature', 0) / 1000,  # миллиградусы
+        }
+
+
+class IntelSysfsProvider(SysfsGpuProvider):
+    """i915: загрузка по счетчику RC6 (время в простое), иначе по частоте"""
+
+    vendor = "intel"
+    pci_vendor = 0x8086
+
+    def files(self, card):
+        candidates = (
+            ('freq', 'gt_act_freq_mhz'),
+            ('max_freq', 'gt_max_freq_mhz'),
+            ('rc6', os.path.join('gt', 'gt0', 'rc6_residency_ms')),
+            ('rc6', os.path.join('power', 'rc6_residency_ms')),
+        )
+        files = {}
+        for key, name in candidates:
+            path = os.path.join(card, name)
+            if key not in files and os.path.exists(path):
+                files[key] = path
+        if 'freq' not in files:
+            return {}
+        temperature = self.hwmon_file(card, 'temp1_input')
+        if temperature:
+            files['temperature'] = temperature
+        return files
+
+    def convert(self, device, values):
+        if 'freq' not in values:
+            return None
+        usage = None
+        rc6 = values.get('rc6')
+        if rc6 is not None:
+            now = time.monotonic()
+            if device.last is not None:
+                last_rc6, last_time = device.last
+                elapsed_ms = (now - last_time) * 1000
+                if elapsed_ms > 0 and rc6 >= last_rc6:
+                    usage = 100 * (1 - (rc6 - last_rc6) / elapsed_ms)
+            device.last = (rc6, now)
+        if usage is None:
+            usage = 100 * values['freq'] / values['max_freq'] if values.get('max_freq') else 0
+        return {
+            'index': device.name,
+            'usage': min(100, max(0, usage)),
+            # Встроенная графика берет память из RAM - своей VRAM нет
+            'memory_used': 0,
+            'memory_total': 0,
+            'temperature': values.get('temperature', 0) / 1000,
+            'frequency': values['freq'],
+        }
+
+
+class FallbackProvider(GpuProvider):
+    """Оценка нагрузки GPU по процессам, похожим на GPU-интенсивные"""
+
+    vendor = "fallback"
+
+    def __init__(self, process_table):
+        self.process_table = process_table
+
+    async def probe(self):
+        return True
+
+    def read(self):
+        try:
+            # Более умный fallback на основе активных процессов
+            gpu_intensive_processes = 0
+            total_gpu_load = 0
+            
+            # Опрашиваем только процессы, похожие на GPU-интенсивные
+            self.process_table.refresh()
+            for entry in self.process_table.gpu_entries():
+                try:
+                    # Проверка (pid, create_time): PID мог достаться другому процессу
+                    if not entry.proc.is_running():
+                        raise psutil.NoSuchProcess(entry.key[0])
+                    with entry.proc.oneshot():
+                        cpu = entry.proc.cpu_percent()
+                        memory = entry.proc.memory_percent()
+                        
+                    gpu_intensive_processes += 1
+                    # Эвристика: GPU нагрузка связана с CPU и памятью
+                    total_gpu_load += (cpu * 0.3 + memory * 2)
+                    
+                except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                    self.process_table.discard(entry)
+                except psutil.AccessDenied:
+                    continue
+            
+            # Нормализуем нагрузку
+            gpu_usage = min(total_gpu_load, 100)
+            memory = psutil.virtual_memory()
+            memory_used = (memory.used * 0.3)  # Часть общей памяти для GPU
+            
+            return {
+                'usage': gpu_usage,
+                'memory_used': memory_used,
+                'memory_total': memory.total * 0.5,  # Предполагаем 50% для GPU
+                'temperature': 40 + (gpu_usage * 0.4),  # Температура зависит от нагрузки
+                'process_count': gpu_intensive_processes
+            }
+            
+        except Exception as e:
+            # Последний резерв - случайные данные
+            import random
+            return {
+                'usage': random.randint(5, 35),
+                'memory_used': random.randint(1, 3) * 1024 * 1024 * 1024,
+                'memory_total': 6 * 1024 * 1024 * 1024,
+                'temperature': random.randint(45, 60),
+                'process_count': random.randint(2, 6)
+            }
+
+
+# Сглаженные скорости одного интерфейса (все в единицах в секунду)
+NicRates = namedtuple('NicRates', 'name sent recv packets_sent packets_recv errors drops')
+
+# Суммарные скорости без loopback плюс разбивка по интерфейсам
+NetworkSample = namedtuple('NetworkSample', 'sent recv interfaces')
+
+
+def is_loopback(nic):
+    return nic == 'lo' or nic.lower().startswith('loopback')
+
+
+class NetworkMonitor:
+    """Скорости по каждому сетевому интерфейсу.
+
+    Один вызов net_io_counters(pernic=True) за тик; скорость - разница
+    счетчиков, деленная на реально прошедшее время по time.monotonic(),
+    а не на предполагаемую секунду. Переполнение 32-битного счетчика
+    учитывается, сброс счетчика (интерфейс пересоздан) пропускается.
+    Скорости сглаживаются EWMA с постоянной времени tau секунд.
+    """
+
+    WRAP = 2 ** 32
+
+    def __init__(self, tau=1.0, counters=None):
+        self.tau = tau
+        # Источник счетчиков: psutil или ProcfsBackend.net_io_counters
+        self.counters = counters or (lambda: psutil.net_io_counters(pernic=True))
+        self._last = {}  # интерфейс -> счетчики прошлого тика
+        self._rates = {}  # интерфейс -> сглаженные скорости
+        self._last_time = None
+
+    def _delta(self, current, previous):
+        delta = current - previous
+        if delta >= 0:
+            return delta
+        if previous < self.WRAP and current + self.WRAP - previous < self.WRAP // 2:
+            return current + self.WRAP - previous
+        return None
+
+    def sample(self):
+        now = time.monotonic()
+        counters = self.counters()
+        elapsed = now - self._last_time if self._last_time is not None else 0
+        self._last_time = now
+        # Вес нового значения зависит от прошедшего времени
+        alpha = 1 - math.exp(-elapsed / self.tau) if elapsed > 0 else 1.0
+        
+        interfaces = []
+        total_sent = total_recv = 0.0
+        for nic, values in counters.items():
+            # bytes_sent, bytes_recv, packets_sent, packets_recv,
+            # errin, errout, dropin, dropout
+            previous = self._last.get(nic)
+            self._last[nic] = values
+            if previous is None or elapsed <= 0:
+                continue
+                
+            rates = self._rates.get(nic)
+            if rates is None:
+                rates = self._rates[nic] = [None] * len(values)
+            for i, (current, last) in enumerate(zip(values, previous)):
+                delta = self._delta(current, last)
+                if delta is None:
+                    continue
+                rate = delta / elapsed
+                rates[i] = rate if rates[i] is None else rates[i] + alpha * (rate - rates[i])
+                
+            sent, recv, packets_sent, packets_recv, errin, errout, dropin, dropout = (
+                rate or 0.0 for rate in rates)
+            interfaces.append(NicRates(nic, sent, recv, packets_sent, packets_recv,
+                                       errin + errout, dropin + dropout))
+            if not is_loopback(nic):
+                total_sent += sent
+                total_recv += recv
+                
+        # Интерфейсы, которые исчезли
+        for nic in self._last.keys() - counters.keys():
+            del self._last[nic]
+            self._rates.pop(nic, None)
+            
+        return NetworkSample(total_sent, total_recv, tuple(interfaces))
+
+
+# Заполненность одного смонтированного раздела
+MountUsage = namedtuple('MountUsage', 'mountpoint device fstype total used free percent')
+
+# Скорости ввода-вывода одного устройства: байт/с и операций/с
+DiskRates = namedtuple('DiskRates', 'name read_bytes write_bytes read_iops write_iops')
+
+# Файловые системы, которые не являются настоящими дисками (кроме системного
+# раздела: в контейнере / - это overlay, и его пропускать нельзя)
+PSEUDO_FILESYSTEMS = {'squashfs', 'tmpfs', 'devtmpfs', 'overlay', 'iso9660', 'udf'}
+
+
+class MountWatcher:
+    """Сообщает, что таблица монтирования изменилась.
+
+    В Linux ядро будит poll() на /proc/self/mounts с POLLPRI при каждом
+    mount/umount, так что проверка ничего не стоит. На других системах
+    список разделов просто перечитывается раз в refresh секунд.
+    """
+
+    def __init__(self, refresh=60.0):
+        self.refresh = refresh
+        self._file = None
+        self._poller = None
+        self._checked = None
+        try:
+            self._file = open('/proc/self/mounts', 'rb')
+            self._poller = select.poll()
+            self._poller.register(self._file, select.POLLPRI | select.POLLERR)
+        except (OSError, AttributeError):
+            self._file = None
+            self._poller = None
+
+    def changed(self):
+        if self._checked is None:
+            self._checked = time.monotonic()
+            self._consume()
+            return True
+        if self._poller is not None:
+            if not self._poller.poll(0):
+                return False
+            # Событие сбрасывается только чтением файла
+            self._consume()
+            return True
+        if time.monotonic() - self._checked >= self.refresh:
+            self._checked = time.monotonic()
+            return True
+        return False
+
+    def _consume(self):
+        if self._file is not None:
+            self._file.seek(0)
+            self._file.read()
+
+
+def primary_mountpoint():
+    """Системный раздел: C:\\ в Windows, / в остальных системах"""
+    if sys.platform == 'win32':
+        return os.environ.get('SystemDrive', 'C:') + '\\'
+    return '/'
+
+
+class DiskMonitor:
+    """Заполненность всех настоящих разделов и I/O каждого устройства.
+
+    Список разделов кэшируется и перечитывается только при изменении
+    таблицы монтирования. Скорости I/O считаются по одному вызову
+    disk_io_counters(perdisk=True) за тик и реальному интервалу
+    time.monotonic(), так что десятки NVMe-устройств не умножают число
+    системных вызовов.
+    """
+
+    def __init__(self):
+        self.watcher = MountWatcher()
+        self.partitions = []
+        self._last = {}
+        self._last_time = None
+        self._whole_disk = {}  # имя устройства -> целый диск (не раздел)
+
+    def refresh_partitions(self):
+        primary = primary_mountpoint()
+        seen = set()
+        partitions = []
+        for part in psutil.disk_partitions(all=False):
+            if part.mountpoint != primary and (part.fstype.lower() in PSEUDO_FILESYSTEMS
+                                               or 'cdrom' in part.opts):
+                continue
+            if not part.fstype or part.device in seen:
+                # Пустой привод или bind-mount того же устройства
+                continue
+            seen.add(part.device)
+            partitions.append(part)
+        if not any(part.mountpoint == primary for part in partitions):
+            # all=False отбрасывает nodev-ФС, а overlay в контейнере - как раз она
+            partitions.extend(part for part in psutil.disk_partitions(all=True)
+                              if part.mountpoint == primary)
+        self.partitions = partitions
+
+    def usage(self):
+        """Заполненность разделов; основной - первым"""
+        if self.watcher.changed():
+            self.refresh_partitions()
+            
+        primary = primary_mountpoint()
+        mounts = []
+        for part in self.partitions:
+            try:
+                usage = psutil.disk_usage(part.mountpoint)
+            except OSError:
+                continue
+            mount = MountUsage(part.mountpoint, part.device, part.fstype,
+                               usage.total, usage.used, usage.free, usage.percent)
+            if part.mountpoint == primary:
+                mounts.insert(0, mount)
+            else:
+                mounts.append(mount)
+        if not mounts:
+            raise OSError("no mounted disks found")
+        return tuple(mounts)
+
+    def is_whole_disk(self, name):
+        """Целый диск, а не раздел/loop/ram (в Linux - есть в /sys/block).
+
+        Устройства поверх других (LVM, LUKS, md - непустой slaves/) тоже не
+        считаются: их I/O уже учтен на дисках под ними, иначе сумма двоится.
+        """
+        whole = self._whole_disk.get(name)
+        if whole is None:
+            if name.startswith(('loop', 'ram', 'zram')):
+                whole = False
+            elif os.path.isdir('/sys/block'):
+                path = os.path.join('/sys/block', name)
+                try:
+                    whole = os.path.exists(path) and not os.listdir(os.path.join(path, 'slaves'))
+                except OSError:
+                    whole = os.path.exists(path)
+            else:
+                whole = True
+            self._whole_disk[name] = whole
+        return whole
+
+    def io_rates(self):
+        """(чтение байт/с, запись байт/с, скорости по целым дискам)"""
+        now = time.monotonic()
+        counters = psutil.disk_io_counters(perdisk=True) or {}
+        elapsed = now - self._last_time if self._last_time is not None else 0
+        self._last_time = now
+        
+        devices = []
+        total_read = total_write = 0.0
+        for name, io in counters.items():
+            previous = self._last.get(name)
+            self._last[name] = io
+            if previous is None or elapsed <= 0 or not self.is_whole_disk(name):
+                continue
+            deltas = (io.read_bytes - previous.read_bytes,
+                      io.write_bytes - previous.write_bytes,
+                      io.read_count - previous.read_count,
+                      io.write_count - previous.write_count)
+            if min(deltas) < 0:
+                # Счетчики сброшены (устройство переподключено)
+                continue
+            rates = DiskRates(name, *(delta / elapsed for delta in deltas))
+            devices.append(rates)
+            total_read += rates.read_bytes
+            total_write += rates.write_bytes
+            
+        for name in self._last.keys() - counters.keys():
+            del self._last[name]
+            
+        return total_read, total_write, tuple(devices)
+
+
+class CollectorPool(Executor):
+    """Пул daemon-потоков для блокирующих вызовов сборщиков.
+
+    ThreadPoolExecutor дожидается своих потоков при выходе из программы,
+    а зависший источник (statvfs на отвалившемся NFS, датчик на шине i2c)
+    может не вернуться никогда - монитор бы не закрылся.
+    """
+
+    def __init__(self, workers=4):
+        self.workers = workers
+        self._queue = queue.SimpleQueue()
+        self._threads = []
+
+    def submit(self, fn, /, *args, **kwargs):
+        if not self._threads:
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"collector-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+
+class ScheduledTask:
+    """Источник метрик со своим интервалом опроса.
+
+    interval=None - опросить один раз (статичные данные), 0 - каждый тик,
+    иначе - период в секундах. Последнее успешное значение хранится в value.
+    deadline - сколько тик готов ждать этот источник: не уложившийся
+    доделывает опрос в фоне, а снимки до тех пор берут прошлое значение
+    с пометкой stale. inline - вызов не блокирует (pread из /proc), и
+    он выполняется прямо в потоке сборщика, без пула.
+    """
+    __slots__ = ('name', 'func', 'interval', 'deadline', 'inline', 'value', 'next_due',
+                 'updated', 'failures', 'done', 'pending', 'started', 'paused')
+
+    def __init__(self, name, func, interval=0, default=None, deadline=0.5, inline=False):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.deadline = deadline
+        self.inline = inline
+        self.value = default
+        self.next_due = 0.0
+        self.updated = None  # time.monotonic() последнего успешного опроса
+        self.failures = 0
+        self.done = False
+        self.pending = None  # asyncio.Future незаконченного опроса
+        self.started = None  # time.monotonic() его запуска
+        self.paused = False  # не опрашивать до resume() (например, панель не видна)
+
+
+class Scheduler:
+    """Планировщик опроса с дедлайнами от time.monotonic().
+
+    Тики идут строго по сетке start + k * period, поэтому время работы
+    сборщиков не накапливается в сдвиг периода. Сборщик, который падает,
+    опрашивается все реже (экспоненциально, до max_backoff секунд).
+    rate - общий множитель частоты: 0.5 - все опрашивается вдвое реже.
+
+    Источники опрашиваются одновременно: свой цикл asyncio раздает вызовы
+    в пул потоков и ждет их не дольше самого короткого дедлайна среди
+    запущенных. Так тик длится столько, сколько самый медленный из
+    здоровых источников, а зависший не задерживает остальные.
+    """
+
+    def __init__(self, tick=1.0, rate=1.0, max_backoff=300.0, workers=4):
+        self.tick = tick
+        self.rate = rate
+        self.max_backoff = max_backoff
+        self.tasks = {}
+        self.deadline = None  # плановое время текущего тика
+        self.profiler = None  # SelfProfiler, если включен --profile
+        self.workers = workers
+        self._loop = None  # создается в потоке, который зовет run_due()
+        self._pool = None
+
+    @property
+    def period(self):
+        return self.tick / self.rate
+
+    def add(self, name, func, interval=0, default=None, deadline=0.5, inline=False):
+        self.tasks[name] = ScheduledTask(name, func, interval, default, deadline, inline)
+
+    def value(self, name):
+        return self.tasks[name].value
+
+    def wait(self, stop_event):
+        """Ждем следующего тика; False, если пора останавливаться"""
+        period = self.period
+        now = time.monotonic()
+        if self.deadline is None:
+            self.deadline = now
+        else:
+            self.deadline += period
+            if self.deadline < now - period:
+                # Отстали больше чем на тик - не догоняем пачкой
+                self.deadline = now
+        delay = self.deadline - now
+        if delay <= 0 and stop_event.is_set():
+            return False
+        while delay > 0:
+            # Не дольше обычного тика: ускорение через set_rate() не ждет редкого тика
+            if stop_event.wait(min(delay, self.tick)):
+                return False
+            delay = self.deadline - time.monotonic()
+        if self.profiler is not None:
+            self.profiler.jitter.observe(time.monotonic() - self.deadline)
+        return True
+
+    def run_due(self):
+        """Опрашиваем все источники, у которых подошел срок"""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._pool = CollectorPool(self.workers)
+        self._loop.run_until_complete(self._run_due())
+
+    async def _run_due(self):
+        now = time.monotonic()
+        deadline = self.deadline if self.deadline is not None else now
+        loop = asyncio.get_running_loop()
+        
+        # Опросы, не успевшие к прошлым тикам, могли с тех пор закончиться
+        for task in self.tasks.values():
+            if task.pending is not None and task.pending.done():
+                self._finish(task, deadline)
+                
+        started = []
+        inline = []
+        for task in self.tasks.values():
+            if task.done or task.paused or task.pending is not None or task.next_due > deadline:
+                continue
+            task.started = now
+            if task.inline:
+                inline.append(task)
+            else:
+                task.pending = loop.run_in_executor(self._pool, self._call, task.func)
+                started.append(task)
+                
+        # Неблокирующие источники опрашиваем, пока пул занят остальными
+        for task in inline:
+            task.pending = loop.create_future()
+            try:
+                task.pending.set_result(self._call(task.func))
+            except Exception as e:
+                task.pending.set_exception(e)
+            self._finish(task, deadline)
+        if not started:
+            return
+            
+        await asyncio.wait([task.pending for task in started],
+                           timeout=min(task.deadline for task in started))
+        for task in started:
+            if task.pending.done():
+                self._finish(task, deadline)
+
+    @staticmethod
+    def _call(func):
+        """Выполняется в пуле: значение и время опроса (для --profile)"""
+        started = time.perf_counter()
+        return func(), time.perf_counter() - started
+
+    def _finish(self, task, deadline):
+        """Применяем результат законченного опроса"""
+        now = time.monotonic()
+        future, task.pending = task.pending, None
+        try:
+            task.value, duration = future.result()
+        except Exception as e:
+            task.failures += 1
+            if task.failures == 1:
+                print(f"Collector '{task.name}' error: {e}")
+            backoff = max(task.interval or self.tick, self.tick) * 2 ** task.failures
+            task.next_due = now + min(backoff, self.max_backoff) / self.rate
+            return
+            
+        if self.profiler is not None:
+            self.profiler.observe(task.name, duration)
+        task.failures = 0
+        task.updated = now
+        if task.interval is None:
+            task.done = True
+        else:
+            interval = max(task.interval, self.tick) / self.rate
+            task.next_due = max(task.next_due + interval, deadline)
+
+    def stale(self):
+        """(имя, возраст значения в секундах) источников, пропустивших дедлайн"""
+        now = time.monotonic()
+        return tuple((task.name, now - (task.updated or task.started))
+                     for task in self.tasks.values()
+                     if task.pending is not None and now - task.started > task.deadline)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+    def reset(self, name):
+        """Опросить источник на ближайшем тике (например, после смены GPU)"""
+        task = self.tasks[name]
+        task.next_due = 0.0
+        task.failures = 0
+        task.done = False
+
+    def set_rate(self, rate):
+        """Новый множитель частоты; при ускорении ближние сроки подтягиваются"""
+        if rate > self.rate:
+            now = time.monotonic()
+            for task in self.tasks.values():
+                interval = max(task.interval or 0, self.tick) / rate
+                task.next_due = min(task.next_due, now + interval)
+            if self.deadline is not None:
+                self.deadline = min(self.deadline, now + self.tick / rate)
+        self.rate = rate
+
+    def pause(self, name):
+        """Не опрашивать источник до resume(); значение остается прежним"""
+        self.tasks[name].paused = True
+
+    def resume(self, name):
+        task = self.tasks[name]
+        if task.paused:
+            task.paused = False
+            task.next_due = 0.0
+
+    def preset(self, name, value):
+        """Готовое значение разового источника (из кэша) - опрашивать его не нужно"""
+        task = self.tasks[name]
+        task.value = value
+        task.updated = time.monotonic()
+        task.done = True
+
+
+# Метрики, которые пишутся в многоуровневую историю
+HISTORY_METRICS = (
+    'cpu_usage', 'cpu_freq',
+    'gpu_usage', 'gpu_memory_used', 'gpu_temperature', 'gpu_process_count',
+    'mem_percent', 'mem_used',
+    'disk_percent', 'disk_used', 'disk_read', 'disk_write',
+    'net_upload', 'net_download',
+)
+
+# Панель окна -> источник, который нужен только ей (в записи и историю не идет).
+# disk и disk_io сюда не входят, хотя их показывает панель details: из них
+# берутся disk_percent/disk_read/disk_write для истории (график после
+# разворачивания окна), правила оповещений (disk_full по умолчанию) и
+# записи, так что они опрашиваются и при скрытом окне. Дорогой из них только
+# statvfs в disk, и он и так идет раз в 30 с
+PANEL_SOURCES = {'processes': 'processes'}
+
+# Сколько секунд сверка кэша железа ждет первого снимка (см. probe_gpus_async)
+FIRST_SNAPSHOT_WAIT = 5.0
+
+# Множитель частоты опроса, пока окно свернуто или скрыто
+LOW_POWER_RATE = 0.25
+
+
+class MetricsCollector:
+    """Фоновый сборщик метрик.
+
+    Все вызовы psutil и nvidia-smi выполняются в отдельном потоке. Готовый
+    снимок собирается целиком и публикуется одной заменой ссылки, поэтому
+    UI-поток всегда видит либо старый, либо новый снимок целиком.
+    """
+
+    def __init__(self, interval=1.0, rate=1.0, sysfs_root='/sys', backend='auto'):
+        self.interval = interval
+        self.rate = rate
+        self.sysfs_root = sysfs_root
+        
+        # На Linux CPU, память и сеть читаются из /proc напрямую (procfs.py),
+        # иначе или с backend='psutil' - через psutil
+        self.procfs = ProcfsBackend.create() if backend == 'auto' else None
+        self.cpu_temperature = CpuTemperature(sysfs_root)
+        
+        # Таблица процессов для резервной GPU-эвристики
+        self.process_table = ProcessTable()
+        
+        # Источники GPU в порядке предпочтения; какой из них есть на
+        # машине, выясняет check_gpu_availability. Пока проба идет,
+        # gpu_available = "probing", а данные дает резервная эвристика
+        self.gpu_providers = [
+            NvidiaProvider(interval),
+            AmdSysfsProvider(sysfs_root),
+            IntelSysfsProvider(sysfs_root),
+            AmdWmicProvider(),
+            IntelWmicProvider(),
+        ]
+        self.fallback_gpu = FallbackProvider(self.process_table)
+        self.gpu_provider = None
+        self.gpu_available = "probing"
+        self._active_gpu = None  # источник, который сейчас читает поток сборщика
+        
+        # Сведения о железе: из кэша (use_inventory) или после фоновой проверки
+        self.inventory = None
+        self.inventory_cache = None
+        self.inventory_cached = False
+        # Секунды от запуска процесса до первого полного кадра (см. inventory.py)
+        self.startup_seconds = None
+
+        self._latest = None
+        self._published = threading.Event()  # первый снимок опубликован
+        self._seq = 0
+        self.tick_histogram = LatencyHistogram()
+        self.profiler = None
+        self._stop = threading.Event()
+        self._thread = None
+        
+        # Потребители снимков (shared memory и т.п.), вызываются в потоке сборщика
+        self.subscribers = []
+        
+        # Источники, нужные не только окну (например, /metrics): скрытое окно
+        # их не останавливает, и частота опроса тогда не снижается
+        self.pinned = set()
+        self.track_gpu_processes = True
+        
+        # Правила оповещений проверяются на каждом снимке до его публикации
+        self.alerts = AlertEngine(DEFAULT_RULES, ALERT_METRICS)
+
+        # История всех метрик по уровням детализации; график берет последние 60 с
+        self.history = TimeSeriesStore(HISTORY_METRICS)
+        self.chart_points = 60
+
+        # Сетевые счетчики по интерфейсам
+        self.network = NetworkMonitor(
+            counters=self.procfs.net_io_counters if self.procfs else None)
+        
+        # Разделы и I/O дисков
+        self.disks = DiskMonitor()
+        
+        # Панель самых активных процессов
+        self.top_processes = TopProcesses()
+        
+        # Каждый источник опрашивается со своим интервалом и дедлайном
+        self.scheduler = Scheduler(interval, rate)
+        self.scheduler.add('static', self.collect_static, interval=None,
+                           default={'cpu_cores': 0}, deadline=2.0)
+        # Чтения из /proc (procfs.py) не блокируются - их опрос не уходит в пул
+        procfs = self.procfs is not None
+        self.scheduler.add('cpu', self.collect_cpu, default=(0.0, ()), inline=procfs)
+        # Частоты по ядрам - это чтение файла на каждое ядро, реже
+        self.scheduler.add('cpu_freq', self.collect_cpu_freq, interval=5, default=(0, ()))
+        self.scheduler.add('gpu', self.get_gpu_info, default={
+            'usage': 0, 'memory_used': 0, 'memory_total': 1,
+            'temperature': 0, 'process_count': 0
+        })
+        self.scheduler.add('cpu_temp', self.collect_cpu_temperature, interval=2)
+        self.scheduler.add('memory', self.procfs.virtual_memory if self.procfs
+                           else psutil.virtual_memory, default=VirtualMemory(0, 0, 0.0, 0, 0),
+                           inline=procfs)
+        # statvfs на отвалившемся сетевом разделе может висеть долго
+        self.scheduler.add('disk', self.disks.usage, interval=30, default=(), deadline=2.0)
+        self.scheduler.add('disk_io', self.disks.io_rates, default=(0.0, 0.0, ()))
+        self.scheduler.add('network', self.network.sample,
+                           default=NetworkSample(0.0, 0.0, ()), inline=procfs)
+        self.scheduler.add('processes', self.top_processes.sample,
+                           default=ProcessRanking((), (), ()), deadline=1.0)
+
+    def set_visibility(self, panels, low_power=False):
+        """Окно сообщает, какие панели видны: источники скрытых не опрашиваются.
+
+        low_power - окно свернуто или скрыто: частота опроса умножается на
+        LOW_POWER_RATE, если снимки больше никому не нужны (запись, агент, shm).
+        """
+        for panel, source in PANEL_SOURCES.items():
+            if panel in panels or source in self.pinned:
+                self.scheduler.resume(source)
+            else:
+                self.scheduler.pause(source)
+        self.track_gpu_processes = 'gpu_processes' in panels or 'gpu_processes' in self.pinned
+        low_power = low_power and not self.subscribers and not self.pinned
+        self.scheduler.set_rate(self.rate * LOW_POWER_RATE if low_power else self.rate)
+
+    def enable_profiling(self):
+        """Включаем замеры фаз тика, jitter и расхода самого монитора"""
+        self.profiler = self.scheduler.profiler = SelfProfiler()
+        return self.profiler
+
+    @property
+    def latest(self):
+        """Последний опубликованный снимок (или None до первого тика)"""
+        return self._latest
+
+    def publish(self, snapshot):
+        """Делаем снимок текущим и раздаем его подписчикам"""
+        if self.alerts is not None:
+            self.alerts.observe(snapshot)
+        # Публикация - одно присваивание ссылки, атомарно под GIL
+        self._latest = snapshot
+        self._published.set()
+        for subscriber in self.subscribers:
+            try:
+                subscriber(snapshot)
+            except Exception as e:
+                print(f"Subscriber error: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self.scheduler.close()
+        if self._active_gpu is not None:
+            self._active_gpu.stop()
+
+    def ticks(self):
+        """Тики по расписанию планировщика, пока сборщик не остановлен"""
+        while self.scheduler.wait(self._stop):
+            profiler = self.profiler
+            if profiler is not None and profiler.dump_requested:
+                profiler.dump_requested = False
+                print(profiler.report(), file=sys.stderr)
+            yield
+
+    def run(self):
+        """Цикл сбора"""
+        for _ in self.ticks():
+            try:
+                self.publish(self.collect())
+            except Exception as e:
+                print(f"Collector error: {e}")
+
+    def collect_static(self):
+        """Данные, которые не меняются, пока система работает"""
+        return {'cpu_cores': psutil.cpu_count(logical=False)}
+
+    def collect_cpu(self):
+        """Загрузка по логическим процессорам; общая - их среднее (один вызов)"""
+        if self.procfs is not None:
+            per_core = tuple(self.procfs.cpu_percent())
+        else:
+            per_core = tuple(psutil.cpu_percent(percpu=True))
+        # В некоторых песочницах /proc/stat без строк cpuN, и список пуст
+        if not per_core:
+            return 0.0, ()
+        return sum(per_core) / len(per_core), per_core
+
+    def collect_cpu_temperature(self):
+        """Температура CPU, °C, или None"""
+        if self.cpu_temperature.available:
+            return self.cpu_temperature.read()
+        # Вне Linux датчики есть только у psutil (FreeBSD)
+        if sys.platform.startswith('linux') or not hasattr(psutil, 'sensors_temperatures'):
+            return None
+        sensors = psutil.sensors_temperatures()
+        for name in CPU_HWMON_NAMES:
+            if sensors.get(name):
+                return sensors[name][0].current
+        return None
+
+    def collect_cpu_freq(self):
+        """(средняя частота, частоты по ядрам) в МГц"""
+        freqs = psutil.cpu_freq(percpu=True) or []
+        per_core = tuple(freq.current for freq in freqs)
+        if not per_core:
+            return 0, ()
+        return sum(per_core) / len(per_core), per_core if len(per_core) > 1 else ()
+
+    def collect(self):
+        """Собираем новый снимок (вызывается только из потока сборщика)"""
+        started = time.perf_counter()
+        
+        # Опрашиваем источники, у которых подошел срок; остальные
+        # отдают последнее значение
+        self.scheduler.run_due()
+        values = self.scheduler.value
+        
+        cpu_usage, cpu_per_core = values('cpu')
+        cpu_freq_current, cpu_core_freqs = values('cpu_freq')
+        cpu_cores = values('static')['cpu_cores']
+        gpu_info = values('gpu')
+        memory = values('memory')
+        disks = values('disk')
+        disk = disks[0] if disks else None
+        disk_read, disk_write, disk_io = values('disk_io')
+        network = values('network')
+
+        # Обновляем историю (порядок - как в HISTORY_METRICS); интервалы
+        # считаем по monotonic: перевод часов назад (NTP, выход из сна ВМ)
+        # иначе заморозил бы все уровни, пока часы не догонят
+        now = time.time()
+        self.history.append(time.monotonic(), (
+            cpu_usage,
+            cpu_freq_current,
+            gpu_info['usage'],
+            gpu_info['memory_used'],
+            gpu_info['temperature'],
+            gpu_info['process_count'],
+            memory.percent,
+            memory.used,
+            disk.percent if disk else None,
+            disk.used if disk else None,
+            disk_read,
+            disk_write,
+            network.sent,
+            network.recv,
+        ))
+
+        duration = time.perf_counter() - started
+        self.tick_histogram.observe(duration)
+        if self.profiler is not None:
+            self.profiler.observe('tick', duration)
+            self.profiler.sample_self()
+
+        self._seq += 1
+        return Snapshot(
+            seq=self._seq,
+            timestamp=now,
+            collect_duration=duration,
+            cpu_usage=cpu_usage,
+            cpu_freq=cpu_freq_current,
+            cpu_cores=cpu_cores,
+            cpu_per_core=cpu_per_core,
+            cpu_core_freqs=cpu_core_freqs,
+            cpu_temperature=values('cpu_temp'),
+            gpu_vendor=self.gpu_available,
+            gpu_usage=gpu_info['usage'],
+            gpu_memory_used=gpu_info['memory_used'],
+            gpu_memory_total=gpu_info['memory_total'],
+            gpu_temperature=gpu_info['temperature'],
+            gpu_process_count=gpu_info['process_count'],
+            gpu_count=len(gpu_info.get('devices', ())) or 1,
+            mem_percent=memory.percent,
+            mem_used=memory.used,
+            mem_available=memory.available,
+            mem_total=memory.total,
+            disk=disk,
+            disks=disks,
+            disk_read=disk_read,
+            disk_write=disk_write,
+            disk_io=disk_io,
+            net_upload=network.sent,
+            net_download=network.recv,
+            net_interfaces=network.interfaces,
+            top_processes=values('processes'),
+            cpu_history=self.history.tail('cpu_usage', self.chart_points),
+            gpu_history=self.history.tail('gpu_usage', self.chart_points),
+            mem_history=self.history.tail('mem_percent', self.chart_points),
+            gpu_processes=gpu_info.get('processes', ()),
+            stale=self.scheduler.stale(),
+        )
+
+    async def _probe_gpus(self, timeout):
+        """Все пробы параллельно; что не успело к общему дедлайну - отменяется"""
+        tasks = [asyncio.ensure_future(provider.probe()) for provider in self.gpu_providers]
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        
+        # При нескольких найденных побеждает первый в списке
+        for provider, task in zip(self.gpu_providers, tasks):
+            if task in done and not task.cancelled() and task.exception() is None and task.result():
+                return provider
+        return self.fallback_gpu
+
+    def check_gpu_availability(self, timeout=5.0):
+        """Проверяем доступность GPU мониторинга (блокирует не дольше timeout)"""
+        provider = asyncio.run(self._probe_gpus(timeout))
+        if provider is self.fallback_gpu:
+            print("❌ No GPU monitoring available - using fallback")
+        else:
+            print(f"✅ {provider.vendor.upper()} GPU detected")
+        self.gpu_provider = provider
+        self.gpu_available = provider.vendor
+        self.scheduler.reset('gpu')
+        return provider.vendor
+
+    def probe_gpus_async(self, timeout=5.0):
+        """Проверка GPU и железа в фоне, чтобы окно не ждало пробы.
+
+        Без кэша до ответа vendor = probing; с кэшем панель уже полная,
+        а проверка только обновит ее, если железо изменилось, - поэтому
+        она ждет первого опубликованного снимка и не отнимает у него время.
+        """
+        def refresh():
+            if self.inventory is not None:
+                self._published.wait(FIRST_SNAPSHOT_WAIT)
+            self.refresh_inventory(timeout)
+
+        thread = threading.Thread(target=refresh, daemon=True)
+        thread.start()
+        return thread
+
+    def use_inventory(self, cache):
+        """Берем сведения о железе из кэша; True, если они там были"""
+        self.inventory_cache = cache
+        inventory = cache.load()
+        if inventory is not None:
+            self.apply_inventory(inventory)
+            self.inventory_cached = True
+        return self.inventory_cached
+
+    def apply_inventory(self, inventory):
+        """GPU-источник без пробы и число ядер без опроса - из готовых сведений"""
+        provider = next((provider for provider in self.gpu_providers
+                         if type(provider).__name__ == inventory.gpu_source), self.fallback_gpu)
+        self.gpu_provider = provider
+        self.gpu_available = provider.vendor
+        self.scheduler.reset('gpu')
+        self.scheduler.preset('static', {'cpu_cores': inventory.cpu_cores})
+        self.inventory = inventory
+
+    def discover_inventory(self, timeout=5.0):
+        """Выясняем железо заново (блокирует на время пробы GPU)"""
+        self.check_gpu_availability(timeout)
+        try:
+            # Отдельный DiskMonitor: у сборщика свой, и он живет в другом потоке
+            disks = tuple((mount.mountpoint, mount.device, mount.fstype, mount.total)
+                          for mount in DiskMonitor().usage())
+        except OSError:
+            disks = ()
+        return Inventory(
+            gpu_vendor=self.gpu_provider.vendor,
+            gpu_source=type(self.gpu_provider).__name__,
+            cpu_cores=psutil.cpu_count(logical=False) or 0,
+            cpu_threads=psutil.cpu_count() or 0,
+            mem_total=psutil.virtual_memory().total,
+            disks=disks,
+            nics=tuple(sorted(psutil.net_if_stats())),
+            macs=tuple(nic_macs()),
+            gpu_ids=tuple(gpu_pci_ids(self.sysfs_root)),
+        )
+
+    def refresh_inventory(self, timeout=5.0):
+        """Сверяем кэш с железом; при расхождении применяем и перезаписываем"""
+        inventory = self.discover_inventory(timeout)
+        if inventory != self.inventory:
+            if self.inventory is not None:
+                print("🔄 Hardware changed since the cached inventory - updated")
+            self.apply_inventory(inventory)
+            if self.inventory_cache is not None:
+                self.inventory_cache.save(inventory)
+        return inventory
+
+    def get_gpu_info(self):
+        """Основной метод получения GPU информации"""
+        provider = self.gpu_provider
+        if provider is not self._active_gpu:
+            # Смена источника (после пробы): старый останавливаем в этом же потоке
+            if self._active_gpu is not None:
+                self._active_gpu.stop()
+            self._active_gpu = provider
+            
+        if provider is not None:
+            provider.track_processes = self.track_gpu_processes
+        info = provider.read() if provider is not None else None
+        if info is None:
+            # Проба еще идет или у источника нет свежих данных
+            info = self.fallback_gpu.read()
+        return info
@@ -0,0 +1,157 @@
+"""Сводная панель: сетка компактных карточек хостов, приславших снимки агентом.
+
+Пакеты принимает и разбирает DashboardReceiver в своем потоке; окно раз
+в refresh_ms забирает имена изменившихся хостов и обновляет только их
+карточки, так что сотни агентов на 1 Гц дают одну перерисовку за период.
+"""
+import time
+import tkinter as tk
+
+from remote import STALE_AFTER, DashboardReceiver
+from theme import COLORS, format_rate, metric_card
+
+
+class HostCard:
+    """Карточка одного хоста: те же четыре метрики и цвета, что у виджета"""
+
+    METRICS = (
+        ('CPU', 'cpu_usage', 'cpu_color'),
+        ('GPU', 'gpu_usage', 'gpu_color'),
+        ('RAM', 'mem_percent', 'mem_color'),
+        ('DISK', 'disk_percent', 'disk_color'),
+    )
+
+    def __init__(self, parent, name):
+        self.frame = tk.Frame(parent, bg=COLORS['card_bg'], padx=8, pady=6,
+                              highlightbackground='#404040', highlightthickness=1)
+        self.title = tk.Label(self.frame, text=name, font=('Segoe UI', 9, 'bold'), anchor='w',
+                              fg=COLORS['text_primary'], bg=COLORS['card_bg'])
+        self.title.grid(row=0, column=0, columnspan=4, sticky='w')
+
+        # Те же карточки, что в окне, только мельче
+        self.value_labels = {}
+        for column, (title, key, color) in enumerate(self.METRICS):
+            card, label = metric_card(self.frame, title, "–", COLORS[color],
+                                      title_size=7, value_size=11, pady=2)
+            label.config(width=4)
+            card.grid(row=1, column=column, padx=2, pady=2)
+            self.value_labels[key] = (label, COLORS[color])
+
+        self.net_label = tk.Label(self.frame, text="", font=('Segoe UI', 7), anchor='w',
+                                  fg=COLORS['net_color'], bg=COLORS['card_bg'])
+        self.net_label.grid(row=2, column=0, columnspan=4, sticky='w')
+        self._texts = {}
+        self.stale = False
+
+    def _set(self, label, text):
+        # Tk перерисовывает метку на каждый config(), даже с тем же текстом
+        if self._texts.get(label) != text:
+            self._texts[label] = text
+            label.config(text=text)
+
+    def update(self, values):
+        for key, (label, _) in self.value_labels.items():
+            value = values.get(key)
+            self._set(label, f"{value:.0f}%" if value is not None else "N/A")
+        upload = values.get('net_upload') or 0
+        download = values.get('net_download') or 0
+        self._set(self.net_label, f"▲ {format_rate(upload, 0)}  ▼ {format_rate(download, 0)}")
+
+    def set_stale(self, stale):
+        if stale == self.stale:
+            return
+        self.stale = stale
+        for label, color in self.value_labels.values():
+            label.config(fg=COLORS['text_secondary'] if stale else color)
+        self.title.config(fg=COLORS['text_secondary'] if stale else COLORS['text_primary'])
+
+
+class Dashboard:
+    def __init__(self, receiver, columns=4, refresh_ms=500):
+        self.receiver = receiver
+        self.columns = columns
+        self.refresh_ms = refresh_ms
+        self.cards = {}  # имя хоста -> HostCard
+        self._last_packets = receiver.packets
+        self._last_refresh = time.monotonic()
+
+        self.root = tk.Tk()
+        self.root.title("System Dashboard")
+        self.root.configure(bg=COLORS['bg'])
+        self.root.geometry("900x600")
+
+        header = tk.Frame(self.root, bg=COLORS['bg'], padx=15, pady=10)
+        header.pack(fill='x')
+        tk.Label(header, text="SYSTEM DASHBOARD", font=('Segoe UI', 12, 'bold'),
+                 fg=COLORS['accent'], bg=COLORS['bg']).pack(side='left')
+        self.status_label = tk.Label(header, text="", font=('Segoe UI', 8),
+                                     fg=COLORS['text_secondary'], bg=COLORS['bg'])
+        self.status_label.pack(side='right')
+
+        # Прокручиваемая сетка: Frame внутри Canvas
+        body = tk.Frame(self.root, bg=COLORS['bg'])
+        body.pack(fill='both', expand=True)
+        self.canvas = tk.Canvas(body, bg=COLORS['bg'], highlightthickness=0)
+        scrollbar = tk.Scrollbar(body, orient='vertical', command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side='right', fill='y')
+        self.canvas.pack(side='left', fill='both', expand=True)
+        self.grid_frame = tk.Frame(self.canvas, bg=COLORS['bg'], padx=10)
+        self.canvas.create_window(0, 0, window=self.grid_frame, anchor='nw')
+        self.grid_frame.bind('<Configure>', lambda event: self.canvas.configure(
+            scrollregion=self.canvas.bbox('all')))
+        self.root.bind('<MouseWheel>', self.on_wheel)
+        self.root.bind('<Button-4>', lambda event: self.canvas.yview_scroll(-1, 'units'))
+        self.root.bind('<Button-5>', lambda event: self.canvas.yview_scroll(1, 'units'))
+
+    def on_wheel(self, event):
+        self.canvas.yview_scroll(-1 if event.delta > 0 else 1, 'units')
+
+    def layout(self):
+        """Раскладываем карточки по имени (только когда появился новый хост)"""
+        for index, name in enumerate(sorted(self.cards)):
+            row, column = divmod(index, self.columns)
+            self.cards[name].frame.grid(row=row, column=column, padx=5, pady=5, sticky='nsew')
+
+    def refresh(self):
+        hosts = self.receiver.hosts
+        added = False
+        for name in self.receiver.take_dirty():
+            card = self.cards.get(name)
+            if card is None:
+                card = self.cards[name] = HostCard(self.grid_frame, name)
+                added = True
+            card.update(hosts[name].values)
+        if added:
+            self.layout()
+
+        now = time.monotonic()
+        stale = 0
+        for name, card in self.cards.items():
+            is_stale = now - hosts[name].updated > STALE_AFTER
+            card.set_stale(is_stale)
+            stale += is_stale
+
+        packets = self.receiver.packets
+        rate = (packets - self._last_packets) / max(now - self._last_refresh, 1e-3)
+        self._last_packets, self._last_refresh = packets, now
+        status = f"{len(self.cards)} hosts · {rate:.0f} pkt/s"
+        if stale:
+            status += f" · {stale} stale"
+        self.status_label.config(text=status)
+
+        self.root.after(self.refresh_ms, self.refresh)
+
+    def run(self):
+        self.root.after(self.refresh_ms, self.refresh)
+        self.root.mainloop()
+
+
+def run_dashboard(host, port, transport='udp'):
+    receiver = DashboardReceiver(host, port, transport)
+    receiver.start()
+    try:
+        Dashboard(receiver).run()
+    finally:
+        receiver.stop()
+    return 0
@@ -0,0 +1,218 @@
+"""Локальный HTTP-эндпоинт /metrics в формате Prometheus.
+
+Страница строится только из последнего снимка сборщика: запрос никогда не
+вызывает psutil или nvidia-smi. Готовый текст кэшируется по номеру снимка,
+так что частые опросы несколькими скрейперами почти ничего не стоят.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value):
+    if value != value:
+        return 'NaN'
+    return repr(float(value))
+
+
+def _escape(label):
+    return str(label).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsExporter:
+    """HTTP-сервер с /metrics поверх MetricsCollector.latest"""
+
+    def __init__(self, collector, host='127.0.0.1', port=9105):
+        self.collector = collector
+        self.address = (host, port)
+        self._cache = (None, b'')  # (seq снимка, готовый ответ)
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        exporter = self
+        # Таблица GPU-процессов нужна /metrics, даже когда окно ее не показывает
+        self.collector.pinned.add('gpu_processes')
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = exporter.render()
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(self.address, Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"📈 Metrics: http://{self.address[0]}:{self._server.server_port}/metrics")
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def render(self):
+        """Текст экспозиции для текущего снимка (из кэша, если снимок тот же)"""
+        snapshot = self.collector.latest
+        seq = snapshot.seq if snapshot is not None else 0
+        cached_seq, body = self._cache
+        if cached_seq != seq:
+            body = self._render(snapshot).encode()
+            self._cache = (seq, body)
+        return body
+
+    def _render(self, snapshot):
+        lines = []
+
+        def gauge(name, help_text, value, labels=''):
+            if value is None:
+                return
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{labels} {_format_value(value)}")
+
+        if snapshot is not None:
+            disk = snapshot.disk
+            gauge('pcmonitor_snapshot_timestamp_seconds', "Unix time of the latest snapshot.",
+                  snapshot.timestamp)
+            gauge('pcmonitor_cpu_usage_percent', "CPU utilisation.", snapshot.cpu_usage)
+            gauge('pcmonitor_cpu_frequency_hertz', "Current CPU frequency.",
+                  snapshot.cpu_freq * 1e6 if snapshot.cpu_freq else None)
+            gauge('pcmonitor_cpu_cores', "Physical CPU cores.", snapshot.cpu_cores)
+            gauge('pcmonitor_cpu_temperature_celsius', "CPU package temperature.",
+                  snapshot.cpu_temperature)
+            gauge('pcmonitor_memory_used_bytes', "Used RAM.", snapshot.mem_used)
+            gauge('pcmonitor_memory_available_bytes', "Available RAM.", snapshot.mem_available)
+            gauge('pcmonitor_memory_total_bytes', "Total RAM.", snapshot.mem_total)
+            gauge('pcmonitor_memory_usage_percent', "RAM utilisation.", snapshot.mem_percent)
+            if disk is not None:
+                gauge('pcmonitor_disk_used_bytes', "Used disk space.", disk.used)
+                gauge('pcmonitor_disk_free_bytes', "Free disk space.", disk.free)
+                gauge('pcmonitor_disk_total_bytes', "Total disk space.", disk.total)
+                gauge('pcmonitor_disk_usage_percent', "Disk utilisation.", disk.percent)
+            gauge('pcmonitor_network_transmit_bytes_per_second', "Upload rate, loopback excluded.",
+                  snapshot.net_upload)
+            gauge('pcmonitor_network_receive_bytes_per_second', "Download rate, loopback excluded.",
+                  snapshot.net_download)
+            vendor = f'{{vendor="{snapshot.gpu_vendor}"}}'
+            gauge('pcmonitor_gpu_usage_percent', "GPU utilisation.", snapshot.gpu_usage, vendor)
+            gauge('pcmonitor_gpu_memory_used_bytes', "Used GPU memory.",
+                  snapshot.gpu_memory_used, vendor)
+            gauge('pcmonitor_gpu_memory_total_bytes', "Total GPU memory.",
+                  snapshot.gpu_memory_total, vendor)
+            gauge('pcmonitor_gpu_temperature_celsius', "GPU temperature.",
+                  snapshot.gpu_temperature, vendor)
+            gauge('pcmonitor_gpu_processes', "Processes using the GPU.",
+                  snapshot.gpu_process_count, vendor)
+            gauge('pcmonitor_gpu_count', "Number of GPUs.", snapshot.gpu_count, vendor)
+            self._render_gpu_processes(lines, snapshot.gpu_processes)
+
+            self._render_interfaces(lines, snapshot.net_interfaces)
+            self._render_disks(lines, snapshot.disks, snapshot.disk_io)
+            self._render_family(lines, 'pcmonitor_collector_stale_seconds',
+                                "Age of the value of a collector that missed its deadline.",
+                                [((('collector', name),), age) for name, age in snapshot.stale])
+            
+        alerts = self.collector.alerts
+        if alerts is not None:
+            active = {event.rule.name for event in alerts.active}
+            self._render_family(lines, 'pcmonitor_alert_active', "1 while an alert rule is firing.", [
+                ((('rule', state.rule.name), ('level', state.rule.level)), int(state.rule.name in active))
+                for state in alerts.states])
+
+        gauge('pcmonitor_startup_seconds', "Time from process start to the first full frame or record.",
+              self.collector.startup_seconds)
+        self._render_histograms(lines, 'pcmonitor_collector_tick_duration_seconds',
+                                "Time spent collecting one snapshot.",
+                                [('', self.collector.tick_histogram)])
+        
+        profiler = self.collector.profiler
+        if profiler is not None:
+            self._render_histograms(lines, 'pcmonitor_phase_duration_seconds',
+                                    "Time spent in one phase of a tick (--profile).",
+                                    [(f'phase="{_escape(phase)}"', histogram)
+                                     for phase, histogram in sorted(profiler.phases.items())])
+            self._render_histograms(lines, 'pcmonitor_scheduler_jitter_seconds',
+                                    "How late a tick woke up relative to its deadline.",
+                                    [('', profiler.jitter)])
+            gauge('pcmonitor_self_cpu_percent', "CPU used by the monitor process itself.",
+                  profiler.cpu_percent)
+            gauge('pcmonitor_self_resident_memory_bytes', "RSS of the monitor process itself.",
+                  profiler.rss)
+        return '\n'.join(lines) + '\n'
+
+    def _render_histograms(self, lines, name, help_text, histograms):
+        """Семья гистограмм: histograms - пары (метки, LatencyHistogram)"""
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, histogram in histograms:
+            buckets, counts, total = histogram.copy()
+            prefix = labels + ',' if labels else ''
+            suffix = '{' + labels + '}' if labels else ''
+            cumulative = 0
+            for bound, count in zip(buckets, counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {cumulative}')
+            lines.append(f"{name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{name}_count{suffix} {cumulative}")
+
+    def _render_family(self, lines, name, help_text, samples):
+        """Одна семья gauge-метрик: samples - пары (метки, значение)"""
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            text = ','.join(f'{key}="{_escape(label)}"' for key, label in labels)
+            lines.append(f'{name}{{{text}}} {_format_value(value)}')
+
+    def _render_disks(self, lines, mounts, devices):
+        """Заполненность каждого раздела и I/O каждого устройства"""
+        for suffix, help_text, field in (
+                ('size_bytes', "Filesystem size.", 'total'),
+                ('used_bytes', "Used filesystem space.", 'used'),
+                ('free_bytes', "Free filesystem space.", 'free')):
+            self._render_family(lines, f'pcmonitor_filesystem_{suffix}', help_text, [
+                ((('mountpoint', mount.mountpoint), ('device', mount.device),
+                  ('fstype', mount.fstype)), getattr(mount, field))
+                for mount in mounts])
+        for suffix, help_text, field in (
+                ('read_bytes', "Bytes read per second.", 'read_bytes'),
+                ('write_bytes', "Bytes written per second.", 'write_bytes'),
+                ('reads', "Read operations per second.", 'read_iops'),
+                ('writes', "Write operations per second.", 'write_iops')):
+            self._render_family(lines, f'pcmonitor_disk_{suffix}_per_second', help_text, [
+                ((('device', device.name),), getattr(device, field)) for device in devices])
+
+    def _render_gpu_processes(self, lines, processes):
+        """Память и загрузка SM самых тяжелых процессов на GPU"""
+        for suffix, help_text, field in (
+                ('memory_bytes', "GPU memory used by a process.", 'memory'),
+                ('sm_percent', "SM utilisation of a process (nvidia-smi pmon).", 'sm')):
+            self._render_family(lines, f'pcmonitor_gpu_process_{suffix}', help_text, [
+                ((('pid', proc.pid), ('name', proc.name)), getattr(proc, field))
+                for proc in processes if getattr(proc, field) is not None])
+
+    def _render_interfaces(self, lines, interfaces):
+        """Метрики по сетевым интерфейсам: одна семья - много меток device"""
+        families = (
+            ('transmit_bytes', "Bytes sent per second.", 'sent'),
+            ('receive_bytes', "Bytes received per second.", 'recv'),
+            ('transmit_packets', "Packets sent per second.", 'packets_sent'),
+            ('receive_packets', "Packets received per second.", 'packets_recv'),
+            ('errors', "Receive and transmit errors per second.", 'errors'),
+            ('drops', "Dropped packets per second.", 'drops'),
+        )
+        for suffix, help_text, field in families:
+            self._render_family(lines, f'pcmonitor_network_interface_{suffix}_per_second', help_text, [
+                ((('device', nic.name),), getattr(nic, field)) for nic in interfaces])
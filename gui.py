@@ -0,0 +1,975 @@
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from collectors import MetricsCollector, is_loopback
+from inventory import report_startup, since_process_start
+from recording import ReplayCollector
+from theme import COLORS, format_bytes, format_rate, metric_card
+
+
+# Карточка -> источники сборщика, из которых берется ее значение
+STALE_SOURCES = {
+    'cpu': ('cpu',),
+    'gpu': ('gpu',),
+    'mem': ('memory',),
+    'disk': ('disk', 'disk_io'),
+}
+
+# Панели окна; у processes и gpu_processes свои источники в сборщике
+PANELS = frozenset({'cards', 'chart', 'details', 'network', 'processes', 'gpu_processes',
+                    'alerts', 'debug'})
+
+# Опрос снимков, пока окно не видно: перерисовывать все равно нечего
+HIDDEN_POLL_MS = 1000
+
+
+class ChartRenderer:
+    """График в retained-режиме.
+
+    Сетка и линии создаются на Canvas один раз, а на каждом тике у
+    существующих элементов меняются только координаты через coords().
+    X-координаты считаются заранее и кэшируются по ширине Canvas и числу
+    точек; пересчет геометрии происходит только по событию <Configure>.
+    """
+
+    def __init__(self, canvas, line_colors, padding=20, grid_color='#404040'):
+        self.canvas = canvas
+        self.padding = padding
+        self.width = 0
+        self.height = 0
+        
+        # Сетка: линии на 0, 25, 50, 75 и 100%
+        self.grid_items = [canvas.create_line(0, 0, 0, 0, fill=grid_color, dash=(2, 2))
+                           for _ in range(0, 101, 25)]
+        self.line_items = [canvas.create_line(0, 0, 0, 0, fill=color, smooth=True, width=2)
+                           for color in line_colors]
+        
+        self._coords_cache = {}  # число точек -> плоский список [x0, y0, x1, y1, ...]
+        self._last_data = None
+        canvas.bind('<Configure>', self.on_resize)
+        
+    def on_resize(self, event):
+        if (event.width, event.height) == (self.width, self.height):
+            return
+        self.width = event.width
+        self.height = event.height
+        self._coords_cache.clear()
+        
+        padding = self.padding
+        chart_height = self.height - padding * 2
+        for item, i in zip(self.grid_items, range(0, 101, 25)):
+            y = padding + (chart_height * (100 - i) / 100)
+            self.canvas.coords(item, padding, y, self.width - padding, y)
+            
+        if self._last_data is not None:
+            self.draw(self._last_data)
+            
+    def _coords_buffer(self, count):
+        """Плоский буфер координат с уже заполненными X для count точек"""
+        coords = self._coords_cache.get(count)
+        if coords is None:
+            chart_width = self.width - self.padding * 2
+            coords = [0.0] * (count * 2)
+            coords[0::2] = [self.padding + i * chart_width / (count - 1) for i in range(count)]
+            self._coords_cache[count] = coords
+        return coords
+        
+    def draw(self, datasets):
+        """datasets - последовательности значений 0..100, по одной на линию"""
+        self._last_data = datasets
+        if self.width <= 1:
+            return
+            
+        chart_height = self.height - self.padding * 2
+        base = self.padding + chart_height
+        scale = chart_height / 100
+        
+        for item, data in zip(self.line_items, datasets):
+            count = len(data)
+            if count < 2:
+                self.canvas.coords(item, 0, 0, 0, 0)
+                continue
+            coords = self._coords_buffer(count)
+            coords[1::2] = [base - value * scale for value in data]
+            self.canvas.coords(item, coords)
+
+
+def heat_palette(stops, steps=101):
+    """Цвета #rrggbb для загрузки 0..100% по линейному градиенту через stops"""
+    rgb = [tuple(int(color[i:i + 2], 16) for i in (1, 3, 5)) for color in stops]
+    palette = []
+    for step in range(steps):
+        position = step / (steps - 1) * (len(rgb) - 1)
+        index = min(int(position), len(rgb) - 2)
+        t = position - index
+        palette.append('#%02x%02x%02x' % tuple(
+            round(a + (b - a) * t) for a, b in zip(rgb[index], rgb[index + 1])))
+    return palette
+
+
+class CoreHeatmap:
+    """Тепловая карта загрузки по ядрам: столбец на ядро, строка на тик.
+
+    Вся карта - одна PhotoImage, которая используется как кольцевой буфер
+    строк: за кадр делается один put() новой строки, а прокрутку дают две
+    картинки на Canvas, сдвинутые на номер текущей строки. Число элементов
+    Tk не зависит от числа ядер, поэтому 256 ядер рисуются так же дешево,
+    как 8.
+    """
+
+    def __init__(self, canvas, rows=60, stops=('#203040', '#4ecdc4', '#feca57', '#ff6b6b')):
+        self.canvas = canvas
+        self.rows = rows
+        self.palette = heat_palette(stops)
+        self.width = 0
+        self.cores = 0
+        self.cell = 1
+        self.image = None
+        self.items = ()
+        self.head = -1  # строка с последним тиком
+        self._cells = None
+        canvas.bind('<Configure>', self.on_resize)
+
+    def on_resize(self, event):
+        if event.width != self.width:
+            self.width = event.width
+            self.cores = 0  # пересоздать картинку под новую ширину
+
+    def _rebuild(self, cores):
+        self.cores = cores
+        self.cell = max(1, self.width // cores)
+        # Готовые куски строки: цвет, повторенный на ширину ячейки
+        self._cells = [' '.join([color] * self.cell) for color in self.palette]
+        self.canvas.delete('heatmap')
+        self.image = tk.PhotoImage(width=self.cell * cores, height=self.rows)
+        self.image.put(self.palette[0], to=(0, 0, self.cell * cores, self.rows))
+        self.items = tuple(self.canvas.create_image(0, 0, image=self.image, anchor='nw', tags='heatmap')
+                           for _ in range(2))
+        self.head = -1
+
+    def push(self, per_core):
+        """Добавляем строку с загрузкой ядер (0..100)"""
+        if not per_core or self.width <= 1:
+            return
+        if len(per_core) != self.cores:
+            self._rebuild(len(per_core))
+            
+        cells = self._cells
+        row = ' '.join([cells[min(100, max(0, int(value)))] for value in per_core])
+        self.head = (self.head + 1) % self.rows
+        self.image.put('{' + row + '}', to=(0, self.head))
+        
+        # Старые строки сверху, новая - внизу
+        top = -(self.head + 1)
+        self.canvas.coords(self.items[0], 0, top)
+        self.canvas.coords(self.items[1], 0, top + self.rows)
+
+
+class ModernSystemMonitor:
+    def __init__(self, interval=1.0, collector=None):
+        self.root = tk.Tk()
+        self.root.title("System Monitor")
+        self.root.configure(bg='#1a1a1a')
+        self.root.attributes('-topmost', True)
+        self.root.overrideredirect(True)
+        self.root.attributes('-alpha', 0.95)
+        
+        self.colors = COLORS
+        
+        # Последний текст каждой метки: config() зовем, только если он изменился
+        self._texts = {}
+        
+        self.setup_ui()
+        self.setup_dragging()
+        self.setup_data_structures()
+        
+        # Сборщик метрик работает в своем потоке, UI только забирает снимки
+        self.collector = collector or MetricsCollector(interval)
+        
+        # Оповещения: рамка карточки и журнал событий
+        self.alerts = getattr(self.collector, 'alerts', None)
+        if self.alerts is not None:
+            self.setup_alert_panel()
+        
+        # Отладочная полоса - только если включено профилирование
+        self.profiler = self.collector.profiler
+        if self.profiler is not None:
+            self.setup_debug_strip()
+        
+        # Воспроизведение записи вместо живого сбора
+        self.replay = self.collector if isinstance(self.collector, ReplayCollector) else None
+        if self.replay is not None:
+            self.setup_replay_bar()
+        
+        # Сведения о железе из кэша рисуем сразу, не дожидаясь первого снимка
+        inventory = getattr(self.collector, 'inventory', None)
+        if inventory is not None:
+            self.paint_inventory(inventory)
+        
+        # Свернутое или скрытое окно не перерисовывается, а его источники не опрашиваются
+        self.setup_visibility()
+        
+        # Время старта меряем до первого кадра без "probing" (не для записи)
+        self.startup_pending = self.replay is None
+        self.first_frame = None
+        
+        # Запускаем сбор; GPU проверяется в фоне, окно сразу показывает "probing"
+        self.collector.start()
+        self.collector.probe_gpus_async()
+        
+    def setup_data_structures(self):
+        # История для графиков приходит вместе со снимком
+        self.cpu_history = (0,) * 60
+        self.gpu_history = (0,) * 60
+        self.mem_history = (0,) * 60
+        
+        # Номер последнего отрисованного снимка
+        self.last_seq = 0
+        self.last_snapshot = None
+        self.poll_interval_ms = 100
+        
+    def setup_ui(self):
+        self.window_height = 860
+        
+        # Главный контейнер
+        main_container = tk.Frame(self.root, bg=self.colors['bg'], padx=15, pady=15)
+        main_container.pack(fill='both', expand=True)
+        self.main_container = main_container
+        
+        # Хедер с кнопками
+        self.create_header(main_container)
+        
+        # Основные метрики в одну строку
+        metrics_frame = tk.Frame(main_container, bg=self.colors['bg'])
+        metrics_frame.pack(fill='x', pady=(0, 15))
+        
+        # Цвета значений карточек: устаревшее значение становится серым
+        self.card_colors = {}
+        
+        # CPU Card
+        self.cpu_card = self.create_metric_card(metrics_frame, "💻 CPU", "0%", self.colors['cpu_color'])
+        self.cpu_card.pack(side='left', padx=(0, 10))
+        
+        # GPU Card  
+        self.gpu_card = self.create_metric_card(metrics_frame, "🎮 GPU", "0%", self.colors['gpu_color'])
+        self.gpu_card.pack(side='left', padx=(0, 10))
+        
+        # Memory Card
+        self.mem_card = self.create_metric_card(metrics_frame, "💾 RAM", "0%", self.colors['mem_color'])
+        self.mem_card.pack(side='left', padx=(0, 10))
+        
+        # Disk Card
+        self.disk_card = self.create_metric_card(metrics_frame, "💽 DISK", "0%", self.colors['disk_color'])
+        self.disk_card.pack(side='left')
+        
+        self.card_value_labels = {'cpu': self.cpu_value_label, 'gpu': self.gpu_value_label,
+                                  'mem': self.mem_value_label, 'disk': self.disk_value_label}
+        self.stale_cards = set()
+        
+        # Статус GPU
+        self.gpu_status_label = tk.Label(metrics_frame, text="", font=('Segoe UI', 7),
+                                        fg=self.colors['text_secondary'], bg=self.colors['bg'])
+        self.gpu_status_label.pack(side='bottom', pady=(5, 0))
+        
+        # Графики
+        self.setup_charts(main_container)
+        
+        # Детальная информация
+        self.setup_detailed_info(main_container)
+        
+        # Сетевой монитор
+        self.setup_network_monitor(main_container)
+        
+        # Самые активные процессы
+        self.setup_process_panel(main_container)
+        
+        # Процессы на GPU (память и SM по данным nvidia-smi)
+        self.setup_gpu_process_panel(main_container)
+        
+    def create_header(self, parent):
+        header_frame = tk.Frame(parent, bg=self.colors['bg'])
+        header_frame.pack(fill='x', pady=(0, 15))
+        
+        # Заголовок
+        title_label = tk.Label(header_frame, text="SYSTEM DASHBOARD", 
+                              font=('Segoe UI', 12, 'bold'),
+                              fg=self.colors['accent'],
+                              bg=self.colors['bg'])
+        title_label.pack(side='left')
+        
+        # Кнопки управления
+        btn_frame = tk.Frame(header_frame, bg=self.colors['bg'])
+        btn_frame.pack(side='right')
+        
+        self.create_modern_button(btn_frame, "−", self.toggle_minimize).pack(side='left', padx=2)
+        self.create_modern_button(btn_frame, "↻", self.restart_monitor).pack(side='left', padx=2)
+        self.create_modern_button(btn_frame, "✕", self.root.quit).pack(side='left', padx=2)
+        
+    def create_modern_button(self, parent, text, command):
+        return tk.Button(parent, text=text, command=command,
+                        font=('Segoe UI', 9, 'bold'),
+                        fg=self.colors['text_primary'],
+                        bg='#404040',
+                        activebackground='#505050',
+                        activeforeground=self.colors['text_primary'],
+                        border=0,
+                        width=3,
+                        height=1,
+                        cursor='hand2')
+        
+    def create_metric_card(self, parent, title, value, color):
+        card, value_label = metric_card(parent, title, value, color)
+        
+        # Сохраняем ссылку на label значения
+        self.card_colors[value_label] = color
+        if "CPU" in title:
+            self.cpu_value_label = value_label
+        elif "GPU" in title:
+            self.gpu_value_label = value_label
+        elif "RAM" in title:
+            self.mem_value_label = value_label
+        elif "DISK" in title:
+            self.disk_value_label = value_label
+            
+        return card
+        
+    def setup_charts(self, parent):
+        charts_frame = tk.Frame(parent, bg=self.colors['bg'])
+        charts_frame.pack(fill='x', pady=(0, 15))
+        
+        # Создаем простой текстовый график
+        self.chart_canvas = tk.Canvas(charts_frame, bg=self.colors['card_bg'], 
+                                     height=80, highlightthickness=0)
+        self.chart_canvas.pack(fill='x')
+        self.chart = ChartRenderer(self.chart_canvas, [
+            self.colors['cpu_color'],
+            self.colors['gpu_color'],
+            self.colors['mem_color']
+        ])
+        
+        # Загрузка по ядрам
+        self.heatmap_canvas = tk.Canvas(charts_frame, bg=self.colors['card_bg'],
+                                        height=60, highlightthickness=0)
+        self.heatmap_canvas.pack(fill='x', pady=(5, 0))
+        self.heatmap = CoreHeatmap(self.heatmap_canvas, rows=60)
+        
+        # Легенда
+        legend_frame = tk.Frame(charts_frame, bg=self.colors['bg'])
+        legend_frame.pack(fill='x', pady=(5, 0))
+        
+        legends = [
+            ("CPU", self.colors['cpu_color']),
+            ("GPU", self.colors['gpu_color']), 
+            ("RAM", self.colors['mem_color'])
+        ]
+        
+        for text, color in legends:
+            legend_item = tk.Frame(legend_frame, bg=self.colors['bg'])
+            legend_item.pack(side='left', padx=(0, 15))
+            
+            tk.Label(legend_item, text="■", fg=color, 
+                    bg=self.colors['bg'], font=('Arial', 10)).pack(side='left')
+            tk.Label(legend_item, text=text, fg=self.colors['text_secondary'],
+                    bg=self.colors['bg'], font=('Segoe UI', 8)).pack(side='left', padx=(2, 0))
+        
+    def setup_detailed_info(self, parent):
+        details_frame = tk.Frame(parent, bg=self.colors['bg'])
+        details_frame.pack(fill='x', pady=(0, 15))
+        
+        # Левая колонка - CPU и GPU детали
+        left_column = tk.Frame(details_frame, bg=self.colors['bg'])
+        left_column.pack(side='left', fill='x', expand=True)
+        
+        # CPU детали
+        cpu_details = tk.Frame(left_column, bg=self.colors['card_bg'], padx=10, pady=8)
+        cpu_details.pack(fill='x', pady=(0, 8))
+        
+        tk.Label(cpu_details, text="CPU Details", 
+                font=('Segoe UI', 9, 'bold'),
+                fg=self.colors['text_primary'],
+                bg=self.colors['card_bg']).pack(anchor='w')
+        
+        self.cpu_freq_label = self.create_detail_row(cpu_details, "Frequency:", "0 GHz")
+        self.cpu_cores_label = self.create_detail_row(cpu_details, "Cores:", "0")
+        self.cpu_core_freq_label = self.create_detail_row(cpu_details, "Per-core:", "N/A")
+        self.cpu_temp_label = self.create_detail_row(cpu_details, "Temperature:", "N/A")
+        
+        # GPU детали
+        gpu_details = tk.Frame(left_column, bg=self.colors['card_bg'], padx=10, pady=8)
+        gpu_details.pack(fill='x')
+        
+        tk.Label(gpu_details, text="GPU Details", 
+                font=('Segoe UI', 9, 'bold'),
+                fg=self.colors['text_primary'],
+                bg=self.colors['card_bg']).pack(anchor='w')
+        
+        self.gpu_mem_label = self.create_detail_row(gpu_details, "Memory:", "0%")
+        self.gpu_temp_label = self.create_detail_row(gpu_details, "Temperature:", "N/A")
+        self.gpu_process_label = self.create_detail_row(gpu_details, "Processes:", "0")
+        
+        # Правая колонка - Память и Диск
+        right_column = tk.Frame(details_frame, bg=self.colors['bg'])
+        right_column.pack(side='right', fill='x', expand=True, padx=(10, 0))
+        
+        # Память детали
+        mem_details = tk.Frame(right_column, bg=self.colors['card_bg'], padx=10, pady=8)
+        mem_details.pack(fill='x', pady=(0, 8))
+        
+        tk.Label(mem_details, text="Memory Details", 
+                font=('Segoe UI', 9, 'bold'),
+                fg=self.colors['text_primary'],
+                bg=self.colors['card_bg']).pack(anchor='w')
+        
+        self.mem_used_label = self.create_detail_row(mem_details, "Used:", "0 GB")
+        self.mem_available_label = self.create_detail_row(mem_details, "Available:", "0 GB")
+        self.mem_total_label = self.create_detail_row(mem_details, "Total:", "0 GB")
+        
+        # Диск детали
+        disk_details = tk.Frame(right_column, bg=self.colors['card_bg'], padx=10, pady=8)
+        disk_details.pack(fill='x')
+        
+        self.disk_title_label = tk.Label(disk_details, text="Disk Details", 
+                font=('Segoe UI', 9, 'bold'),
+                fg=self.colors['text_primary'],
+                bg=self.colors['card_bg'])
+        self.disk_title_label.pack(anchor='w')
+        
+        self.disk_used_label = self.create_detail_row(disk_details, "Used:", "0 GB")
+        self.disk_free_label = self.create_detail_row(disk_details, "Free:", "0 GB")
+        self.disk_total_label = self.create_detail_row(disk_details, "Total:", "0 GB")
+        self.disk_io_label = self.create_detail_row(disk_details, "I/O:", "0 B/s")
+        self.disk_iops_label = self.create_detail_row(disk_details, "IOPS:", "0")
+        
+        # Остальные разделы одной строкой
+        self.disk_mounts_label = tk.Label(disk_details, text="", font=('Segoe UI', 7),
+                                          fg=self.colors['text_secondary'],
+                                          bg=self.colors['card_bg'],
+                                          justify='left', wraplength=160)
+        self.disk_mounts_label.pack(anchor='w')
+        
+    def create_detail_row(self, parent, label, value):
+        frame = tk.Frame(parent, bg=self.colors['card_bg'])
+        frame.pack(fill='x', pady=2)
+        
+        tk.Label(frame, text=label, font=('Segoe UI', 8),
+                fg=self.colors['text_secondary'],
+                bg=self.colors['card_bg']).pack(side='left')
+        
+        value_label = tk.Label(frame, text=value, font=('Segoe UI', 8, 'bold'),
+                             fg=self.colors['text_primary'],
+                             bg=self.colors['card_bg'])
+        value_label.pack(side='right')
+        
+        return value_label
+        
+    def setup_network_monitor(self, parent):
+        net_frame = tk.Frame(parent, bg=self.colors['card_bg'], padx=10, pady=8)
+        net_frame.pack(fill='x')
+        
+        tk.Label(net_frame, text="🌐 Network", 
+                font=('Segoe UI', 9, 'bold'),
+                fg=self.colors['text_primary'],
+                bg=self.colors['card_bg']).pack(anchor='w')
+        
+        net_stats_frame = tk.Frame(net_frame, bg=self.colors['card_bg'])
+        net_stats_frame.pack(fill='x', pady=5)
+        
+        # Upload
+        upload_frame = tk.Frame(net_stats_frame, bg=self.colors['card_bg'])
+        upload_frame.pack(side='left', expand=True)
+        
+        tk.Label(upload_frame, text="▲ Upload", font=('Segoe UI', 8),
+                fg=self.colors['text_secondary'], bg=self.colors['card_bg']).pack()
+        self.net_upload_label = tk.Label(upload_frame, text="0 B/s", 
+                                       font=('Segoe UI', 10, 'bold'),
+                                       fg=self.colors['net_color'],
+                                       bg=self.colors['card_bg'])
+        self.net_upload_label.pack()
+        
+        # Download
+        download_frame = tk.Frame(net_stats_frame, bg=self.colors['card_bg'])
+        download_frame.pack(side='right', expand=True)
+        
+        tk.Label(download_frame, text="▼ Download", font=('Segoe UI', 8),
+                fg=self.colors['text_secondary'], bg=self.colors['card_bg']).pack()
+        self.net_download_label = tk.Label(download_frame, text="0 B/s", 
+                                         font=('Segoe UI', 10, 'bold'),
+                                         fg=self.colors['net_color'],
+                                         bg=self.colors['card_bg'])
+        self.net_download_label.pack()
+        
+        # Самый загруженный интерфейс: пакеты, ошибки, потери
+        self.net_detail_label = tk.Label(net_frame, text="", font=('Segoe UI', 7),
+                                         fg=self.colors['text_secondary'],
+                                         bg=self.colors['card_bg'])
+        self.net_detail_label.pack(anchor='w')
+        
+    def setup_process_panel(self, parent):
+        proc_frame = tk.Frame(parent, bg=self.colors['card_bg'], padx=10, pady=8)
+        proc_frame.pack(fill='x', pady=(15, 0))
+        
+        header = tk.Frame(proc_frame, bg=self.colors['card_bg'])
+        header.pack(fill='x')
+        tk.Label(header, text="📋 Top Processes",
+                font=('Segoe UI', 9, 'bold'),
+                fg=self.colors['text_primary'],
+                bg=self.colors['card_bg']).pack(side='left')
+        
+        # Переключатель сортировки
+        self.process_sort = 'by_cpu'
+        self.process_sort_buttons = {}
+        for key, text in (('by_io', "I/O"), ('by_rss', "RAM"), ('by_cpu', "CPU")):
+            button = tk.Button(header, text=text, command=lambda key=key: self.set_process_sort(key),
+                               font=('Segoe UI', 7), fg=self.colors['text_primary'],
+                               bg='#404040', activebackground='#505050', border=0, padx=4)
+            button.pack(side='right', padx=1)
+            self.process_sort_buttons[key] = button
+        self.highlight_process_sort()
+        
+        self.process_labels = []
+        for _ in range(5):
+            label = tk.Label(proc_frame, text="", font=('Consolas', 8), anchor='w',
+                             fg=self.colors['text_secondary'], bg=self.colors['card_bg'])
+            label.pack(fill='x')
+            self.process_labels.append(label)
+            
+    def highlight_process_sort(self):
+        for key, button in self.process_sort_buttons.items():
+            active = key == self.process_sort
+            button.config(bg=self.colors['accent'] if active else '#404040',
+                          fg=self.colors['bg'] if active else self.colors['text_primary'])
+            
+    def set_process_sort(self, key):
+        self.process_sort = key
+        self.highlight_process_sort()
+        if self.last_snapshot is not None:
+            self.update_process_panel(self.last_snapshot.top_processes)
+            
+    def update_process_panel(self, ranking):
+        rows = getattr(ranking, self.process_sort)
+        for i, label in enumerate(self.process_labels):
+            if i < len(rows):
+                proc = rows[i]
+                self.set_text(label, f"{proc.name[:18]:<18} {proc.cpu:5.1f}% "
+                                     f"{format_bytes(proc.rss):>9} {format_rate(proc.io):>11}")
+            else:
+                self.set_text(label, "")
+        
+    def setup_gpu_process_panel(self, parent):
+        gpu_frame = tk.Frame(parent, bg=self.colors['card_bg'], padx=10, pady=8)
+        gpu_frame.pack(fill='x', pady=(15, 0))
+        tk.Label(gpu_frame, text="🎮 GPU Processes",
+                font=('Segoe UI', 9, 'bold'),
+                fg=self.colors['text_primary'],
+                bg=self.colors['card_bg']).pack(anchor='w')
+        
+        self.gpu_process_labels = []
+        for _ in range(3):
+            label = tk.Label(gpu_frame, text="", font=('Consolas', 8), anchor='w',
+                             fg=self.colors['text_secondary'], bg=self.colors['card_bg'])
+            label.pack(fill='x')
+            self.gpu_process_labels.append(label)
+        self.window_height += 90
+        
+    def update_gpu_process_panel(self, processes):
+        for i, label in enumerate(self.gpu_process_labels):
+            if i < len(processes):
+                proc = processes[i]
+                memory = format_bytes(proc.memory) if proc.memory is not None else "-"
+                sm = f"{proc.sm:.0f}%" if proc.sm is not None else "-"
+                self.set_text(label, f"{proc.name[:18]:<18} {proc.pid:>7} {memory:>9} SM {sm:>4}")
+            elif i == 0:
+                self.set_text(label, "no GPU processes")
+            else:
+                self.set_text(label, "")
+        
+    def setup_alert_panel(self):
+        alert_frame = tk.Frame(self.main_container, bg=self.colors['card_bg'], padx=10, pady=8)
+        alert_frame.pack(fill='x', pady=(15, 0))
+        tk.Label(alert_frame, text="🚨 Alerts",
+                font=('Segoe UI', 9, 'bold'),
+                fg=self.colors['text_primary'],
+                bg=self.colors['card_bg']).pack(anchor='w')
+        
+        self.alert_labels = []
+        for _ in range(3):
+            label = tk.Label(alert_frame, text="", font=('Consolas', 7), anchor='w',
+                             fg=self.colors['text_secondary'], bg=self.colors['card_bg'])
+            label.pack(fill='x')
+            self.alert_labels.append(label)
+        self.set_text(self.alert_labels[0], "no alerts")
+        
+        # Карточка, рамку которой подсвечивает оповещение по метрике
+        self.alert_cards = {'cpu': self.cpu_card, 'gpu': self.gpu_card,
+                            'mem': self.mem_card, 'disk': self.disk_card}
+        self.card_levels = {}
+        self.shown_alert_log = ()
+        self.window_height += 85
+        
+    def update_alerts(self):
+        """Рамки карточек и журнал; движок заменяет log целиком при каждом событии"""
+        log = self.alerts.log
+        if log is self.shown_alert_log:
+            return
+        self.shown_alert_log = log
+        
+        levels = {}
+        for metric, level in self.alerts.levels().items():
+            prefix = metric.split('_', 1)[0]
+            if prefix in self.alert_cards and levels.get(prefix) != 'critical':
+                levels[prefix] = level
+        for prefix, card in self.alert_cards.items():
+            level = levels.get(prefix)
+            if level != self.card_levels.get(prefix):
+                card.config(highlightbackground=self.colors[f'alert_{level}'] if level else '#404040',
+                            highlightthickness=2 if level else 1)
+        self.card_levels = levels
+        
+        events = list(reversed(log[-len(self.alert_labels):]))
+        for i, label in enumerate(self.alert_labels):
+            if i < len(events):
+                event = events[i]
+                moment = time.strftime('%H:%M:%S', time.localtime(event.timestamp))
+                if event.state == 'fired':
+                    self.set_text(label, f"{moment} 🚨 {event.rule.name}: {event.rule.describe()} "
+                                         f"({event.value:.1f})")
+                    label.config(fg=self.colors[f'alert_{event.rule.level}'])
+                else:
+                    self.set_text(label, f"{moment} ✅ {event.rule.name} cleared ({event.value:.1f})")
+                    label.config(fg=self.colors['text_secondary'])
+            else:
+                self.set_text(label, "")
+        
+    def setup_debug_strip(self):
+        """Полоса с ценой самого монитора; F12 - подробный отчет в консоль"""
+        self.debug_label = tk.Label(self.main_container, text="", font=('Consolas', 7), anchor='w',
+                                    fg=self.colors['text_secondary'], bg=self.colors['bg'])
+        self.debug_label.pack(fill='x', pady=(8, 0))
+        self.window_height += 25
+        self.root.bind('<F12>', lambda event: self.dump_profile())
+        
+    def dump_profile(self):
+        print(self.profiler.report())
+        
+    def setup_replay_bar(self):
+        """Полоса воспроизведения: клик - переход, ←/→ - минута, PgUp/PgDn - час,
+        ↑/↓ - скорость, пробел - пауза"""
+        bar = tk.Frame(self.main_container, bg=self.colors['bg'])
+        bar.pack(fill='x', pady=(8, 0))
+        self.replay_label = tk.Label(bar, text="", font=('Consolas', 7), anchor='w',
+                                     fg=self.colors['text_secondary'], bg=self.colors['bg'])
+        self.replay_label.pack(fill='x')
+        self.replay_canvas = tk.Canvas(bar, height=6, bg='#404040', highlightthickness=0)
+        self.replay_canvas.pack(fill='x', pady=(2, 0))
+        self.replay_progress = self.replay_canvas.create_rectangle(0, 0, 0, 6, width=0,
+                                                                   fill=self.colors['accent'])
+        self.replay_canvas.bind('<Button-1>', self.on_replay_click)
+        
+        replay = self.replay
+        for key, command in (('<Left>', lambda: replay.seek_relative(-60)),
+                             ('<Right>', lambda: replay.seek_relative(60)),
+                             ('<Prior>', lambda: replay.seek_relative(-3600)),
+                             ('<Next>', lambda: replay.seek_relative(3600)),
+                             ('<Up>', lambda: replay.change_speed(1)),
+                             ('<Down>', lambda: replay.change_speed(-1)),
+                             ('<space>', replay.toggle_pause)):
+            self.root.bind(key, lambda event, command=command: self.replay_command(command))
+        self.window_height += 30
+        
+    def replay_command(self, command):
+        command()
+        if self.last_snapshot is not None:
+            self.update_replay_bar(self.last_snapshot)
+        
+    def on_replay_click(self, event):
+        reader = self.replay.reader
+        fraction = event.x / max(self.replay_canvas.winfo_width(), 1)
+        self.replay.seek(reader.start + (reader.end - reader.start) * fraction)
+        
+    def update_replay_bar(self, snapshot):
+        replay = self.replay
+        reader = replay.reader
+        moment = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(snapshot.timestamp))
+        self.set_text(self.replay_label, f"{'⏸' if replay.paused else '⏵'} {moment} · {replay.speed:g}×")
+        fraction = (snapshot.timestamp - reader.start) / max(reader.end - reader.start, 1e-9)
+        self.replay_canvas.coords(self.replay_progress, 0, 0,
+                                  fraction * self.replay_canvas.winfo_width(), 6)
+        
+    def setup_dragging(self):
+        self.drag_data = {"x": 0, "y": 0}
+        self.root.bind('<Button-1>', self.start_drag)
+        self.root.bind('<B1-Motion>', self.on_drag)
+        
+    def start_drag(self, event):
+        self.drag_data["x"] = event.x
+        self.drag_data["y"] = event.y
+        
+    def on_drag(self, event):
+        x = self.root.winfo_x() + (event.x - self.drag_data["x"])
+        y = self.root.winfo_y() + (event.y - self.drag_data["y"])
+        self.root.geometry(f"+{x}+{y}")
+    
+    def setup_visibility(self):
+        self.minimized = False
+        self.unmapped = False
+        self.obscured = False
+        self.visible_panels = PANELS
+        self.root.bind('<Map>', self.on_map)
+        self.root.bind('<Unmap>', self.on_unmap)
+        self.root.bind('<Visibility>', self.on_visibility)
+        
+    def on_map(self, event):
+        # Привязка к root срабатывает и для дочерних виджетов - нужен только сам root
+        if event.widget is self.root:
+            self.unmapped = False
+            self.update_visibility()
+            
+    def on_unmap(self, event):
+        if event.widget is self.root:
+            self.unmapped = True
+            self.update_visibility()
+            
+    def on_visibility(self, event):
+        if event.widget is self.root:
+            self.obscured = str(event.state) == 'VisibilityFullyObscured'
+            self.update_visibility()
+    
+    def update_visibility(self):
+        """Какие панели видны; сборщику - какие источники нужны и можно ли реже"""
+        if self.minimized or self.unmapped or self.obscured:
+            # В свернутой полосе 400x80 остается только заголовок
+            visible = frozenset()
+        else:
+            visible = PANELS
+        hidden = self.minimized or self.unmapped
+        if self.replay is None:
+            self.collector.set_visibility(visible, low_power=hidden)
+        shown = visible - self.visible_panels
+        self.visible_panels = visible
+        self.poll_interval_ms = 100 if visible else HIDDEN_POLL_MS
+        # Вернувшиеся панели сразу догоняют последний снимок
+        if shown and self.last_snapshot is not None:
+            self.update_display(self.last_snapshot)
+    
+    def toggle_minimize(self):
+        current_height = self.root.winfo_height()
+        if current_height > 100:
+            self.root.geometry("400x80")
+            self.minimized = True
+        else:
+            self.root.geometry(f"400x{self.window_height}")
+            self.minimized = False
+        self.update_visibility()
+    
+    def restart_monitor(self):
+        """Перезапускает мониторинг GPU (проба идет в фоне, UI не замирает)"""
+        self.collector.probe_gpus_async()
+        print("🔄 Restarting GPU monitor...")
+    
+    def draw_simple_chart(self):
+        """Обновляем линии графика на Canvas"""
+        self.chart.draw((self.cpu_history, self.gpu_history, self.mem_history))
+    
+    def format_network_detail(self, interfaces):
+        external = [nic for nic in interfaces if not is_loopback(nic.name)]
+        if not external:
+            return ""
+        busiest = max(external, key=lambda nic: nic.sent + nic.recv)
+        text = (f"{busiest.name}: ▲ {busiest.packets_sent:.0f} ▼ {busiest.packets_recv:.0f} pkt/s"
+                f" · {len(external)} NIC")
+        errors = sum(nic.errors for nic in external)
+        drops = sum(nic.drops for nic in external)
+        if errors or drops:
+            text += f" · err {errors:.1f}/s · drop {drops:.1f}/s"
+        return text
+    
+    def format_gpu_status(self, vendor, count=1):
+        text = f"GPU: {vendor.upper()}"
+        if count > 1:
+            text += f" x{count}"
+        if vendor == "nvidia":
+            text += " ✅"
+        elif vendor == "fallback":
+            text += " ⚠️"
+        else:
+            text += " 🔄"
+        return text
+    
+    def paint_inventory(self, inventory):
+        """Неизменные до перезагрузки поля - из кэша, до первого снимка"""
+        self.set_text(self.cpu_cores_label, f"{inventory.cpu_cores} / {inventory.cpu_threads} threads")
+        self.set_text(self.gpu_status_label, self.format_gpu_status(inventory.gpu_vendor))
+        self.set_text(self.mem_total_label, f"{inventory.mem_total / (1024**3):.1f} GB")
+        if inventory.disks:
+            mountpoint, _, _, total = inventory.disks[0]
+            self.set_text(self.disk_title_label, f"Disk Details ({mountpoint})")
+            self.set_text(self.disk_total_label, f"{total / (1024**3):.1f} GB")
+        external = [name for name in inventory.nics if not is_loopback(name)]
+        if external:
+            self.set_text(self.net_detail_label, f"{len(external)} NIC")
+    
+    def report_startup(self, snapshot):
+        """Первый кадр и первый полный кадр (GPU уже определен) от запуска процесса"""
+        # Меряем нарисованный кадр, а не вызовы config()
+        self.root.update_idletasks()
+        if self.first_frame is None:
+            self.first_frame = since_process_start()
+        if snapshot.gpu_vendor != "probing":
+            self.startup_pending = False
+            report_startup(self.collector, f"First frame {self.first_frame * 1000:.0f} ms, "
+                                           f"full dashboard")
+    
+    def set_text(self, label, text):
+        # Tk перерисовывает метку на каждый config(), даже с тем же текстом
+        if self._texts.get(label) != text:
+            self._texts[label] = text
+            label.config(text=text)
+    
+    def update_stale(self, stale):
+        """Серое значение с возрастом у карточек, чей источник не успел к дедлайну"""
+        ages = dict(stale)
+        stale_cards = set()
+        for card, sources in STALE_SOURCES.items():
+            age = max((ages[source] for source in sources if source in ages), default=None)
+            label = self.card_value_labels[card]
+            if age is not None:
+                stale_cards.add(card)
+                self.set_text(label, f"{self._texts.get(label, '')} ⏳{age:.0f}s")
+                if card not in self.stale_cards:
+                    label.config(fg=self.colors['stale'])
+            elif card in self.stale_cards:
+                label.config(fg=self.card_colors[label])
+        self.stale_cards = stale_cards
+    
+    def update_display(self, snapshot):
+        """Применяем снимок к меткам и графику (только UI-поток)"""
+        visible = self.visible_panels
+        if not visible:
+            return
+        profiler = self.profiler
+        if profiler is not None:
+            started = time.perf_counter()
+        try:
+            # CPU данные
+            self.set_text(self.cpu_value_label, f"{snapshot.cpu_usage:.0f}%")
+            self.set_text(self.cpu_freq_label, f"{snapshot.cpu_freq/1000:.1f} GHz" if snapshot.cpu_freq else "N/A")
+            self.set_text(self.cpu_cores_label, f"{snapshot.cpu_cores} / {len(snapshot.cpu_per_core)} threads")
+            if snapshot.cpu_core_freqs:
+                self.set_text(self.cpu_core_freq_label, f"{min(snapshot.cpu_core_freqs)/1000:.1f}–"
+                                                        f"{max(snapshot.cpu_core_freqs)/1000:.1f} GHz")
+            else:
+                self.set_text(self.cpu_core_freq_label, "N/A")
+            self.heatmap.push(snapshot.cpu_per_core)
+            temperature = snapshot.cpu_temperature
+            self.set_text(self.cpu_temp_label, f"{temperature:.0f}°C" if temperature is not None else "N/A")
+            
+            # GPU данные
+            gpu_memory_percent = (snapshot.gpu_memory_used / snapshot.gpu_memory_total) * 100
+            
+            self.set_text(self.gpu_value_label, f"{snapshot.gpu_usage:.0f}%")
+            self.set_text(self.gpu_mem_label, f"{gpu_memory_percent:.1f}%")
+            self.set_text(self.gpu_temp_label, f"{snapshot.gpu_temperature:.1f}°C")
+            self.set_text(self.gpu_process_label, f"{snapshot.gpu_process_count}")
+            
+            # Обновляем статус GPU
+            self.set_text(self.gpu_status_label,
+                          self.format_gpu_status(snapshot.gpu_vendor, snapshot.gpu_count))
+            
+            # Память
+            memory_used_gb = snapshot.mem_used / (1024**3)
+            memory_available_gb = snapshot.mem_available / (1024**3)
+            memory_total_gb = snapshot.mem_total / (1024**3)
+            
+            self.set_text(self.mem_value_label, f"{snapshot.mem_percent:.0f}%")
+            self.set_text(self.mem_used_label, f"{memory_used_gb:.1f} GB")
+            self.set_text(self.mem_available_label, f"{memory_available_gb:.1f} GB")
+            self.set_text(self.mem_total_label, f"{memory_total_gb:.1f} GB")
+            
+            # Диск
+            disk = snapshot.disk
+            if disk is not None:
+                disk_used_gb = disk.used / (1024**3)
+                disk_free_gb = disk.free / (1024**3)
+                disk_total_gb = disk.total / (1024**3)
+                
+                self.set_text(self.disk_value_label, f"{disk.percent:.0f}%")
+                self.set_text(self.disk_title_label, f"Disk Details ({disk.mountpoint})")
+                self.set_text(self.disk_used_label, f"{disk_used_gb:.1f} GB")
+                self.set_text(self.disk_free_label, f"{disk_free_gb:.1f} GB")
+                self.set_text(self.disk_total_label, f"{disk_total_gb:.1f} GB")
+            else:
+                self.set_text(self.disk_value_label, "N/A")
+                self.set_text(self.disk_used_label, "N/A")
+                self.set_text(self.disk_free_label, "N/A")
+                self.set_text(self.disk_total_label, "N/A")
+                
+            self.set_text(self.disk_io_label, f"R {format_rate(snapshot.disk_read)}"
+                                              f" W {format_rate(snapshot.disk_write)}")
+            read_iops = sum(device.read_iops for device in snapshot.disk_io)
+            write_iops = sum(device.write_iops for device in snapshot.disk_io)
+            self.set_text(self.disk_iops_label, f"R {read_iops:.0f} W {write_iops:.0f}")
+            self.set_text(self.disk_mounts_label, " · ".join(
+                f"{mount.mountpoint} {mount.percent:.0f}%" for mount in snapshot.disks[1:]))
+            
+            # Значения, которые сборщик не успел обновить
+            if snapshot.stale or self.stale_cards:
+                self.update_stale(snapshot.stale)
+            
+            # Процессы
+            if 'processes' in visible:
+                self.update_process_panel(snapshot.top_processes)
+            if 'gpu_processes' in visible:
+                self.update_gpu_process_panel(snapshot.gpu_processes)
+            
+            # Оповещения
+            if self.alerts is not None:
+                self.update_alerts()
+            
+            # Сеть
+            self.set_text(self.net_upload_label, format_rate(snapshot.net_upload))
+            self.set_text(self.net_download_label, format_rate(snapshot.net_download))
+            self.set_text(self.net_detail_label, self.format_network_detail(snapshot.net_interfaces))
+            
+            # История для графиков
+            self.cpu_history = snapshot.cpu_history
+            self.gpu_history = snapshot.gpu_history
+            self.mem_history = snapshot.mem_history
+            
+            if profiler is not None:
+                drawn = time.perf_counter()
+                profiler.observe('labels', drawn - started)
+                
+            # Рисуем график
+            self.draw_simple_chart()
+            
+            if profiler is not None:
+                profiler.observe('chart', time.perf_counter() - drawn)
+                self.set_text(self.debug_label, profiler.summary())
+                
+        except Exception as e:
+            print(f"Update error: {e}")
+    
+    def poll_snapshot(self):
+        """Забираем последний снимок; промежуточные пропущенные снимки отбрасываются"""
+        snapshot = self.collector.latest
+        if snapshot is not None and snapshot.seq != self.last_seq:
+            self.last_seq = snapshot.seq
+            self.last_snapshot = snapshot
+            self.update_display(snapshot)
+            if self.replay is not None:
+                self.update_replay_bar(snapshot)
+            if self.startup_pending:
+                self.report_startup(snapshot)
+        self.root.after(self.poll_interval_ms, self.poll_snapshot)
+    
+    def run(self):
+        # Устанавливаем позицию
+        screen_width = self.root.winfo_screenwidth()
+        self.root.geometry(f"400x{self.window_height}+{screen_width - 420}+50")
+        
+        # Запускаем
+        self.root.after(100, self.draw_simple_chart)
+        self.root.after(self.poll_interval_ms, self.poll_snapshot)
+        self.root.mainloop()
+        self.collector.stop()
@@ -0,0 +1,145 @@
+"""Headless-режим: снимки метрик в NDJSON/CSV без tkinter"""
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+from collectors import RECORD_FIELDS
+from inventory import report_startup
+
+class StreamOutput:
+    """Вывод в бинарный поток (stdout); заголовок пишется один раз"""
+
+    def __init__(self, stream, header=b''):
+        self.stream = stream
+        self.header = header
+
+    def write(self, data):
+        if self.header:
+            data = self.header + data
+            self.header = b''
+        self.stream.write(data)
+        self.stream.flush()
+
+    def close(self):
+        pass
+
+
+class RotatingOutput:
+    """Файл с ротацией по размеру: out.ndjson -> out.ndjson.1 -> ... -> .N
+
+    Буферизация делается выше (SnapshotWriter), поэтому файл открыт без
+    собственного буфера: один write() - один системный вызов.
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=5, header=b''):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.header = header
+        self.file = open(path, 'ab', buffering=0)
+        self.size = self.file.tell()
+
+    def rotate(self):
+        self.file.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+            self.file = open(self.path, 'wb', buffering=0)
+        else:
+            self.file = open(self.path, 'wb', buffering=0)
+        self.size = 0
+
+    def write(self, data):
+        if self.max_bytes and self.size and self.size + len(data) > self.max_bytes:
+            self.rotate()
+        if self.size == 0 and self.header:
+            data = self.header + data
+        self.file.write(data)
+        self.size += len(data)
+
+    def close(self):
+        self.file.close()
+
+
+class SnapshotWriter:
+    """Копит строки в памяти и сбрасывает их в вывод раз в flush_interval секунд.
+
+    При 10 Гц это один write() в секунду вместо системного вызова на
+    каждую строку или поле.
+    """
+
+    def __init__(self, output, fmt='ndjson', flush_interval=1.0):
+        self.output = output
+        self.fmt = fmt
+        self.flush_interval = flush_interval
+        self._buffer = io.StringIO()
+        self._last_flush = time.monotonic()
+        if fmt == 'csv':
+            self._csv = csv.writer(self._buffer, lineterminator='\n')
+            output.header = (','.join(RECORD_FIELDS) + '\n').encode()
+
+    def write(self, snapshot):
+        record = snapshot.to_record()
+        if self.fmt == 'csv':
+            self._csv.writerow(record.values())
+        else:
+            self._buffer.write(json.dumps(record, separators=(',', ':')))
+            self._buffer.write('\n')
+            
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        data = self._buffer.getvalue()
+        if data:
+            self._buffer.seek(0)
+            self._buffer.truncate()
+            self.output.write(data.encode())
+
+
+def run_headless(args, collector):
+    """Цикл headless-режима; данные идут в stdout или файл, сообщения - в stderr"""
+    stdout = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.output:
+            output = RotatingOutput(args.output, args.max_bytes, args.backup_count)
+        else:
+            output = StreamOutput(stdout.buffer)
+        writer = SnapshotWriter(output, args.format, args.flush_interval)
+        # Без кэша проба блокирует: в записях с первой строки настоящий vendor.
+        # С кэшем vendor уже известен, и проверка идет в фоне
+        if collector.inventory is None:
+            collector.refresh_inventory()
+        else:
+            collector.probe_gpus_async()
+        
+        try:
+            count = 0
+            for _ in collector.ticks():
+                snapshot = collector.collect()
+                collector.publish(snapshot)
+                writer.write(snapshot)
+                count += 1
+                if count == 1:
+                    report_startup(collector, "First record")
+                if args.count is not None and count >= args.count:
+                    break
+            writer.flush()
+        except KeyboardInterrupt:
+            writer.flush()
+        except BrokenPipeError:
+            # Читатель (например, head) закрыл канал - глушим stdout,
+            # чтобы интерпретатор не ругался при выходе
+            os.dup2(os.open(os.devnull, os.O_WRONLY), stdout.fileno())
+        finally:
+            collector.stop()
+            output.close()
+    return 0
@@ -0,0 +1,174 @@
+"""Кэш сведений о железе между запусками.
+
+Что стоит на машине (GPU, ядра, объем памяти и дисков, сетевые карты), до
+перезагрузки почти никогда не меняется, а выяснять это на старте дорого:
+проба GPU запускает nvidia-smi/wmic. Поэтому найденное сохраняется в
+~/.cache/pcmonitor/inventory.json с ключом - идентификатором загрузки и
+отпечатком (hardware_fingerprint: модель CPU и MemTotal, два коротких
+чтения). При совпадении ключа запуск берет сведения из файла и сразу
+рисует полную панель. Остальное - диски, сетевые карты с MAC-адресами,
+PCI ID видеокарт и сама проба GPU - проверяется в фоне после первого
+кадра (MetricsCollector.probe_gpus_async): если в том же сеансе что-то
+подключили, сведения применяются и кэш перезаписывается.
+"""
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import platform
+import sys
+import time
+from collections import namedtuple
+
+import psutil
+
+FORMAT_VERSION = 3
+
+# disks - кортежи (mountpoint, device, fstype, total), основной раздел первым;
+# gpu_source - имя класса провайдера: у AMD и Intel их по два (sysfs и WMIC);
+# macs и gpu_ids нужны только для сверки в фоне (nic_macs, gpu_pci_ids)
+Inventory = namedtuple('Inventory', 'gpu_vendor gpu_source cpu_cores cpu_threads '
+                                    'mem_total disks nics macs gpu_ids')
+
+
+def default_path():
+    """Файл кэша: %LOCALAPPDATA% в Windows, $XDG_CACHE_HOME или ~/.cache в остальных"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'pcmonitor', 'inventory.json')
+
+
+def boot_id():
+    """Идентификатор текущей загрузки ОС (меняется при каждой перезагрузке)"""
+    try:
+        with open('/proc/sys/kernel/random/boot_id') as f:
+            return f.read().strip()
+    except OSError:
+        # Не Linux: время загрузки, с точностью до секунды
+        return str(int(psutil.boot_time()))
+
+
+def cpu_model():
+    """Модель процессора: 'model name' из /proc/cpuinfo или platform.processor()"""
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name.strip() == 'model name':
+                    return value.strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def mem_total():
+    """MemTotal в байтах: первая строка /proc/meminfo или psutil"""
+    try:
+        with open('/proc/meminfo', 'rb') as f:
+            return int(f.readline().split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        return psutil.virtual_memory().total
+
+
+def nic_macs():
+    """MAC-адреса сетевых карт"""
+    try:
+        addresses = psutil.net_if_addrs()
+    except OSError:
+        return []
+    # В Linux только интерфейсы с устройством: у veth и мостов контейнеров
+    # MAC новый при каждом запуске
+    physical = os.path.isdir('/sys/class/net')
+    return sorted(address.address for name, nic in addresses.items() for address in nic
+                  if address.family == psutil.AF_LINK and address.address
+                  and (not physical or os.path.exists(os.path.join('/sys/class/net', name, 'device'))))
+
+
+def gpu_pci_ids(sysfs_root='/sys'):
+    """vendor:device видеоадаптеров (PCI-класс 0x03xxxx) из sysfs"""
+    ids = []
+    for device in glob.glob(os.path.join(sysfs_root, 'bus', 'pci', 'devices', '*')):
+        try:
+            with open(os.path.join(device, 'class')) as f:
+                if not f.read().startswith('0x03'):
+                    continue
+            with open(os.path.join(device, 'vendor')) as f:
+                vendor = f.read().strip()
+            with open(os.path.join(device, 'device')) as f:
+                ids.append(f"{vendor}:{f.read().strip()}")
+        except OSError:
+            continue
+    return sorted(ids)
+
+
+def hardware_fingerprint():
+    """sha256 от модели CPU и объема памяти - то, что читается за пару вызовов.
+
+    Все, что дороже (диски, MAC-адреса, GPU), сверяется в фоне.
+    """
+    facts = {'cpu': cpu_model(), 'mem_total': mem_total()}
+    return hashlib.sha256(json.dumps(facts, sort_keys=True).encode()).hexdigest()
+
+
+def since_process_start():
+    """Сколько секунд прошло с запуска процесса (а не с импорта модулей)"""
+    try:
+        # В Linux create_time() psutil считается от btime с точностью до
+        # секунды; starttime из /proc/self/stat и CLOCK_BOOTTIME - одна шкала
+        with open('/proc/self/stat', 'rb') as f:
+            fields = f.read().rsplit(b')', 1)[1].split()
+        started = int(fields[19]) / os.sysconf('SC_CLK_TCK')
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - started
+    except (OSError, AttributeError, ValueError, IndexError):
+        return time.time() - psutil.Process().create_time()
+
+
+def report_startup(collector, label):
+    """Печатаем и запоминаем в сборщике время старта (для --metrics-port)"""
+    collector.startup_seconds = elapsed = since_process_start()
+    source = "cached inventory" if collector.inventory_cached else "cold probe"
+    print(f"⏱ {label} {elapsed * 1000:.0f} ms after process start ({source})")
+
+
+class InventoryCache:
+    """inventory.json: сведения о железе, действительные до перезагрузки или
+    до изменения отпечатка железа"""
+
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        self.key = {'boot_id': boot_id(), 'hardware': hardware_fingerprint()}
+
+    def load(self):
+        """Inventory из файла или None: файла нет, он битый, от другой загрузки
+        или другого железа"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != FORMAT_VERSION or data.get('key') != self.key:
+                return None
+            fields = data['inventory']
+            return Inventory(**dict(
+                fields,
+                disks=tuple(tuple(disk) for disk in fields['disks']),
+                nics=tuple(fields['nics']),
+                macs=tuple(fields['macs']),
+                gpu_ids=tuple(fields['gpu_ids'])))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, inventory):
+        """Запись через временный файл: читатель не увидит половину JSON"""
+        data = {'version': FORMAT_VERSION, 'key': self.key, 'inventory': inventory._asdict()}
+        temp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp, self.path)
+        except OSError as e:
+            print(f"Inventory cache error: {e}")
+            with contextlib.suppress(OSError):
+                os.remove(temp)
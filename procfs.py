@@ -0,0 +1,203 @@
+"""Быстрый путь для Linux: CPU, память, сеть и температура прямо из procfs/sysfs.
+
+psutil на каждый вызов открывает файл заново, читает и разбирает его
+целиком. Здесь файлы открываются один раз, перечитываются через
+os.preadv() с нулевого смещения в один и тот же буфер, а из текста
+достаются только нужные монитору поля. Результаты совместимы с тем,
+что сборщик берет из psutil, поэтому при недоступности procfs
+(не Linux, контейнер без /proc) сборщик просто остается на psutil.
+"""
+import glob
+import os
+import sys
+from collections import namedtuple
+
+# Те поля psutil.virtual_memory(), которыми пользуется монитор
+VirtualMemory = namedtuple('VirtualMemory', 'total available percent used free')
+
+# Датчики CPU в hwmon (по имени драйвера) и в thermal_zone (по типу зоны)
+CPU_HWMON_NAMES = ('coretemp', 'k10temp', 'zenpower', 'cpu_thermal', 'soc_thermal')
+CPU_THERMAL_TYPES = ('x86_pkg_temp', 'cpu-thermal', 'cpu_thermal', 'soc_thermal', 'acpitz')
+
+# Меньше стольких тиков (USER_HZ, обычно 100 в секунду) между вызовами
+# загрузка ядра не считается: пара тиков дает 0% или 100% без всякого смысла
+MIN_CPU_JIFFIES = 10
+
+
+class ProcFile:
+    """Открытый файл procfs/sysfs, который перечитывается в свой буфер"""
+
+    def __init__(self, path, size=4096):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY)
+        self.buffer = bytearray(size)
+
+    def read(self):
+        while True:
+            n = os.preadv(self.fd, [self.buffer], 0)
+            if n < len(self.buffer):
+                return bytes(memoryview(self.buffer)[:n])
+            # Файл не поместился (например, /proc/stat на сотнях ядер)
+            self.buffer = bytearray(len(self.buffer) * 2)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ProcfsBackend:
+    """CPU по ядрам, память и счетчики сети из /proc без psutil"""
+
+    def __init__(self, proc_root='/proc'):
+        self.stat = ProcFile(os.path.join(proc_root, 'stat'), 16384)
+        self.meminfo = ProcFile(os.path.join(proc_root, 'meminfo'))
+        self.net_dev = ProcFile(os.path.join(proc_root, 'net', 'dev'))
+        self._cpu_last = {}  # cpuN -> (всего, простой, последний процент)
+
+    @classmethod
+    def create(cls, proc_root='/proc'):
+        """Бэкенд или None, если procfs тут нет - тогда работаем через psutil"""
+        if not sys.platform.startswith('linux') or not hasattr(os, 'preadv'):
+            return None
+        try:
+            backend = cls(proc_root)
+            backend.cpu_percent()
+            backend.virtual_memory()
+            backend.net_io_counters()
+        except (OSError, ValueError, KeyError, IndexError):
+            return None
+        return backend
+
+    def close(self):
+        for file in (self.stat, self.meminfo, self.net_dev):
+            file.close()
+
+    def cpu_percent(self):
+        """Загрузка каждого логического процессора с прошлого вызова, %"""
+        result = []
+        for line in self.stat.read().split(b'\n'):
+            if not line.startswith(b'cpu'):
+                # Строки cpu идут первыми, дальше intr, ctxt и т.д.
+                if result:
+                    break
+                continue
+            fields = line.split()
+            name = fields[0]
+            if name == b'cpu':
+                continue
+            # user nice system idle iowait irq softirq steal [guest guest_nice]:
+            # guest уже входит в user, поэтому, как и psutil, берем первые 8
+            values = [int(value) for value in fields[1:9]]
+            total = sum(values)
+            idle = values[3] + values[4]
+            last = self._cpu_last.get(name)
+            if last is not None and 0 < total - last[0] < MIN_CPU_JIFFIES:
+                # Слишком мало тиков для честной доли (первый вызов сразу после
+                # create() или опрос чаще ~10 Гц) - повторяем прошлое значение,
+                # опорная точка остается прежней
+                result.append(last[2])
+                continue
+            if last is None or total <= last[0]:
+                percent = 0.0
+            else:
+                busy = 1 - (idle - last[1]) / (total - last[0])
+                percent = round(min(100.0, max(0.0, busy * 100)), 1)
+            self._cpu_last[name] = (total, idle, percent)
+            result.append(percent)
+        return result
+
+    def virtual_memory(self):
+        """Память в байтах: used = total - available, percent - от available.
+
+        Так считают новые psutil (проверено на 7.2). Старые psutil считали
+        used как total - free - buffers - cached, и с ними mem_used у двух
+        бэкендов расходится на объем кэша (percent совпадает).
+        """
+        wanted = {b'MemTotal:', b'MemFree:', b'MemAvailable:', b'Buffers:',
+                  b'Cached:', b'SReclaimable:'}
+        values = {}
+        for line in self.meminfo.read().split(b'\n'):
+            key, _, rest = line.partition(b' ')
+            if key in wanted:
+                values[key] = int(rest.split()[0]) * 1024  # kB
+                if len(values) == len(wanted):
+                    break
+        total = values[b'MemTotal:']
+        free = values[b'MemFree:']
+        cached = values.get(b'Cached:', 0) + values.get(b'SReclaimable:', 0)
+        buffers = values.get(b'Buffers:', 0)
+        # MemAvailable нет только в ядрах старше 3.14
+        available = values.get(b'MemAvailable:', free + buffers + cached)
+        used = total - available
+        percent = round((total - available) / total * 100, 1) if total else 0.0
+        return VirtualMemory(total, available, percent, used, free)
+
+    def net_io_counters(self):
+        """Счетчики по интерфейсам в порядке полей psutil.net_io_counters(pernic=True)"""
+        counters = {}
+        # Первые две строки - заголовок таблицы
+        for line in self.net_dev.read().split(b'\n')[2:]:
+            name, sep, rest = line.partition(b':')
+            if not sep:
+                continue
+            fields = rest.split()
+            # rx: bytes packets errs drop fifo frame compressed multicast, дальше tx
+            counters[name.strip().decode()] = (
+                int(fields[8]), int(fields[0]),    # bytes_sent, bytes_recv
+                int(fields[9]), int(fields[1]),    # packets_sent, packets_recv
+                int(fields[2]), int(fields[10]),   # errin, errout
+                int(fields[3]), int(fields[11]),   # dropin, dropout
+            )
+        return counters
+
+
+class CpuTemperature:
+    """Температура CPU из hwmon или thermal_zone; файл держится открытым"""
+
+    def __init__(self, sysfs_root='/sys'):
+        self.sysfs_root = sysfs_root
+        self.file = None
+        path = self.find()
+        if path is not None:
+            try:
+                self.file = ProcFile(path, 64)
+            except OSError:
+                pass
+
+    def _read_name(self, path):
+        try:
+            with open(path) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def find(self):
+        """Путь к temp*_input датчика CPU или None"""
+        hwmon = {}
+        for directory in glob.glob(os.path.join(self.sysfs_root, 'class', 'hwmon', 'hwmon*')):
+            hwmon[self._read_name(os.path.join(directory, 'name'))] = directory
+        for name in CPU_HWMON_NAMES:
+            # temp1 - весь пакет (coretemp) или Tctl (k10temp)
+            path = os.path.join(hwmon.get(name, ''), 'temp1_input')
+            if name in hwmon and os.path.exists(path):
+                return path
+
+        zones = {}
+        for directory in glob.glob(os.path.join(self.sysfs_root, 'class', 'thermal', 'thermal_zone*')):
+            zones.setdefault(self._read_name(os.path.join(directory, 'type')), directory)
+        for zone_type in CPU_THERMAL_TYPES:
+            if zone_type in zones:
+                return os.path.join(zones[zone_type], 'temp')
+        return None
+
+    @property
+    def available(self):
+        return self.file is not None
+
+    def read(self):
+        """Градусы Цельсия или None"""
+        if self.file is None:
+            return None
+        try:
+            return int(self.file.read()) / 1000
+        except (OSError, ValueError):
+            return None
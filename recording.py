@@ -0,0 +1,432 @@
+"""Запись снимков в компактный колоночный файл и воспроизведение записи.
+
+Формат (little-endian):
+    заголовок файла: b'PMREC', версия (B), число полей (H), и для каждого
+        поля длина имени (B), имя, масштаб (d); масштаб 0 - строковое поле
+    дальше чанки подряд: CHUNK (magic, строк, первый и последний timestamp,
+        длина данных, crc32) и данные чанка
+
+Каждое числовое значение хранится целым числом value * масштаб (например,
+загрузка CPU - в десятых процента, память - в МиБ). Внутри чанка колонки
+идут одна за другой; в колонке - zigzag-varint разности с предыдущим
+значением плюс 1, а 0 означает None. Строковые колонки - индексы в таблице
+строк чанка. При 1 Гц это ~40 байт на снимок, около 3 МБ в сутки.
+
+Чанк пишется раз в CHUNK_SECONDS (или CHUNK_ROWS строк), так что при
+падении теряется не больше минуты. Разреженный индекс - заголовки чанков:
+читатель обходит их по длинам, не разбирая данных, и для перехода к любому
+моменту декодирует только один чанк. Недописанный хвост после падения
+читатель игнорирует, а писатель при дозаписи обрезает.
+"""
+import itertools
+import os
+import struct
+import threading
+import zlib
+from bisect import bisect_left
+from collections import namedtuple
+
+from collectors import RECORD_FIELDS, MountUsage, NetworkSample, ProcessRanking, Snapshot
+from timeseries import TimeSeriesStore
+
+MAGIC = b'PMREC'
+VERSION = 1
+FILE_HEADER = struct.Struct('<5sBH')
+CHUNK = struct.Struct('<4sIddII')
+CHUNK_MAGIC = b'PMCK'
+
+CHUNK_SECONDS = 60
+CHUNK_ROWS = 600
+
+MIB = 1024 * 1024
+# Во сколько раз значение умножается перед округлением до целого
+RECORD_SCALES = {
+    'timestamp': 1000,  # мс
+    'cpu_usage': 10, 'cpu_freq': 1, 'cpu_cores': 1, 'cpu_temperature': 10,
+    'gpu_vendor': 0,
+    'gpu_usage': 10, 'gpu_memory_used': 1, 'gpu_memory_total': 1,
+    'gpu_temperature': 10, 'gpu_process_count': 1, 'gpu_count': 1,
+    'mem_percent': 10, 'mem_used': 1 / MIB, 'mem_available': 1 / MIB, 'mem_total': 1 / MIB,
+    'disk_percent': 10, 'disk_used': 1 / MIB, 'disk_free': 1 / MIB, 'disk_total': 1 / MIB,
+    'disk_read': 1 / 1024, 'disk_write': 1 / 1024,  # КиБ/с
+    'net_upload': 1 / 1024, 'net_download': 1 / 1024,
+}
+
+ChunkInfo = namedtuple('ChunkInfo', 'offset rows first last length crc')
+
+
+def write_varint(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def read_varint(data, pos):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def encode_chunk(fields, scales, rows):
+    """Колонки чанка; rows - список записей (словарей to_record)"""
+    out = bytearray()
+    strings = {}
+    for field in fields:
+        if scales[field] == 0:
+            for row in rows:
+                value = row.get(field)
+                if value is not None and value not in strings:
+                    strings[value] = len(strings)
+    out.append(len(strings))
+    for text in strings:
+        encoded = text.encode()[:255]
+        out.append(len(encoded))
+        out += encoded
+
+    for field in fields:
+        scale = scales[field]
+        previous = 0
+        for row in rows:
+            value = row.get(field)
+            if value is None:
+                out.append(0)
+            elif scale == 0:
+                write_varint(out, strings[value] + 1)
+            else:
+                q = round(value * scale)
+                delta = q - previous
+                previous = q
+                write_varint(out, (delta << 1 if delta >= 0 else (-delta << 1) - 1) + 1)
+    return bytes(out)
+
+
+def decode_chunk(fields, scales, data, rows):
+    """Обратно в список записей"""
+    pos = 1
+    strings = []
+    for _ in range(data[0]):
+        length = data[pos]
+        strings.append(data[pos + 1:pos + 1 + length].decode(errors='replace'))
+        pos += 1 + length
+
+    records = [{} for _ in range(rows)]
+    for field in fields:
+        scale = scales[field]
+        previous = 0
+        for record in records:
+            n, pos = read_varint(data, pos)
+            if n == 0:
+                record[field] = None
+            elif scale == 0:
+                record[field] = strings[n - 1]
+            else:
+                n -= 1
+                previous += -(n >> 1) - 1 if n & 1 else n >> 1
+                # Целые поля остаются целыми
+                record[field] = previous if scale == 1 else previous / scale
+    return records
+
+
+def read_header(f):
+    """(поля, масштабы) из заголовка файла"""
+    magic, version, count = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a pcmonitor recording")
+    fields = []
+    scales = {}
+    for _ in range(count):
+        name = f.read(f.read(1)[0]).decode()
+        scales[name], = struct.unpack('<d', f.read(8))
+        fields.append(name)
+    return tuple(fields), scales
+
+
+def scan_chunks(f):
+    """Индекс по заголовкам чанков (данные не читаются) и конец последнего целого чанка"""
+    chunks = []
+    end = f.tell()
+    size = os.fstat(f.fileno()).st_size
+    while end + CHUNK.size <= size:
+        f.seek(end)
+        magic, rows, first, last, length, crc = CHUNK.unpack(f.read(CHUNK.size))
+        if magic != CHUNK_MAGIC or end + CHUNK.size + length > size:
+            break
+        chunks.append(ChunkInfo(end + CHUNK.size, rows, first, last, length, crc))
+        end += CHUNK.size + length
+    return chunks, end
+
+
+class SnapshotRecorder:
+    """Подписчик сборщика: дописывает снимки в файл записи"""
+
+    def __init__(self, path, chunk_seconds=CHUNK_SECONDS, chunk_rows=CHUNK_ROWS):
+        self.path = path
+        self.chunk_seconds = chunk_seconds
+        self.chunk_rows = chunk_rows
+        self.fields = RECORD_FIELDS
+        self.scales = {field: RECORD_SCALES[field] for field in self.fields}
+        self.rows = []
+        self._lock = threading.Lock()
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self.file = open(path, 'r+b')
+            fields, scales = read_header(self.file)
+            if fields != self.fields or scales != self.scales:
+                self.file.close()
+                raise ValueError(f"{path} was recorded with different fields")
+            # Хвост недописанного чанка (после падения) отрезаем
+            _, end = scan_chunks(self.file)
+            self.file.truncate(end)
+            self.file.seek(end)
+        else:
+            self.file = open(path, 'wb')
+            header = bytearray(FILE_HEADER.pack(MAGIC, VERSION, len(self.fields)))
+            for field in self.fields:
+                name = field.encode()
+                header += bytes([len(name)]) + name + struct.pack('<d', self.scales[field])
+            self.file.write(header)
+            self.file.flush()
+        print(f"⏺ Recording to {path}")
+
+    def write(self, snapshot):
+        record = snapshot.to_record()
+        with self._lock:
+            self.rows.append(record)
+            if (len(self.rows) >= self.chunk_rows
+                    or record['timestamp'] - self.rows[0]['timestamp'] >= self.chunk_seconds):
+                self._flush()
+
+    def _flush(self):
+        if not self.rows:
+            return
+        data = encode_chunk(self.fields, self.scales, self.rows)
+        self.file.write(CHUNK.pack(CHUNK_MAGIC, len(self.rows), self.rows[0]['timestamp'],
+                                   self.rows[-1]['timestamp'], len(data), zlib.crc32(data)))
+        self.file.write(data)
+        self.file.flush()
+        self.rows = []
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self.file.close()
+
+
+class RecordingReader:
+    """Чтение записи с переходом к любому моменту через индекс чанков"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.fields, self.scales = read_header(self.file)
+        self.chunks, _ = scan_chunks(self.file)
+        self._lasts = [chunk.last for chunk in self.chunks]
+        if not self.chunks:
+            raise ValueError(f"{path} has no complete chunks")
+
+    @property
+    def start(self):
+        return self.chunks[0].first
+
+    @property
+    def end(self):
+        return self.chunks[-1].last
+
+    def read_chunk(self, index):
+        chunk = self.chunks[index]
+        self.file.seek(chunk.offset)
+        data = self.file.read(chunk.length)
+        if zlib.crc32(data) != chunk.crc:
+            raise ValueError(f"chunk {index} of {self.path} is corrupted")
+        return decode_chunk(self.fields, self.scales, data, chunk.rows)
+
+    def find(self, timestamp):
+        """Номер первого чанка, где есть записи не раньше timestamp"""
+        return bisect_left(self._lasts, timestamp)
+
+    def records(self, start=None):
+        """Записи по порядку, начиная с первой не раньше start"""
+        first = 0 if start is None else self.find(start)
+        for index in range(first, len(self.chunks)):
+            for record in self.read_chunk(index):
+                if start is None or record['timestamp'] >= start:
+                    yield record
+
+    def close(self):
+        self.file.close()
+
+
+# Ступени скорости воспроизведения
+REPLAY_SPEEDS = (1, 2, 5, 10, 20, 50, 100)
+# Дольше этого (секунды записи) между снимками не ждем - монитор был выключен
+MAX_GAP = 5.0
+CHART_SECONDS = 60
+
+
+class ReplayCollector:
+    """Вместо MetricsCollector: отдает снимки из записи с заданной скоростью.
+
+    Интерфейс тот же, что нужен окну (start, stop, latest, probe_gpus_async),
+    поэтому update_display и draw_simple_chart работают без изменений.
+    Переход, скорость и пауза вызываются из потока Tk и только будят поток
+    воспроизведения.
+    """
+
+    def __init__(self, path, speed=1.0, start=None):
+        self.reader = RecordingReader(path)
+        self.interval = 1.0
+        self.profiler = None
+        self.subscribers = []
+        self.speed = min(max(speed, REPLAY_SPEEDS[0]), REPLAY_SPEEDS[-1])
+        self.paused = False
+        self.position = self.reader.start if start is None else start
+        self._seek_to = self.position
+        self._records = iter(())
+        self._latest = None
+        self._seq = 0
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    @property
+    def latest(self):
+        return self._latest
+
+    def probe_gpus_async(self, timeout=5.0):
+        """GPU в записи уже известен - пробовать нечего"""
+
+    def seek(self, timestamp):
+        self._seek_to = min(max(timestamp, self.reader.start), self.reader.end)
+        self._wake.set()
+
+    def seek_relative(self, seconds):
+        self.seek(self.position + seconds)
+
+    def set_speed(self, speed):
+        self.speed = min(max(speed, REPLAY_SPEEDS[0]), REPLAY_SPEEDS[-1])
+        self._wake.set()
+
+    def change_speed(self, steps):
+        """На steps ступеней REPLAY_SPEEDS быстрее (или медленнее при steps < 0)"""
+        index = bisect_left(REPLAY_SPEEDS, self.speed) + steps
+        self.set_speed(REPLAY_SPEEDS[min(max(index, 0), len(REPLAY_SPEEDS) - 1)])
+
+    def toggle_pause(self):
+        self.paused = not self.paused
+        self._wake.set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self.reader.close()
+
+    def _open_at(self, target):
+        """Новая история графиков из последней минуты перед target"""
+        self.history = TimeSeriesStore(('cpu_usage', 'gpu_usage', 'mem_percent'),
+                                       tiers=((1, CHART_SECONDS * 2),))
+        records = self.reader.records(target - CHART_SECONDS)
+        self._records = iter(())
+        for record in records:
+            if record['timestamp'] >= target:
+                self._records = itertools.chain([record], records)
+                break
+            self._add_history(record)
+        self.position = target
+
+    def _add_history(self, record):
+        self.history.append(record['timestamp'],
+                            (record['cpu_usage'], record['gpu_usage'], record['mem_percent']))
+
+    def run(self):
+        previous = None
+        finished = False
+        while not self._stop.is_set():
+            if self._seek_to is not None:
+                target, self._seek_to = self._seek_to, None
+                self._open_at(target)
+                previous = None
+                finished = False
+                if self.paused:
+                    # На паузе показываем кадр, к которому перешли
+                    record = next(self._records, None)
+                    if record is not None:
+                        previous = record['timestamp']
+                        self._publish(record)
+            if self.paused or finished:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            record = next(self._records, None)
+            if record is None:
+                finished = True
+                print("⏹ Replay reached the end of the recording")
+                continue
+            if previous is not None:
+                delay = min(max(record['timestamp'] - previous, 0.0), MAX_GAP) / self.speed
+                if self._wake.wait(delay):
+                    self._wake.clear()
+                    if self._seek_to is not None or self._stop.is_set():
+                        continue
+            previous = record['timestamp']
+            self._publish(record)
+
+    def _publish(self, record):
+        self.position = record['timestamp']
+        self._add_history(record)
+        self._seq += 1
+        self._latest = self.make_snapshot(record)
+
+    def make_snapshot(self, record):
+        """Snapshot из записи; того, чего в записи нет, - пусто"""
+        disk = None
+        if record.get('disk_percent') is not None:
+            disk = MountUsage('recorded', '', '', record['disk_total'], record['disk_used'],
+                              record['disk_free'], record['disk_percent'])
+        network = NetworkSample(record['net_upload'] or 0.0, record['net_download'] or 0.0, ())
+        history = self.history
+        return Snapshot(
+            seq=self._seq,
+            timestamp=record['timestamp'],
+            collect_duration=0.0,
+            cpu_usage=record['cpu_usage'] or 0.0,
+            cpu_freq=record['cpu_freq'] or 0,
+            cpu_cores=record['cpu_cores'] or 0,
+            cpu_per_core=(),
+            cpu_core_freqs=(),
+            cpu_temperature=record['cpu_temperature'],
+            gpu_vendor=record['gpu_vendor'] or "unknown",
+            gpu_usage=record['gpu_usage'] or 0.0,
+            gpu_memory_used=record['gpu_memory_used'] or 0,
+            gpu_memory_total=record['gpu_memory_total'] or 1,
+            gpu_temperature=record['gpu_temperature'] or 0.0,
+            gpu_process_count=record['gpu_process_count'] or 0,
+            gpu_count=record['gpu_count'] or 1,
+            mem_percent=record['mem_percent'] or 0.0,
+            mem_used=record['mem_used'] or 0,
+            mem_available=record['mem_available'] or 0,
+            mem_total=record['mem_total'] or 1,
+            disk=disk,
+            disks=(disk,) if disk else (),
+            disk_read=record['disk_read'] or 0.0,
+            disk_write=record['disk_write'] or 0.0,
+            disk_io=(),
+            net_upload=network.sent,
+            net_download=network.recv,
+            net_interfaces=network.interfaces,
+            top_processes=ProcessRanking((), (), ()),
+            cpu_history=history.tail('cpu_usage', CHART_SECONDS),
+            gpu_history=history.tail('gpu_usage', CHART_SECONDS),
+            mem_history=history.tail('mem_percent', CHART_SECONDS),
+        )
@@ -0,0 +1,373 @@
+"""Агент и приемник для сводной панели по многим машинам.
+
+Агент (--agent HOST:PORT) отправляет каждый снимок одним компактным
+пакетом по UDP или TCP, приемник (dashboard.py) собирает пакеты от
+многих агентов. Модуль не зависит от tkinter и psutil.
+
+Пакет (little-endian):
+    magic (2s), версия (B), флаги (B), номер пакета (I), маска полей (I),
+    длина имени (B), имя хоста (utf-8), float32 для каждого бита маски
+
+Кодирование разностное: в пакет попадают только поля, которые изменились
+с прошлого пакета. Каждый KEYFRAME_INTERVAL-й пакет - опорный, со всеми
+полями. Приемник применяет разностный пакет, только если предыдущий дошел
+(номера идут подряд); после потери UDP-пакета ждет следующего опорного.
+По TCP перед каждым пакетом идет его длина (H).
+"""
+import math
+import selectors
+import socket
+import struct
+import threading
+import time
+
+MAGIC = b'PM'
+VERSION = 1
+FLAG_KEYFRAME = 1
+KEYFRAME_INTERVAL = 10
+DEFAULT_PORT = 9106
+
+# Хост без пакетов дольше этого (секунды) считается пропавшим: панель
+# показывает его серым, а его имя может занять агент с другого адреса
+STALE_AFTER = 5.0
+
+HEADER = struct.Struct('<2sBBIIB')
+FRAME = struct.Struct('<H')  # длина пакета в TCP-потоке
+
+# Числовые поля пакета; отсутствующее значение - NaN
+FIELDS = (
+    'cpu_usage', 'cpu_freq', 'cpu_temperature',
+    'gpu_usage', 'gpu_memory_used', 'gpu_memory_total', 'gpu_temperature',
+    'mem_percent', 'mem_used', 'mem_total',
+    'disk_percent', 'disk_read', 'disk_write',
+    'net_upload', 'net_download',
+)
+FLOAT = struct.Struct('<f')
+NAN = float('nan')
+
+
+def snapshot_values(snapshot):
+    """Значения FIELDS из снимка сборщика"""
+    disk = snapshot.disk
+    return {
+        'cpu_usage': snapshot.cpu_usage,
+        'cpu_freq': snapshot.cpu_freq,
+        'cpu_temperature': snapshot.cpu_temperature,
+        'gpu_usage': snapshot.gpu_usage,
+        'gpu_memory_used': snapshot.gpu_memory_used,
+        'gpu_memory_total': snapshot.gpu_memory_total,
+        'gpu_temperature': snapshot.gpu_temperature,
+        'mem_percent': snapshot.mem_percent,
+        'mem_used': snapshot.mem_used,
+        'mem_total': snapshot.mem_total,
+        'disk_percent': disk.percent if disk else None,
+        'disk_read': snapshot.disk_read,
+        'disk_write': snapshot.disk_write,
+        'net_upload': snapshot.net_upload,
+        'net_download': snapshot.net_download,
+    }
+
+
+def parse_address(text, default_port=DEFAULT_PORT):
+    """'host:port', 'host' или ':port' -> (host, port)"""
+    host, sep, port = text.rpartition(':')
+    if not sep:
+        return text, default_port
+    return host or '0.0.0.0', int(port)
+
+
+class SnapshotEncoder:
+    """Упаковывает значения в пакеты с разностным кодированием"""
+
+    def __init__(self, name, keyframe_interval=KEYFRAME_INTERVAL):
+        self.name = name.encode()[:255]
+        self.keyframe_interval = keyframe_interval
+        self.seq = 0
+        self._last = None  # float32-значения прошлого пакета
+
+    def force_keyframe(self):
+        """Следующий пакет - опорный (например, после переподключения TCP)"""
+        self._last = None
+
+    def encode(self, values):
+        current = []
+        for field in FIELDS:
+            value = values.get(field)
+            # Сравниваем уже округленные до float32 значения
+            current.append(FLOAT.unpack(FLOAT.pack(NAN if value is None else value))[0])
+
+        keyframe = self._last is None or self.seq % self.keyframe_interval == 0
+        mask = 0
+        payload = []
+        for i, value in enumerate(current):
+            last = self._last[i] if not keyframe else None
+            if keyframe or not (value == last or (math.isnan(value) and math.isnan(last))):
+                mask |= 1 << i
+                payload.append(value)
+        self._last = current
+
+        packet = HEADER.pack(MAGIC, VERSION, FLAG_KEYFRAME if keyframe else 0,
+                             self.seq, mask, len(self.name))
+        packet += self.name + struct.pack(f'<{len(payload)}f', *payload)
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        return packet
+
+
+class SnapshotDecoder:
+    """Восстанавливает значения по пакетам; состояние - отдельно на каждого агента.
+
+    Агент - пара (адрес отправителя, имя): у клонов ВМ или агентов с одним
+    --agent-name имена совпадают, и номера пакетов не должны смешиваться.
+    """
+
+    def __init__(self):
+        self._state = {}  # (адрес, имя) -> (номер пакета, список значений)
+        self.dropped = 0  # разностные пакеты без опорного
+
+    def forget(self, source, name):
+        """Забыть состояние агента (его соединение закрыто или имя занял другой)"""
+        self._state.pop((source, name), None)
+
+    def decode(self, packet, source=None):
+        """(имя хоста, словарь значений) или None, если пакет применить нельзя"""
+        magic, version, flags, seq, mask, name_length = HEADER.unpack_from(packet)
+        if magic != MAGIC or version != VERSION:
+            return None
+        offset = HEADER.size
+        name = packet[offset:offset + name_length].decode(errors='replace')
+        offset += name_length
+
+        key = (source, name)
+        state = self._state.get(key)
+        if flags & FLAG_KEYFRAME:
+            values = [NAN] * len(FIELDS)
+        elif state is not None and state[0] == (seq - 1) & 0xFFFFFFFF:
+            values = list(state[1])
+        else:
+            # Предыдущий пакет потерян - ждем опорного
+            self.dropped += 1
+            self._state.pop(key, None)
+            return None
+
+        count = bin(mask).count('1')
+        payload = struct.unpack_from(f'<{count}f', packet, offset)
+        index = 0
+        for i in range(len(FIELDS)):
+            if mask >> i & 1:
+                values[i] = payload[index]
+                index += 1
+        self._state[key] = (seq, values)
+        return name, {field: None if math.isnan(value) else value
+                      for field, value in zip(FIELDS, values)}
+
+
+class AgentSender:
+    """Подписчик сборщика: отправляет каждый снимок на панель"""
+
+    RECONNECT_DELAY = 5.0
+
+    def __init__(self, address, transport='udp', name=None):
+        self.address = address
+        self.transport = transport
+        self.encoder = SnapshotEncoder(name or socket.gethostname())
+        self._sock = None
+        self._retry_at = 0.0
+        if transport == 'udp':
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _connect(self):
+        """TCP-соединение; при неудаче следующая попытка не раньше чем через RECONNECT_DELAY"""
+        if time.monotonic() < self._retry_at:
+            return False
+        try:
+            sock = socket.create_connection(self.address, timeout=1.0)
+        except OSError:
+            self._retry_at = time.monotonic() + self.RECONNECT_DELAY
+            return False
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self.encoder.force_keyframe()
+        return True
+
+    def send(self, snapshot):
+        if self._sock is None and not self._connect():
+            return
+        packet = self.encoder.encode(snapshot_values(snapshot))
+        try:
+            if self.transport == 'udp':
+                self._sock.sendto(packet, self.address)
+            else:
+                self._sock.sendall(FRAME.pack(len(packet)) + packet)
+        except OSError:
+            # UDP-пакет просто теряется; TCP переподключится на следующем снимке
+            if self.transport == 'tcp':
+                self.close()
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+class HostState:
+    """Последние значения одного агента"""
+    __slots__ = ('name', 'address', 'values', 'updated', 'packets')
+
+    def __init__(self, name, address):
+        self.name = name
+        self.address = address
+        self.values = {}
+        self.updated = 0.0  # time.monotonic() последнего пакета
+        self.packets = 0
+
+
+class DashboardReceiver:
+    """Принимает пакеты агентов в своем потоке.
+
+    Разбор пакетов и обновление состояния хостов идут здесь, а не в
+    потоке Tk. Панель периодически забирает через take_dirty() имена
+    хостов, которые изменились с прошлой перерисовки, - сколько бы
+    пакетов ни пришло за это время, перерисовка одна.
+
+    Имя хоста принадлежит адресу, с которого оно пришло первым. Пакеты с
+    тем же именем с другого адреса отбрасываются (conflicts), пока хозяин
+    жив; замолчавшего дольше STALE_AFTER или закрывшего TCP-соединение
+    агента сменяет новый - так переживается перезапуск агента.
+    """
+
+    def __init__(self, host='0.0.0.0', port=DEFAULT_PORT, transport='udp'):
+        self.address = (host, port)
+        self.transport = transport
+        self.decoder = SnapshotDecoder()
+        self.hosts = {}  # имя -> HostState
+        self.packets = 0
+        self.conflicts = 0  # пакеты с чужим именем с другого адреса
+        self._warned = set()  # (имя, адрес), о которых уже предупредили
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._selector = selectors.DefaultSelector()
+        self._buffers = {}  # TCP-сокет -> (адрес агента, недочитанные байты)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.transport == 'udp':
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            # Всплески от сотен агентов не должны переполнять буфер сокета
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(self.address)
+        if self.transport == 'tcp':
+            sock.listen(128)
+        sock.setblocking(False)
+        self._listener = sock
+        self.address = sock.getsockname()
+        self._selector.register(sock, selectors.EVENT_READ)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        print(f"📡 Dashboard listening on {self.transport}://{self.address[0]}:{self.address[1]}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        for key in list(self._selector.get_map().values()):
+            key.fileobj.close()
+        self._selector.close()
+
+    def take_dirty(self):
+        """Имена хостов, изменившихся с прошлого вызова"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def _apply(self, packet, address):
+        try:
+            result = self.decoder.decode(packet, address)
+        except (struct.error, UnicodeError):
+            return
+        if result is None:
+            return
+        name, values = result
+        host = self.hosts.get(name)
+        now = time.monotonic()
+        if host is None:
+            host = self.hosts[name] = HostState(name, address)
+        elif host.address != address:
+            if host.address is not None and now - host.updated <= STALE_AFTER:
+                self.conflicts += 1
+                if (name, address) not in self._warned:
+                    self._warned.add((name, address))
+                    print(f"⚠️ Host name {name!r} from {address[0]}:{address[1]} is already "
+                          f"used by an agent at {host.address[0]}:{host.address[1]} - ignored")
+                return
+            self.decoder.forget(host.address, name)
+            host.address = address
+        host.values = values
+        host.updated = now
+        host.packets += 1
+        self.packets += 1
+        with self._lock:
+            self._dirty.add(name)
+
+    def _run(self):
+        while not self._stop.is_set():
+            for key, _ in self._selector.select(timeout=0.5):
+                sock = key.fileobj
+                if self.transport == 'udp':
+                    self._drain_udp(sock)
+                elif sock is self._listener:
+                    self._accept(sock)
+                else:
+                    self._read_tcp(sock)
+
+    def _accept(self, listener):
+        # Агент мог сбросить соединение между select() и accept() -
+        # теряем только его, а поток приемника продолжает работать
+        try:
+            connection, address = listener.accept()
+        except OSError:
+            return
+        connection.setblocking(False)
+        self._buffers[connection] = (address, b'')
+        self._selector.register(connection, selectors.EVENT_READ)
+
+    def _drain_udp(self, sock):
+        # Читаем все, что накопилось, за одно пробуждение
+        while True:
+            try:
+                packet, address = sock.recvfrom(2048)
+            except OSError:
+                # BlockingIOError - все прочитано; в Windows сюда же приходит
+                # ConnectionResetError от ICMP на прошлую отправку
+                return
+            self._apply(packet, address)
+
+    def _read_tcp(self, sock):
+        try:
+            data = sock.recv(65536)
+        except OSError:
+            data = b''
+        if not data:
+            self._selector.unregister(sock)
+            address, _ = self._buffers.pop(sock, (None, b''))
+            sock.close()
+            # Имена этого соединения свободны: переподключившийся агент придет с нового порта
+            for host in self.hosts.values():
+                if host.address == address:
+                    self.decoder.forget(address, host.name)
+                    host.address = None
+            return
+        address, buffer = self._buffers[sock]
+        buffer += data
+        offset = 0
+        while len(buffer) - offset >= FRAME.size:
+            length, = FRAME.unpack_from(buffer, offset)
+            if len(buffer) - offset - FRAME.size < length:
+                break
+            start = offset + FRAME.size
+            self._apply(buffer[start:start + length], address)
+            offset = start + length
+        self._buffers[sock] = (address, buffer[offset:])
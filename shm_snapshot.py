@@ -0,0 +1,179 @@
+"""Последний снимок монитора в shared memory для локальных потребителей.
+
+Монитор пишет каждый снимок в сегмент фиксированной раскладки, а другие
+программы на машине (трей-скрипт, отправщик логов) читают его без psutil,
+без системных вызовов и без собственного опроса системы:
+
+    from shm_snapshot import SharedSnapshotReader
+    reader = SharedSnapshotReader()
+    print(reader.read()['cpu_usage'])
+
+Консистентность - seqlock: писатель делает счетчик версии нечетным, пишет
+данные и делает его четным. Читатель повторяет чтение, пока версия до и
+после копирования не совпадет и не будет четной, так что рваных значений
+он не видит. Модуль не зависит от psutil и остального монитора.
+"""
+import json
+import os
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+DEFAULT_NAME = "pcmonitor"
+
+MAGIC = b'PCMS'
+LAYOUT_VERSION = 3
+
+# Раскладка сегмента (little-endian):
+#   0  magic (4s), версия раскладки (H), резерв (H), PID писателя (Q)
+#   16 счетчик seqlock (Q): нечетный - идет запись
+#   24 данные снимка (PAYLOAD)
+HEADER = struct.Struct('<4sHHQ')
+SEQUENCE = struct.Struct('<Q')
+SEQUENCE_OFFSET = 16
+PAYLOAD_OFFSET = 24
+
+# Числовые поля - double, отсутствующее значение - NaN; сеть - байт/с
+FIELDS = (
+    'seq', 'timestamp',
+    'cpu_usage', 'cpu_freq', 'cpu_cores',
+    'gpu_usage', 'gpu_memory_used', 'gpu_memory_total',
+    'gpu_temperature', 'gpu_process_count', 'gpu_count',
+    'mem_percent', 'mem_used', 'mem_available', 'mem_total',
+    'disk_percent', 'disk_used', 'disk_free', 'disk_total',
+    'net_upload', 'net_download',
+)
+PAYLOAD = struct.Struct('<' + 'd' * len(FIELDS) + '16s')  # + gpu_vendor
+SIZE = PAYLOAD_OFFSET + PAYLOAD.size
+
+NAN = float('nan')
+
+
+class SharedSnapshotWriter:
+    """Пишет снимки в сегмент shared memory (используется монитором)"""
+
+    def __init__(self, name=DEFAULT_NAME):
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=SIZE)
+        except FileExistsError:
+            # Сегмент остался от упавшего монитора - пересоздаем, но чужой
+            # живой сегмент не трогаем: его читатели остались бы без данных
+            existing = _attach(name)
+            owner = _owner(existing)
+            existing.close()
+            if owner is not None and _alive(owner):
+                raise FileExistsError(f"shared memory '{name}' is in use by monitor "
+                                      f"PID {owner}; pick another name with --shm NAME") from None
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=SIZE)
+        self.buf = self.shm.buf
+        self.version = 0
+        HEADER.pack_into(self.buf, 0, MAGIC, LAYOUT_VERSION, 0, os.getpid())
+        SEQUENCE.pack_into(self.buf, SEQUENCE_OFFSET, 0)
+
+    def write(self, snapshot):
+        record = snapshot.to_record()
+        record['seq'] = snapshot.seq
+        values = [NAN if record[field] is None else record[field] for field in FIELDS]
+        vendor = record['gpu_vendor'].encode()[:16]
+        
+        # Нечетная версия - читатели ждут; четная - данные консистентны
+        SEQUENCE.pack_into(self.buf, SEQUENCE_OFFSET, self.version + 1)
+        PAYLOAD.pack_into(self.buf, PAYLOAD_OFFSET, *values, vendor)
+        self.version += 2
+        SEQUENCE.pack_into(self.buf, SEQUENCE_OFFSET, self.version)
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+class SharedSnapshotReader:
+    """Читает последний снимок, опубликованный монитором"""
+
+    def __init__(self, name=DEFAULT_NAME):
+        self.shm = _attach(name)
+        self.buf = self.shm.buf
+        magic, version, _, _ = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            self.close()
+            raise ValueError(f"unsupported shared memory layout in '{name}'")
+
+    def version(self):
+        """Текущий счетчик seqlock: меняется с каждым новым снимком"""
+        return SEQUENCE.unpack_from(self.buf, SEQUENCE_OFFSET)[0]
+
+    def read(self, retries=1000):
+        """Консистентная копия снимка (dict) или None, если снимков еще не было"""
+        for _ in range(retries):
+            before = SEQUENCE.unpack_from(self.buf, SEQUENCE_OFFSET)[0]
+            if before & 1:
+                # Писатель в середине записи
+                time.sleep(0)
+                continue
+            *values, vendor = PAYLOAD.unpack_from(self.buf, PAYLOAD_OFFSET)
+            if SEQUENCE.unpack_from(self.buf, SEQUENCE_OFFSET)[0] != before:
+                continue
+            if before == 0:
+                return None
+            # NaN (значения нет) отдаем как None
+            record = {field: None if value != value else value
+                      for field, value in zip(FIELDS, values)}
+            record['seq'] = int(record['seq'])
+            record['gpu_vendor'] = vendor.rstrip(b'\0').decode()
+            return record
+        raise TimeoutError("shared memory snapshot is being rewritten too often")
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+
+
+def _owner(shm):
+    """PID монитора, создавшего сегмент; None - раскладка другой версии"""
+    if shm.size < HEADER.size:
+        return None
+    magic, version, _, pid = HEADER.unpack_from(shm.buf, 0)
+    if magic != MAGIC or version != LAYOUT_VERSION:
+        return None
+    return pid
+
+
+def _alive(pid):
+    if sys.platform == 'win32':
+        # В Windows сегмент живет, пока открыт хоть одним процессом,
+        # так что уцелевший сегмент всегда чей-то живой
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _attach(name):
+    """Подключаемся к сегменту, не отдавая его resource_tracker читателя.
+
+    Иначе при выходе читателя трекер удалил бы чужой сегмент (Python < 3.13).
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if sys.platform != 'win32':
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+if __name__ == "__main__":
+    # python shm_snapshot.py [NAME] - печатает последний снимок в JSON
+    reader = SharedSnapshotReader(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_NAME)
+    print(json.dumps(reader.read()))
+    reader.close()
@@ -0,0 +1,59 @@
+"""Цвета, форматирование и карточка метрики - общие для окна и сводной панели.
+
+Модуль зависит только от tkinter: dashboard.py импортирует его на машине,
+где нет psutil (туда приходят только пакеты агентов).
+"""
+import tkinter as tk
+
+# Современные цвета
+COLORS = {
+    'bg': '#1a1a1a',
+    'card_bg': '#2d2d2d',
+    'accent': '#00ff88',
+    'text_primary': '#ffffff',
+    'text_secondary': '#b0b0b0',
+    'cpu_color': '#ff6b6b',
+    'gpu_color': '#4ecdc4',
+    'mem_color': '#45b7d1',
+    'disk_color': '#96ceb4',
+    'net_color': '#feca57',
+    'alert_warning': '#feca57',
+    'alert_critical': '#ff4757',
+    'stale': '#606060'
+}
+
+
+def format_bytes(value, digits=1):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if value < 1024.0:
+            return f"{value:.{digits}f} {unit}"
+        value /= 1024.0
+    return f"{value:.{digits}f} TB"
+
+
+def format_rate(bytes_per_second, digits=1):
+    """Скорость с автоматическими единицами: от B/s до TB/s (10/25 GbE)"""
+    return f"{format_bytes(bytes_per_second, digits)}/s"
+
+
+def metric_card(parent, title, value, color, title_size=9, value_size=14, pady=8):
+    """Карточка: заголовок и значение под ним; (рамка, метка значения)"""
+    card = tk.Frame(parent, bg=COLORS['card_bg'],
+                    relief='flat', bd=0,
+                    highlightbackground='#404040',
+                    highlightthickness=1)
+
+    # Заголовок
+    title_label = tk.Label(card, text=title,
+                           font=('Segoe UI', title_size),
+                           fg=COLORS['text_secondary'],
+                           bg=COLORS['card_bg'])
+    title_label.pack(pady=(pady, 2))
+
+    # Значение
+    value_label = tk.Label(card, text=value,
+                           font=('Segoe UI', value_size, 'bold'),
+                           fg=color,
+                           bg=COLORS['card_bg'])
+    value_label.pack(pady=(0, pady))
+    return card, value_label
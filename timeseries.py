@@ -0,0 +1,117 @@
+"""Многоуровневое хранилище истории метрик на кольцевых буферах array('d')"""
+import math
+from array import array
+
+# (шаг в секундах, глубина в секундах): 1 с за час, 10 с за сутки, 1 мин за 30 дней
+DEFAULT_TIERS = (
+    (1, 60 * 60),
+    (10, 24 * 60 * 60),
+    (60, 30 * 24 * 60 * 60),
+)
+
+NAN = float('nan')
+
+
+class RollupTier:
+    """Кольцо агрегатов min/avg/max с фиксированным шагом по времени.
+
+    Память выделяется один раз при создании. Каждый сэмпл обновляет
+    агрегаты текущей ячейки на месте, поэтому последняя ячейка всегда
+    актуальна, а не ждет закрытия интервала. Пропущенные интервалы
+    заполняются NaN.
+    """
+    __slots__ = ('resolution', 'capacity', 'mins', 'avgs', 'maxs',
+                 'head', 'count', 'bucket', '_sum', '_n')
+
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.capacity = capacity
+        # float64: байтовые метрики (mem_used, disk_used) во float32 округлялись
+        # бы до сотен байт, и min/max сравнивали бы уже округленные значения
+        self.mins = array('d', [NAN]) * capacity
+        self.avgs = array('d', [NAN]) * capacity
+        self.maxs = array('d', [NAN]) * capacity
+        self.head = -1  # индекс текущей ячейки
+        self.count = 0  # сколько ячеек заполнено
+        self.bucket = None  # номер текущего интервала
+        self._sum = 0.0
+        self._n = 0
+
+    def add(self, t, value):
+        bucket = int(t // self.resolution)
+        if self.bucket is None or bucket > self.bucket:
+            # Переходим к новой ячейке, пропущенные интервалы - NaN
+            steps = 1 if self.bucket is None else min(bucket - self.bucket, self.capacity)
+            for _ in range(steps - 1):
+                self.head = (self.head + 1) % self.capacity
+                self.mins[self.head] = self.avgs[self.head] = self.maxs[self.head] = NAN
+            self.head = (self.head + 1) % self.capacity
+            self.count = min(self.count + steps, self.capacity)
+            self.bucket = bucket
+            self._sum = 0.0
+            self._n = 0
+            self.mins[self.head] = value
+            self.maxs[self.head] = value
+        else:
+            # Тот же интервал (или часы ушли назад) - дополняем текущую ячейку
+            if value < self.mins[self.head]:
+                self.mins[self.head] = value
+            if value > self.maxs[self.head]:
+                self.maxs[self.head] = value
+        self._sum += value
+        self._n += 1
+        self.avgs[self.head] = self._sum / self._n
+
+    def tail(self, count, kind='avg'):
+        """Последние count ячеек от старых к новым (меньше, если еще не заполнено)"""
+        column = {'min': self.mins, 'avg': self.avgs, 'max': self.maxs}[kind]
+        count = min(count, self.count)
+        start = self.head + 1 - count
+        if start >= 0:
+            return column[start:self.head + 1]
+        return column[start:] + column[:self.head + 1]
+
+
+class TimeSeriesStore:
+    """История для набора метрик: по одному RollupTier на каждый уровень.
+
+    Добавление сэмпла - O(1) на уровень, без выделения памяти под сам сэмпл;
+    объем памяти фиксирован и определяется только списком уровней.
+    """
+
+    def __init__(self, metrics, tiers=DEFAULT_TIERS):
+        self.metrics = tuple(metrics)
+        self.tiers = tuple(tiers)
+        self.series = {
+            name: [RollupTier(resolution, duration // resolution) for resolution, duration in self.tiers]
+            for name in self.metrics
+        }
+
+    def append(self, t, values):
+        """values - значения в порядке self.metrics"""
+        for name, value in zip(self.metrics, values):
+            if value is None:
+                continue
+            for tier in self.series[name]:
+                tier.add(t, value)
+
+    def tail(self, metric, count, tier=0, kind='avg', fill=0.0):
+        """Ровно count последних значений для графика.
+
+        Пропуски (NaN) заменяются предыдущим значением, недостающее начало
+        дополняется fill - как у прежних deque([0] * 60).
+        """
+        values = self.series[metric][tier].tail(count, kind)
+        result = [fill] * (count - len(values))
+        last = fill
+        for value in values:
+            if not math.isnan(value):
+                last = value
+            result.append(last)
+        return tuple(result)
+
+    def memory_bytes(self):
+        return sum(column.itemsize * len(column)
+                   for tiers in self.series.values()
+                   for tier in tiers
+                   for column in (tier.mins, tier.avgs, tier.maxs))